@@ -232,7 +232,8 @@ else
     ok "Firewall: basic (SSH + 8080)"
 fi
 
-# Log rotation (prevents disk fill from ai-detect.log, etc.)
+# Log rotation (prevents disk fill from ai-detect.log, etc.). Not recursive:
+# clearpoint-logs/engine/ belongs to detect.py, which rotates it itself
 sudo tee /etc/logrotate.d/clearpoint > /dev/null << EOF
 /home/$USER/clearpoint-logs/*.log
 /home/$USER/vod-upload-log.txt
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+Clearpoint AI — Offline Pipeline Benchmark
+Replays recorded MP4 segments (or synthetic frames) through the detection
+pipeline: FrameGrabber → MotionDetector → YOLOv8Detector → draw/encode →
+AlertSender (mocked, nothing leaves the box).
+
+Run:  python3 ~/clearpoint-ai/benchmark.py --video ~/clearpoint-recordings/<user>/footage/<cam>
+      python3 ~/clearpoint-ai/benchmark.py --synthetic --cameras 1,4,8 --backend openvino,onnxruntime
+      python3 ~/clearpoint-ai/benchmark.py --synthetic --compare ~/clearpoint-logs/benchmark-old.json
+      python3 ~/clearpoint-ai/benchmark.py --synthetic --remote-check
+
+Writes a JSON report (one run per backend × camera count) to ~/clearpoint-logs.
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import hashlib
+import platform
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from detect import (  # noqa: E402
+    LOG_DIR, Config, YOLOv8Detector, MotionDetector, AlertSender, FrameGrabber,
+    InferenceServer, draw_detections, encode_sparse_output, decode_sparse_output,
+    log, log_pipeline, metrics,
+)
+
+REPORT_VERSION = 1
+STAGES = ["grab", "motion", "preprocess", "lock_wait", "inference",
+          "postprocess", "draw", "encode", "alert", "total"]
+
+
+# ─── Frame sources ─────────────────────────────────────────
+class ReplayGrabber(FrameGrabber):
+    """FrameGrabber that plays a recorded file at its native FPS, looping."""
+
+    def __init__(self, path: str, name: str):
+        self.decode_ms: list[float] = []
+        super().__init__(path, name)
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
+        if not cap.isOpened():
+            log.error(f"Cannot open {self.rtsp_url}")
+            return
+        fps = cap.get(cv2.CAP_PROP_FPS) or 15
+        frame_interval = 1.0 / max(1.0, min(fps, 60))
+        self.connected = True
+        next_frame = time.time()
+        try:
+            while self.running:
+                t0 = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Loop
+                    continue
+                self.decode_ms.append((time.perf_counter() - t0) * 1000)
+                with self.lock:
+                    self.frame = frame
+                    self.frame_seq = next(self._seq_counter)
+                    self.frame_time = time.time()
+                    self.ret = True
+                next_frame += frame_interval
+                delay = next_frame - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame = time.time()  # Decoder can't keep up — don't spiral
+        finally:
+            self.connected = False
+            cap.release()
+
+
+class SyntheticGrabber(FrameGrabber):
+    """FrameGrabber producing noise frames with a moving block (triggers motion)."""
+
+    def __init__(self, name: str, size: tuple[int, int], fps: float = 15):
+        self.size = size
+        self.fps = fps
+        self.decode_ms: list[float] = []
+        super().__init__(f"synthetic://{name}", name)
+
+    def _run(self):
+        w, h = self.size
+        rng = np.random.default_rng(abs(hash(self.name)) % (2 ** 32))
+        background = rng.integers(40, 200, size=(h, w, 3), dtype=np.uint8)
+        self.connected = True
+        step = 0
+        while self.running:
+            t0 = time.perf_counter()
+            frame = background.copy()
+            x = (step * 16) % max(1, w - 200)
+            cv2.rectangle(frame, (x, h // 3), (x + 160, h // 3 + 320), (30, 30, 30), -1)
+            self.decode_ms.append((time.perf_counter() - t0) * 1000)
+            with self.lock:
+                self.frame = frame
+                self.frame_seq = next(self._seq_counter)
+                self.frame_time = time.time()
+                self.ret = True
+            step += 1
+            time.sleep(1.0 / self.fps)
+        self.connected = False
+
+
+# ─── Mocked alert transport ───────────────────────────────
+class _OkResponse:
+    ok = True
+    status_code = 200
+    text = ""
+
+
+class _MockSession:
+    """Stands in for requests.Session — records payloads, never sends."""
+
+    def __init__(self):
+        self.posts = 0
+        self.headers = {}
+        self._lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        with self._lock:
+            self.posts += 1
+        return _OkResponse()
+
+
+def make_offline_sender(config: Config, snapshot_dir: Path) -> AlertSender:
+    config.snapshot_dir = snapshot_dir
+    config.cooldown_seconds = 0  # Exercise the full alert path on every frame
+    sender = AlertSender(config)
+    sender.session = _MockSession()
+    return sender
+
+
+# ─── Process stats ─────────────────────────────────────────
+def _read_rss_mb() -> tuple[float, float]:
+    """(current RSS, peak RSS) in MB from /proc, with a getrusage fallback."""
+    try:
+        fields = {}
+        for line in Path("/proc/self/status").read_text().splitlines():
+            key, _, value = line.partition(":")
+            fields[key] = value
+        return (int(fields["VmRSS"].split()[0]) / 1024,
+                int(fields["VmHWM"].split()[0]) / 1024)
+    except Exception:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return peak, peak
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    arr = np.asarray(samples, dtype=np.float64)
+    p50, p90, p95, p99 = np.percentile(arr, [50, 90, 95, 99])
+    return {
+        "count": int(arr.size),
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(arr.max()), 3),
+    }
+
+
+# ─── Benchmark run ─────────────────────────────────────────
+def _camera_worker(grabber, detector, motion, sender, cam_id, deadline, samples, lock):
+    last_seq = 0
+    local = {stage: [] for stage in STAGES}
+    while time.time() < deadline:
+        t_start = time.perf_counter()
+        ret, frame, seq, _ = grabber.get_latest_frame()
+        if not ret or seq == last_seq:
+            time.sleep(0.005)
+            continue
+        last_seq = seq
+        t_grab = time.perf_counter()
+
+        motion.detect(frame)
+        t_motion = time.perf_counter()
+
+        timings = {}
+        detections = detector.detect(frame, timings=timings)
+        t_detect = time.perf_counter()
+
+        annotated = draw_detections(frame, detections)
+        t_draw = time.perf_counter()
+        cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, 60])
+        t_encode = time.perf_counter()
+
+        for det in detections:
+            sender.send_alert(cam_id, det, annotated)
+        t_alert = time.perf_counter()
+
+        local["grab"].append((t_grab - t_start) * 1000)
+        local["motion"].append((t_motion - t_grab) * 1000)
+        for stage in ("preprocess", "lock_wait", "inference", "postprocess"):
+            if stage in timings:
+                local[stage].append(timings[stage])
+        local["draw"].append((t_draw - t_detect) * 1000)
+        local["encode"].append((t_encode - t_draw) * 1000)
+        local["alert"].append((t_alert - t_encode) * 1000)
+        local["total"].append((t_alert - t_start) * 1000)
+
+    with lock:
+        for stage, values in local.items():
+            samples[stage].extend(values)
+
+
+def run_once(config: Config, backend: str, num_cameras: int, args, snapshot_dir: Path) -> dict | None:
+    detector = YOLOv8Detector(config, backend=backend)
+    if detector.model is None:
+        log.warning(f"⏭️  Skipping backend {backend}: model not loaded")
+        return None
+
+    sender = make_offline_sender(config, snapshot_dir)
+    grabbers = []
+    for i in range(num_cameras):
+        if args.video:
+            path = args.video[i % len(args.video)]
+            grabbers.append(ReplayGrabber(str(path), f"cam{i + 1}"))
+        else:
+            grabbers.append(SyntheticGrabber(f"cam{i + 1}", args.synthetic_size))
+
+    # Wait for sources and let the model warm up outside the measured window
+    for _ in range(100):
+        if all(g.get_latest_frame()[0] for g in grabbers):
+            break
+        time.sleep(0.1)
+    ok, frame, _, _ = grabbers[0].get_latest_frame()
+    if ok:
+        for _ in range(args.warmup):
+            detector.detect(frame)
+    for g in grabbers:
+        g.decode_ms.clear()
+
+    samples = {stage: [] for stage in STAGES}
+    lock = threading.Lock()
+    cpu_start = os.times()
+    wall_start = time.time()
+    deadline = wall_start + args.duration
+    workers = [
+        threading.Thread(
+            target=_camera_worker,
+            args=(g, detector, MotionDetector(config), sender, f"bench-{i + 1}",
+                  deadline, samples, lock),
+            daemon=True,
+        )
+        for i, g in enumerate(grabbers)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.time() - wall_start
+    cpu_end = os.times()
+    rss_mb, peak_rss_mb = _read_rss_mb()
+
+    for g in grabbers:
+        g.stop()
+    sender.stop()  # Flush queued alerts into the mock session
+    decode_ms = [v for g in grabbers for v in g.decode_ms]
+
+    frames = len(samples["total"])
+    cpu_seconds = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    stages = {stage: _percentiles(values) for stage, values in samples.items()}
+    stages["decode"] = _percentiles(decode_ms)
+    return {
+        "backend": detector.backend_name,
+        "cameras": num_cameras,
+        "duration_s": round(wall, 2),
+        "frames": frames,
+        "fps": round(frames / wall, 3) if wall else 0.0,
+        "fps_per_camera": round(frames / wall / num_cameras, 3) if wall else 0.0,
+        "cpu_percent": round(cpu_seconds / wall * 100, 1) if wall else 0.0,
+        "rss_mb": round(rss_mb, 1),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "alerts": sender.session.posts,
+        "stages_ms": stages,
+    }
+
+
+# ─── Remote inference check (both peers on localhost) ──────
+def _sample_frames(args, count: int) -> list[np.ndarray]:
+    """count distinct frames from the first --video segment or the synthetic source."""
+    grabber = (ReplayGrabber(str(args.video[0]), "check") if args.video
+               else SyntheticGrabber("check", args.synthetic_size))
+    frames, last_seq = [], None
+    deadline = time.time() + 30
+    while len(frames) < count and time.time() < deadline:
+        ok, frame, seq, _ = grabber.get_latest_frame()
+        if ok and seq != last_seq:
+            frames.append(frame)
+            last_seq = seq
+        time.sleep(0.05)
+    grabber.stop()
+    return frames
+
+
+def remote_check(config: Config, args) -> bool:
+    """Serve the models on a free 127.0.0.1 port and run the "remote" backend
+    against it: raw outputs (above the confidence threshold) and detections
+    must match the local model's, and a server stalled past the timeout
+    must fall back to local inference within the caller's deadline."""
+    frames = _sample_frames(args, args.remote_frames)
+    if not frames:
+        log.error("❌ Remote check: no frames from the source")
+        return False
+    server = InferenceServer(config, "127.0.0.1", 0)
+    server.start()
+    remote_config = copy.copy(config)
+    remote_config.inference_backend = "remote"
+    remote_config.remote_inference_url = f"http://127.0.0.1:{server.server.port}"
+    remote_config.remote_inference_timeout = args.remote_timeout
+    local = YOLOv8Detector(config)
+    remote = YOLOv8Detector(remote_config)
+    ok = True
+    try:
+        input_h, input_w = config.model_input_size
+        fallbacks = sum(metrics.remote_fallbacks.snapshot().values())
+        mismatched = 0
+        for frame in frames:
+            blob, _ = local._preprocess(frame, input_h, input_w)
+            expected = decode_sparse_output(encode_sparse_output(
+                local.model.infer(blob), config.default_confidence))
+            same_output = np.allclose(remote.model.infer(blob), expected, atol=1e-4)
+            same_detections = _same_detections(remote.detect(frame), local.detect(frame))
+            mismatched += not (same_output and same_detections)
+        fell_back = sum(metrics.remote_fallbacks.snapshot().values()) - fallbacks
+        if mismatched or fell_back:
+            log.error(f"❌ Remote check: {mismatched}/{len(frames)} frames differ from local, "
+                      f"{fell_back:g} calls fell back to local")
+            ok = False
+        else:
+            log.info(f"✅ Remote check: {len(frames)} frames — outputs and detections match local")
+
+        # Stall the server past the timeout → the call must run locally
+        infer = server.server.post_routes["/infer"]
+        server.server.post_routes["/infer"] = lambda q, b, h: (
+            time.sleep(args.remote_timeout * 3), infer(q, b, h))[1]
+        fallbacks = sum(metrics.remote_fallbacks.snapshot().values())
+        t0 = time.perf_counter()
+        detections = remote.detect(frames[0])
+        elapsed = time.perf_counter() - t0
+        fell_back = sum(metrics.remote_fallbacks.snapshot().values()) - fallbacks
+        limit = args.remote_timeout * 2 + 1
+        if fell_back != 1 or elapsed > limit or not _same_detections(detections, local.detect(frames[0])):
+            log.error(f"❌ Remote check: stalled server — {fell_back:g} fallbacks, "
+                      f"{elapsed:.2f}s (limit {limit:g}s)")
+            ok = False
+        else:
+            log.info(f"✅ Remote check: stalled server → local fallback after {elapsed:.2f}s")
+    finally:
+        server.stop()
+    return ok
+
+
+def _same_detections(a: list, b: list) -> bool:
+    key = lambda d: (d["class_id"], d["bbox"])  # noqa: E731
+    return (sorted(map(key, a)) == sorted(map(key, b)) and
+            all(abs(x["confidence"] - y["confidence"]) < 1e-4
+                for x, y in zip(sorted(a, key=key), sorted(b, key=key))))
+
+
+# ─── Report helpers ────────────────────────────────────────
+def _host_info() -> dict:
+    cpu_model = platform.processor()
+    try:
+        for line in Path("/proc/cpuinfo").read_text().splitlines():
+            if line.startswith("model name"):
+                cpu_model = line.split(":", 1)[1].strip()
+                break
+    except Exception:
+        pass
+    return {
+        "hostname": platform.node(),
+        "cpu_model": cpu_model,
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def _engine_version() -> str:
+    """Short hash of detect.py so reports can be matched to code versions."""
+    detect_py = Path(__file__).parent / "detect.py"
+    return hashlib.sha256(detect_py.read_bytes()).hexdigest()[:12]
+
+
+def compare_reports(baseline: dict, current: dict) -> list[dict]:
+    """Diff fps and p95 latencies of matching (backend, cameras) runs."""
+    base_runs = {(r["backend"], r["cameras"]): r for r in baseline.get("runs", [])}
+    rows = []
+    for run in current.get("runs", []):
+        base = base_runs.get((run["backend"], run["cameras"]))
+        if not base:
+            continue
+        row = {"backend": run["backend"], "cameras": run["cameras"],
+               "fps_change_pct": _pct(base["fps"], run["fps"]),
+               "cpu_change_pct": _pct(base["cpu_percent"], run["cpu_percent"]),
+               "p95_change_pct": {}}
+        for stage, stats in run["stages_ms"].items():
+            base_stats = base["stages_ms"].get(stage, {})
+            if "p95" in stats and "p95" in base_stats:
+                row["p95_change_pct"][stage] = _pct(base_stats["p95"], stats["p95"])
+        rows.append(row)
+    return rows
+
+
+def _pct(old: float, new: float) -> float | None:
+    if not old:
+        return None
+    return round((new - old) / old * 100, 1)
+
+
+def _parse_list(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _collect_videos(paths: list[str]) -> list[Path]:
+    videos = []
+    for p in paths:
+        path = Path(p).expanduser()
+        if path.is_dir():
+            videos.extend(sorted(path.rglob("*.mp4")))
+        elif path.exists():
+            videos.append(path)
+        else:
+            log.warning(f"Video not found: {path}")
+    return videos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the detection pipeline")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--video", action="append", help="MP4 segment or directory (repeatable)")
+    src.add_argument("--synthetic", action="store_true", help="Generate synthetic frames")
+    parser.add_argument("--synthetic-size", default="1920x1080", help="WxH of synthetic frames")
+    parser.add_argument("--cameras", default="1,4", help="Camera counts to run, e.g. 1,4,8")
+    parser.add_argument("--backend", default="auto", help="auto, openvino, onnxruntime, remote (comma list)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per run")
+    parser.add_argument("--warmup", type=int, default=5, help="Warm-up inferences per run")
+    parser.add_argument("--output", help="Report path (default: ~/clearpoint-logs/benchmark-<ts>.json)")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    parser.add_argument("--remote-check", action="store_true",
+                        help="Check the remote backend against a local --serve-inference, then exit")
+    parser.add_argument("--remote-frames", type=int, default=8, help="Frames for --remote-check")
+    parser.add_argument("--remote-timeout", type=float, default=0.5,
+                        help="remote_inference_timeout for --remote-check")
+    args = parser.parse_args()
+    log_pipeline.start()
+
+    if args.video:
+        args.video = _collect_videos(args.video)
+        if not args.video:
+            log.error("No video segments found")
+            sys.exit(1)
+    w, h = (int(v) for v in args.synthetic_size.lower().split("x"))
+    args.synthetic_size = (w, h)
+
+    config = Config(require_token=False)
+    if args.remote_check:
+        sys.exit(0 if remote_check(config, args) else 1)
+    snapshot_dir = LOG_DIR / "benchmark-snapshots"
+    snapshot_dir.mkdir(exist_ok=True)
+
+    runs = []
+    for backend in _parse_list(args.backend):
+        for num_cameras in (int(c) for c in _parse_list(args.cameras)):
+            log.info(f"⏱️  Benchmark: backend={backend} cameras={num_cameras} ({args.duration:.0f}s)")
+            result = run_once(config, backend, num_cameras, args, snapshot_dir)
+            if result:
+                runs.append(result)
+                log.info(
+                    f"   {result['fps']:.2f} fps, CPU {result['cpu_percent']:.0f}%, "
+                    f"RSS {result['rss_mb']:.0f}MB, inference p95 "
+                    f"{result['stages_ms']['inference'].get('p95', 0):.1f}ms"
+                )
+
+    for f in snapshot_dir.glob("*.jpg"):
+        f.unlink()
+
+    report = {
+        "report_version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "engine_version": _engine_version(),
+        "host": _host_info(),
+        "source": ({"videos": [str(v) for v in args.video]} if args.video
+                   else {"synthetic": args.synthetic_size}),
+        "runs": runs,
+    }
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        report["comparison"] = {
+            "baseline_engine_version": baseline.get("engine_version"),
+            "runs": compare_reports(baseline, report),
+        }
+
+    out = Path(args.output) if args.output else \
+        LOG_DIR / f"benchmark-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2))
+    log.info(f"📄 Report written: {out}")
+
+
+if __name__ == "__main__":
+    main()
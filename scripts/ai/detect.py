@@ -6,17 +6,40 @@ Sends alerts to the Clearpoint API when objects are detected.
 """
 
 import os
+import re
 import sys
 import json
 import time
+import argparse
+import asyncio
 import signal
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import atexit
+import gzip
 import logging
+import logging.handlers
+import queue
 import base64
+import bisect
+import concurrent.futures
+import ipaddress
+import itertools
+import multiprocessing
 import threading
-from datetime import datetime, timezone
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 from pathlib import Path
 from io import BytesIO
-from collections import defaultdict
+from multiprocessing import shared_memory
+from collections import OrderedDict, defaultdict, deque
+from contextlib import closing, nullcontext
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import cv2
 import numpy as np
@@ -26,13 +49,159 @@ import requests
 LOG_DIR = Path.home() / "clearpoint-logs"
 LOG_DIR.mkdir(exist_ok=True)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-    ],
-)
+# In a subdirectory: the installer's logrotate glob (clearpoint-logs/*.log)
+# must not rotate this file too — RotatingFileHandler owns its rotation
+LOG_FILE = LOG_DIR / "engine" / "detect.log"
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUPS = 10  # Rotated files are gzipped: detect.log.1.gz ...
+LOG_QUEUE_SIZE = 10000
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+
+class RateLimitFilter(logging.Filter):
+    """Collapses repetitive lines. A record logged with extra={"rate_key": k}
+    passes at most once per interval per key; the next one that passes
+    carries the count of the ones suppressed in between."""
+
+    MAX_KEYS = 2000
+
+    def __init__(self, interval: float = 10.0):
+        super().__init__()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._keys: dict = {}  # rate_key → (last passed at, suppressed since)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._keys.get(key, (0.0, 0))
+            if now - last < self.interval:
+                self._keys[key] = (last, suppressed + 1)
+                return False
+            self._keys[key] = (now, 0)
+            if len(self._keys) > self.MAX_KEYS:
+                stale = [k for k, (t, _) in self._keys.items() if now - t >= self.interval]
+                for k in stale:
+                    del self._keys[k]
+        if suppressed:
+            record.msg = f"{record.getMessage()} (+{suppressed} similar in {self.interval:g}s)"
+            record.args = None
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts, in clearpoint_log_records_dropped_total)
+    records when the queue is full, rather than blocking or raising in a camera thread."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.log_records_dropped.inc()
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class LogPipeline:
+    """Threads only enqueue log records; one listener thread formats and
+    writes them: to stdout, or to the rotating file once it is enabled
+    (stdout too only when it is a terminal). Spawned workers send their
+    records to the supervisor's listener. Nothing is installed until start()
+    (or add_file/listen/forward_to), so importing detect leaves logging alone."""
+
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.handlers: list[logging.Handler] = [stream]
+        self._listeners: list[logging.handlers.QueueListener] = []
+        self._queues = [self.queue]
+        self.handler: NonBlockingQueueHandler | None = None
+        self._reported_dropped = 0
+
+    def start(self):
+        """Route the root logger through the queue and start the listener."""
+        if self.handler is not None:
+            return
+        self._install(NonBlockingQueueHandler(self.queue))
+        self._restart()
+        atexit.register(self.stop)
+
+    def take_dropped(self) -> int:
+        """Records dropped on a full queue since the last call (hourly report)."""
+        if self.handler is None:
+            return 0
+        dropped = self.handler.dropped - self._reported_dropped
+        self._reported_dropped = self.handler.dropped
+        return dropped
+
+    def _install(self, handler: NonBlockingQueueHandler):
+        self.handler = handler
+        self._reported_dropped = 0
+        handler.addFilter(RateLimitFilter())
+        root = logging.getLogger()
+        root.handlers = [handler]
+        root.setLevel(logging.INFO)
+
+    def _restart(self):
+        self.stop()
+        self._listeners = [logging.handlers.QueueListener(q, *self.handlers,
+                                                          respect_handler_level=True)
+                           for q in self._queues]
+        for listener in self._listeners:
+            listener.start()
+
+    def add_file(self, path: Path = LOG_FILE):
+        """Write to a size-rotated file; rotated files are gzipped. Unless
+        stdout is a terminal, it stops getting lines — launchers that append
+        stdout to a file would otherwise get every line twice, unrotated."""
+        self.start()
+        try:
+            path.parent.mkdir(exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+        except OSError as e:
+            logging.getLogger("clearpoint-ai").warning(f"File logging disabled ({path}): {e}")
+            return
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.namer = lambda name: name + ".gz"
+        handler.rotator = _gzip_rotator
+        if not sys.stdout.isatty():
+            self.handlers = []
+        self.handlers.append(handler)
+        self._restart()
+
+    def listen(self, worker_queue):
+        """Also drain a multiprocessing queue that spawned workers log into."""
+        self.start()
+        self._queues.append(worker_queue)
+        self._restart()
+
+    def forward_to(self, worker_queue):
+        """Spawned worker: send every record to the supervisor's listener."""
+        self.stop()
+        self._queues = []
+        self._install(NonBlockingQueueHandler(worker_queue))
+
+    def stop(self):
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+
+
+log_pipeline = LogPipeline()
 log = logging.getLogger("clearpoint-ai")
 
 # ─── COCO class mapping ────────────────────────────────────
@@ -134,18 +303,255 @@ def draw_detections(frame: np.ndarray, detections: list) -> np.ndarray:
     return annotated
 
 
+# ─── Metrics (in-process, exported in Prometheus text format) ──
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape_label(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def snapshot(self) -> dict:
+        """{label_values: value} copy — diff two snapshots for a window."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, lv)} {v:g}" for lv, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Set explicitly, or computed at scrape time via a callback."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), callback=None):
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple, float] = {}
+        self.callback = callback  # () -> float, or {label_values: float}
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def remove(self, *label_values):
+        with self._lock:
+            self._values.pop(label_values, None)
+
+    def render(self) -> list[str]:
+        if self.callback is not None:
+            try:
+                value = self.callback()
+            except Exception:
+                return []
+            items = value.items() if isinstance(value, dict) else [((), value)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, lv)} {v:g}" for lv, v in items
+        ]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram — observe() is a bisect plus two adds."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=()):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # {label_values: [bucket counts..., +Inf count, sum]}
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    def totals(self, *label_values) -> tuple[int, float]:
+        """(count, sum) for one label set — or across all series if none given."""
+        with self._lock:
+            if label_values or not self.labels:
+                series = [self._series.get(label_values)]
+            else:
+                series = list(self._series.values())
+        series = [s for s in series if s is not None]
+        return sum(sum(s[:-1]) for s in series), sum(s[-1] for s in series)
+
+    def snapshot(self) -> dict:
+        """{label_values: [bucket counts..., +Inf count, sum]} copy — diff two
+        snapshots for a window."""
+        with self._lock:
+            return {lv: list(s) for lv, s in self._series.items()}
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(lv, list(s)) for lv, s in self._series.items()]
+        lines = self.header()
+        for lv, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labels + ("le",), lv + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            base = _format_labels(self.labels, lv)
+            lines.append(f"{self.name}_sum{base} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+# Latency buckets in seconds: 1ms … 30s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Metrics:
+    """All engine metrics. Module-level singleton (like `log`), so hot paths
+    record with one call and no object threading."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        h = self._add
+        self.grab_age = h(Histogram(
+            "clearpoint_frame_age_seconds",
+            "Age of the frame (since decode) when analysis starts",
+            ("camera",), LATENCY_BUCKETS))
+        self.preprocess = h(Histogram(
+            "clearpoint_preprocess_seconds", "Letterbox + normalize time",
+            ("model",), LATENCY_BUCKETS))
+        self.lock_wait = h(Histogram(
+            "clearpoint_inference_lock_wait_seconds", "Time waiting for the model lock",
+            ("model",), LATENCY_BUCKETS))
+        self.inference = h(Histogram(
+            "clearpoint_inference_seconds", "Model inference time",
+            ("model",), LATENCY_BUCKETS))
+        self.postprocess = h(Histogram(
+            "clearpoint_postprocess_seconds", "Output decode + NMS time",
+            ("model",), LATENCY_BUCKETS))
+        self.snapshot_encode = h(Histogram(
+            "clearpoint_snapshot_encode_seconds", "Snapshot annotate + JPEG encode time",
+            (), LATENCY_BUCKETS))
+        self.alert_post = h(Histogram(
+            "clearpoint_alert_post_seconds", "POST /ingest/alert round trip",
+            (), LATENCY_BUCKETS))
+        self.glass_to_alert = h(Histogram(
+            "clearpoint_glass_to_alert_seconds",
+            "Frame capture → successful /ingest/alert response",
+            (), LATENCY_BUCKETS))
+        self.frames_decoded = h(Counter(
+            "clearpoint_frames_decoded_total", "Frames decoded from the stream", ("camera",)))
+        self.frames_analyzed = h(Counter(
+            "clearpoint_frames_analyzed_total", "Frames run through the main model", ("camera",)))
+        self.frames_dropped = h(Counter(
+            "clearpoint_frames_dropped_total",
+            "Decoded frames replaced before analysis picked them up", ("camera",)))
+        self.read_failures = h(Counter(
+            "clearpoint_stream_read_failures_total", "Failed stream reads", ("camera",)))
+        self.alerts = h(Counter(
+            "clearpoint_alerts_total", "Alerts by outcome", ("type", "result")))
+        self.camera_fps = h(Gauge(
+            "clearpoint_camera_fps", "Per-camera frame rate over the last heartbeat",
+            ("camera", "kind")))
+        self.alert_queue_depth = h(Gauge(
+            "clearpoint_alert_queue_depth", "Alerts waiting to be POSTed"))
+        self.preprocess_cache = h(Counter(
+            "clearpoint_preprocess_cache_lookups_total", "Shared preprocess cache lookups",
+            ("result",)))
+        self.frames_rejected = h(Counter(
+            "clearpoint_frames_rejected_total", "Frames the quality gate kept from the models",
+            ("camera", "reason")))
+        self.bursts = h(Counter(
+            "clearpoint_bursts_total", "Burst sampling windows started", ("camera", "reason")))
+        self.shed_level = h(Gauge(
+            "clearpoint_load_shed_level", "Load shedding level (0 = all cameras at full rate)"))
+        self.thermal_level = h(Gauge(
+            "clearpoint_thermal_level", "Thermal back-off level (0 = no thermal limits)"))
+        self.cpu_temp = h(Gauge(
+            "clearpoint_cpu_temperature_celsius", "Hottest CPU sensor at the last thermal check"))
+        self.camera_armed = h(Gauge(
+            "clearpoint_camera_armed", "1 while the camera's arming schedule has it armed",
+            ("camera",)))
+        self.keyframe_checks = h(Counter(
+            "clearpoint_keyframe_checks_total", "Health-check keyframes grabbed while disarmed",
+            ("camera", "result")))
+        self.remote_fallbacks = h(Counter(
+            "clearpoint_remote_inference_fallbacks_total",
+            "Inference calls run locally because the remote peer failed", ("model",)))
+        self.log_records_dropped = h(Counter(
+            "clearpoint_log_records_dropped_total", "Log records dropped on a full log queue"))
+
+    def _add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def observe_detect(self, model: str, timings: dict):
+        """Record YOLOv8Detector.detect() stage timings (ms)."""
+        self.preprocess.observe(timings["preprocess"] / 1000, model)
+        self.lock_wait.observe(timings["lock_wait"] / 1000, model)
+        self.inference.observe(timings["inference"] / 1000, model)
+        self.postprocess.observe(timings["postprocess"] / 1000, model)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
 # ─── Configuration ──────────────────────────────────────────
 class Config:
-    def __init__(self):
+    def __init__(self, require_token: bool = True):
         self.config_path = Path.home() / "clearpoint-core" / "ai-config.json"
         self.env_path = Path.home() / "clearpoint-core" / ".env"
 
-        # API
+        # API (offline tools pass require_token=False — they never call it)
         self.api_base = "https://www.clearpoint.co.il/api"
-        self.device_token = self._load_device_token()
+        self.device_token = self._load_device_token(require_token)
 
         # Detection settings (defaults, can be overridden per camera)
         self.analysis_fps = 1            # Frames to analyze per second
+        # Throttle: analyze 1 frame per 2 seconds per camera.
+        # Reduces CPU from ~185% to ~123% while still detecting people/vehicles.
+        self.analysis_interval = 2.0
         self.motion_threshold = 25       # Pixel diff threshold for motion
         self.motion_min_area = 500       # Min contour area to count as motion
         self.motion_blur_size = 21       # Gaussian blur kernel size
@@ -153,40 +559,243 @@ class Config:
         self.cooldown_seconds = 60       # 1 min cooldown per camera+type (server enforces rule cooldown)
         self.periodic_scan_interval = 10  # Run YOLO every N seconds even without motion
 
+        # Frame quality gate: skip the models on black, frozen (pixel-identical)
+        # and packet-loss-smeared frames, and flag the camera when it persists
+        self.quality_gate = True
+        self.quality_black_level = 16        # Mean grey (0-255) below which a flat frame is black
+        self.quality_smear_jump = 0.3        # Rise in detail-less block share over the camera's norm
+        self.quality_frozen_seconds = 60     # Identical frames this long → camera "frozen"
+        self.quality_read_failures = 10      # Failed reads per ~30s heartbeat → camera "degraded"
+
+        # Arming schedules: per-camera "arming_schedule" in ai-config.json, the
+        # windows of the customer's alert rules (see ArmingSchedule). Disarmed
+        # cameras are neither decoded nor analyzed — one keyframe every
+        # disarmed_check_interval checks the stream is up and the picture usable.
+        self.arming_timezone = "Asia/Jerusalem"  # Same clock as /api/ingest/alert's rule check
+        self.arming_lead_seconds = 120           # Re-arm this early (connect, warm up motion)
+        self.disarmed_check_interval = 120
+
+        # Thermal back-off: before the CPU throttles (throttle_c - margin_c),
+        # slow analysis for every camera, drop fire/smoke, then halve frames.
+        # Lifted level by level once hysteresis_c below the entry temperature.
+        self.thermal_control = True
+        self.thermal_sysfs_root = "/sys"     # Point at a fake tree to test
+        self.thermal_throttle_c = 0.0        # 0 = lowest passive trip point, else 100°C
+        self.thermal_margin_c = 8.0          # Level 1 at throttle - margin, level 2 at throttle - margin/3
+        self.thermal_hysteresis_c = 5.0
+        self.thermal_freq_ratio = 0.6        # Clock below this share of max (while warm) counts as hot
+
+        # Burst sampling: after motion or the first detection of an event, analyze
+        # every burst_interval for burst_seconds. Between analyses, frames are
+        # sampled every motion_sample_interval, downscaled, for the motion check.
+        self.burst_interval = 0.25
+        self.burst_seconds = 0           # 0 = off (e.g. 6 — ~8× the per-camera frame handling)
+        self.motion_sample_interval = 0.25
+        self.motion_sample_width = 960
+        # Snapshot hold: the first detection of an event waits up to this long
+        # while the camera is analyzed every burst_interval, then alerts with
+        # the most confident of those frames (no extra inference; 0 = off)
+        self.snapshot_hold_seconds = 1.0
+
         # Model (prefer OpenVINO IR FP16 if available, fallback to ONNX)
         self.model_ir_path = Path(__file__).parent / "models" / "yolov8n_fp16.xml"
         self.model_path = Path(__file__).parent / "models" / "yolov8n.onnx"
         self.model_input_size = (640, 640)
+        self.inference_backend = "auto"  # auto (OpenVINO → ONNX Runtime) | openvino | onnxruntime | remote
+
+        # CPU placement: "off" (scheduler decides) | "auto" (hybrid Intel:
+        # inference on P-cores, decode on E-cores; otherwise decode gets the
+        # last quarter of the physical cores) | "manual" (the lists below,
+        # cpuset syntax "0-3,8"). Recorders run at Nice=5 (camera-template.service).
+        self.cpu_placement = "off"
+        self.inference_cpus = ""
+        self.decode_cpus = ""
+        self.decode_nice = 5                   # Grabber threads + decode ffmpeg children
+
+        # ONNX Runtime (AMD boxes, or where OpenVINO is missing)
+        self.ort_intra_op_threads = 0          # Threads per inference (0 = one per physical core)
+        self.ort_inter_op_threads = 0          # 0 = ORT default (sequential graphs use 1)
+        self.ort_graph_optimization = "all"    # disable | basic | extended | all
+        self.ort_save_optimized = True         # Cache the optimized graph next to the model
+
+        # "remote": borrow a peer's compute (`detect.py --serve-inference` on the
+        # peer). The local model stays loaded as the fallback on timeout.
+        self.remote_inference_url = ""        # e.g. http://192.168.1.20:9110
+        self.remote_inference_timeout = 1.0   # Seconds per request before falling back
+        self.remote_inference_batch = 8       # Max frames coalesced into one request
+        self.inference_server_port = 9110     # --serve-inference listen port
+        self.inference_token = ""             # Shared secret between peers ("" = none)
 
         # Secondary fire/smoke model
         self.fire_model_ir_path = Path(__file__).parent / "models" / "fire_smoke_fp16.xml"
         self.fire_model_onnx_path = Path(__file__).parent / "models" / "fire_smoke.onnx"
         self.fire_model_pt_path = Path(__file__).parent / "models" / "fire_smoke.pt"
-        self.fire_scan_interval = 10  # Run fire model every N frames
+        self.fire_inferences_per_minute = 12  # Global budget, shared round-robin by all cameras
 
+        # Preprocessed input blobs shared between models (~4.9MB each at 640x640)
+        self.preprocess_cache_entries = 8
 
         # Snapshot
         self.snapshot_dir = Path.home() / "clearpoint-snapshots"
         self.snapshot_dir.mkdir(exist_ok=True)
         self.max_snapshots = 500  # Keep last N snapshots
 
+        # Local detection history (every detection, not just sent alerts)
+        self.detection_history = True
+        self.detection_db = LOG_DIR / "detections.db"
+        self.detection_retention_days = 30          # Raw detections
+        self.detection_rollup_retention_days = 400  # Per-hour counts
+
+        # Alerts are POSTed from a background queue
+        self.alert_queue_size = 50
+
+        # Optional alert clips, stream-copied (-c copy) out of the recorder's
+        # segments once they are closed — no re-encoding on the Mini PC
+        self.alert_clips = False
+        self.clip_pre_seconds = 5
+        self.clip_post_seconds = 10
+        self.recordings_dir = Path.home() / "clearpoint-recordings"
+        self.clip_dir = Path.home() / "clearpoint-clips"
+        self.max_clips = 200
+
+        # Local Prometheus-format metrics endpoint (127.0.0.1 only, 0 = off)
+        self.metrics_port = 9108
+
+        # On-demand profiling window (SIGUSR1 or GET /profile on the status port)
+        self.profile_seconds = 30
+
+        # Live debug view on the metrics port (live_debug.py, or any MJPEG client):
+        # the engine's own analyses, annotated — only while someone watches
+        self.debug_stream = False
+        self.debug_stream_fps = 5        # Max frames/s per viewer
+        self.debug_stream_width = 1280
+        self.debug_stream_quality = 70   # JPEG quality
+
+        # "threads": everything in one process (default).
+        # "processes": grabber worker processes (N cameras each) feed frames
+        # through shared memory to one inference process — for >8 cameras.
+        self.process_mode = "threads"
+        self.cameras_per_worker = 4
+        self.shared_frame_max_width = 1920   # Larger frames are downscaled into shared memory
+        self.shared_frame_max_height = 1080
+
+        # Stream ingestion: "threads" (FrameGrabber + CameraMonitor thread per
+        # camera) or "async" (one event loop reading ffmpeg rawvideo pipes,
+        # inference on a small thread pool — flat thread count at 32 cameras)
+        self.ingest_mode = "threads"
+        self.ingest_fps = 5              # Frames/s ffmpeg hands over per camera (async mode)
+        self.inference_workers = 2       # Inference threads shared by all cameras (async mode)
+
+        # Load shedding: when the box is overloaded, degrade "low" then "normal"
+        # priority cameras first (per-camera "priority"; "high" is never shed)
+        self.load_shedding = True
+        self.shed_lock_wait_ms = 250     # Avg main-model lock wait that counts as overloaded
+        self.shed_load_per_cpu = 0.9     # 1-min load average per CPU that counts as overloaded
+
+        # Optional overrides from ai-config.json (top-level keys)
+        self._load_settings()
+
         # Cameras
         self.cameras = self._load_cameras()
 
         log.info(f"Loaded {len(self.cameras)} cameras")
 
-    def _load_device_token(self) -> str:
+    def _load_device_token(self, required: bool = True) -> str:
         token = os.environ.get("CLEARPOINT_DEVICE_TOKEN", "")
         if not token and self.env_path.exists():
             for line in self.env_path.read_text().splitlines():
                 if line.startswith("CLEARPOINT_DEVICE_TOKEN="):
                     token = line.split("=", 1)[1].strip().strip("'\"")
                     break
-        if not token:
+        if not token and required:
             log.error("Missing CLEARPOINT_DEVICE_TOKEN")
             sys.exit(1)
         return token
 
+    # Top-level ai-config.json keys that may override the defaults above
+    SETTINGS_KEYS = (
+        "fire_inferences_per_minute",
+        "preprocess_cache_entries",
+        "inference_backend",
+        "cpu_placement",
+        "inference_cpus",
+        "decode_cpus",
+        "decode_nice",
+        "ort_intra_op_threads",
+        "ort_inter_op_threads",
+        "ort_graph_optimization",
+        "ort_save_optimized",
+        "remote_inference_url",
+        "remote_inference_timeout",
+        "remote_inference_batch",
+        "inference_server_port",
+        "inference_token",
+        "alert_queue_size",
+        "detection_history",
+        "detection_retention_days",
+        "detection_rollup_retention_days",
+        "alert_clips",
+        "clip_pre_seconds",
+        "clip_post_seconds",
+        "max_clips",
+        "metrics_port",
+        "analysis_interval",
+        "profile_seconds",
+        "debug_stream",
+        "debug_stream_fps",
+        "debug_stream_width",
+        "debug_stream_quality",
+        "process_mode",
+        "cameras_per_worker",
+        "shared_frame_max_width",
+        "shared_frame_max_height",
+        "ingest_mode",
+        "ingest_fps",
+        "inference_workers",
+        "load_shedding",
+        "shed_lock_wait_ms",
+        "shed_load_per_cpu",
+        "quality_gate",
+        "quality_black_level",
+        "quality_smear_jump",
+        "quality_frozen_seconds",
+        "quality_read_failures",
+        "arming_timezone",
+        "arming_lead_seconds",
+        "disarmed_check_interval",
+        "thermal_control",
+        "thermal_sysfs_root",
+        "thermal_throttle_c",
+        "thermal_margin_c",
+        "thermal_hysteresis_c",
+        "thermal_freq_ratio",
+        "burst_interval",
+        "burst_seconds",
+        "motion_sample_interval",
+        "motion_sample_width",
+        "snapshot_hold_seconds",
+    )
+
+    def _load_settings(self):
+        """Apply known top-level settings from ai-config.json"""
+        if not self.config_path.exists():
+            return
+        try:
+            data = json.loads(self.config_path.read_text())
+        except Exception:
+            return  # _load_cameras() logs the parse error
+        for key in self.SETTINGS_KEYS:
+            if key not in data:
+                continue
+            default = getattr(self, key)
+            try:
+                value = data[key]
+                if isinstance(default, (int, float)) and not isinstance(default, bool):
+                    value = type(default)(value)
+                setattr(self, key, value)
+            except (TypeError, ValueError):
+                log.warning(f"Ignoring invalid {key} in config: {data[key]!r}")
+
     def _load_cameras(self) -> list:
         """Load cameras from ai-config.json"""
         if self.config_path.exists():
@@ -216,6 +825,44 @@ class Config:
 
         return cameras
 
+    def camera_sources_signature(self) -> tuple:
+        """Size + mtime of everything _load_cameras() reads. A change means
+        the camera list may have changed (hot reload)."""
+        scripts_dir = Path.home() / "clearpoint-scripts"
+        paths = [self.config_path]
+        if scripts_dir.exists():
+            paths += sorted(scripts_dir.glob("camera-*.sh"))
+        signature = []
+        for path in paths:
+            try:
+                st = path.stat()
+                signature.append((str(path), st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def reload_cameras(self) -> list | None:
+        """Re-read the camera list for a hot reload. Returns None (keep the
+        current cameras) if ai-config.json can't be parsed right now —
+        e.g. an installer is halfway through writing it."""
+        if self.config_path.exists():
+            try:
+                data = json.loads(self.config_path.read_text())
+            except Exception as e:
+                log.warning(f"Config reload skipped — cannot parse {self.config_path.name}: {e}")
+                return None
+            cameras = data.get("cameras", [])
+        else:
+            cameras = self._load_cameras()
+        valid = []
+        for cam in cameras:
+            if isinstance(cam, dict) and cam.get("id") and cam.get("rtsp_url"):
+                valid.append(cam)
+            else:
+                log.warning(f"Ignoring camera entry without id/rtsp_url: {cam!r}")
+        self.cameras = valid
+        return valid
+
     def _parse_camera_script(self, path: Path) -> dict | None:
         """Extract camera info from a camera-*.sh script"""
         text = path.read_text()
@@ -234,15 +881,464 @@ class Config:
         return None
 
 
+# ─── Preprocess Cache (shared by all models) ───────────────
+class PreprocessCache:
+    """Shares letterboxed + normalized input blobs between models.
+    Entries are keyed by (frame_key, input_h, input_w), where frame_key is
+    (camera_id, frame_seq). A frame's entries live while it is pinned via
+    acquire() and are evicted on the last release(). The total entry count
+    is bounded — the oldest entries go first if pins pile up."""
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._pins: dict[tuple, int] = {}
+
+    def acquire(self, frame_key: tuple):
+        with self._lock:
+            self._pins[frame_key] = self._pins.get(frame_key, 0) + 1
+
+    def release(self, frame_key: tuple):
+        """Drop one pin; evict the frame's blobs when nobody holds it."""
+        with self._lock:
+            pins = self._pins.get(frame_key, 0) - 1
+            if pins > 0:
+                self._pins[frame_key] = pins
+                return
+            self._pins.pop(frame_key, None)
+            for key in [k for k in self._entries if k[0] == frame_key]:
+                del self._entries[key]
+
+    def get_or_compute(self, frame_key: tuple, input_shape: tuple, compute):
+        """Return cached (blob, ratio) or compute it (outside the lock)."""
+        key = (frame_key, *input_shape)
+        with self._lock:
+            entry = self._entries.get(key)
+        metrics.preprocess_cache.inc("miss" if entry is None else "hit")
+        if entry is not None:
+            return entry
+
+        entry = compute()
+
+        with self._lock:
+            # Only keep blobs for frames someone still holds
+            if frame_key in self._pins:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+
+# ─── CPU placement (inference vs decode cores) ─────────────
+def parse_cpu_list(text: str) -> set[int]:
+    """cpuset syntax ("0-3,8") → {0, 1, 2, 3, 8}"""
+    cpus = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def format_cpu_list(cpus) -> str:
+    """{0, 1, 2, 3, 8} → "0-3,8" """
+    parts, run = [], []
+    for cpu in sorted(cpus):
+        if run and cpu != run[-1] + 1:
+            parts.append(f"{run[0]}-{run[-1]}" if len(run) > 1 else str(run[0]))
+            run = []
+        run.append(cpu)
+    if run:
+        parts.append(f"{run[0]}-{run[-1]}" if len(run) > 1 else str(run[0]))
+    return ",".join(parts)
+
+
+class CpuPlacement:
+    """Pins threads by role: "inference" (the main thread before the models
+    load, so OpenVINO/ONNX Runtime worker pools inherit it) and "decode"
+    (grabber threads, ffmpeg children, clip cutting). Module-level singleton
+    `placement` (like `log`); apply() is a no-op until configure() enables it."""
+
+    SYSFS = Path("/sys/devices")
+
+    def __init__(self):
+        self.cpus: dict[str, set[int]] = {}
+        self.nice: dict[str, int] = {}
+        self.source = "off"
+        self._warned = False
+
+    def configure(self, config: Config):
+        mode = config.cpu_placement
+        if mode == "off":
+            return
+        available = os.sched_getaffinity(0)
+        if mode == "manual":
+            try:
+                inference = parse_cpu_list(config.inference_cpus) & available
+                decode = parse_cpu_list(config.decode_cpus) & available
+            except ValueError:
+                log.warning("Invalid inference_cpus/decode_cpus — CPU placement off")
+                return
+            source = "manual"
+        else:
+            inference, decode, source = self._auto(available)
+        if not inference or not decode:
+            log.warning(f"CPU placement ({mode}) found no usable split of "
+                        f"{format_cpu_list(available)} — leaving it to the scheduler")
+            return
+        self.cpus = {"inference": inference, "decode": decode}
+        self.nice = {"inference": 0, "decode": config.decode_nice}
+        self.source = source
+
+    def _auto(self, available: set[int]) -> tuple[set, set, str]:
+        """Hybrid Intel: P-cores infer, E-cores decode. Otherwise the last
+        quarter of the physical cores (with their SMT siblings) decode."""
+        try:
+            p_cores = parse_cpu_list((self.SYSFS / "cpu_core" / "cpus").read_text().strip())
+            e_cores = parse_cpu_list((self.SYSFS / "cpu_atom" / "cpus").read_text().strip())
+            if p_cores & available and e_cores & available:
+                return p_cores & available, e_cores & available, "P-cores / E-cores"
+        except (OSError, ValueError):
+            pass
+
+        cores: dict[str, set[int]] = {}
+        for cpu in sorted(available):
+            siblings = self.SYSFS / "system" / "cpu" / f"cpu{cpu}" / "topology" / "thread_siblings_list"
+            try:
+                key = siblings.read_text().strip()
+            except OSError:
+                key = str(cpu)
+            cores.setdefault(key, set()).add(cpu)
+        groups = list(cores.values())
+        if len(groups) < 3:
+            return set(), set(), "auto"
+        n_decode = max(1, len(groups) // 4)
+        inference = set().union(*groups[:-n_decode])
+        decode = set().union(*groups[-n_decode:])
+        return inference & available, decode & available, f"{len(groups)} physical cores"
+
+    def layout(self) -> dict:
+        """Picklable form for worker processes (see load())."""
+        return {"cpus": {r: sorted(c) for r, c in self.cpus.items()},
+                "nice": dict(self.nice), "source": self.source}
+
+    def load(self, layout: dict | None):
+        if layout and layout.get("cpus"):
+            self.cpus = {r: set(c) for r, c in layout["cpus"].items()}
+            self.nice = dict(layout["nice"])
+            self.source = layout["source"]
+
+    def threads(self, role: str) -> int:
+        """Core count of a role (0 when placement is off)."""
+        return len(self.cpus.get(role, ()))
+
+    def describe(self) -> str:
+        if not self.cpus:
+            return "scheduler default"
+        decode_nice = self.nice.get("decode", 0)
+        return (f"inference {format_cpu_list(self.cpus['inference'])}, "
+                f"decode {format_cpu_list(self.cpus['decode'])}"
+                f"{f' (nice {decode_nice})' if decode_nice else ''} — {self.source}")
+
+    def apply(self, role: str, pid: int = 0):
+        """Pin the calling thread (pid 0) or a child process to a role's cores."""
+        cpus = self.cpus.get(role)
+        if not cpus:
+            return
+        try:
+            os.sched_setaffinity(pid, cpus)  # Linux: per thread
+            nice = self.nice.get(role, 0)
+            if nice:
+                os.setpriority(os.PRIO_PROCESS, pid or threading.get_native_id(), nice)
+        except OSError as e:
+            if not self._warned:
+                self._warned = True
+                log.warning(f"CPU placement for {role} failed: {e}")
+
+
+placement = CpuPlacement()
+
+
+# ─── Inference backends ────────────────────────────────────
+class OpenVINOBackend:
+    """Compiled OpenVINO model. Not thread-safe — callers hold the detector lock."""
+    name = "openvino"
+    label = "OpenVINO"
+    needs_lock = True
+
+    def __init__(self, model_path: str, batch_size: int, input_size: tuple, threads: int = 0):
+        from openvino.runtime import Core
+        ie = Core()
+        if threads:
+            # Size the CPU plugin's pool to the pinned inference cores
+            ie.set_property("CPU", {"INFERENCE_NUM_THREADS": threads})
+        if batch_size > 1:
+            # Static batch: reshape before compiling
+            ov_model = ie.read_model(model_path)
+            input_h, input_w = input_size
+            ov_model.reshape([batch_size, 3, input_h, input_w])
+            compiled = ie.compile_model(ov_model, "AUTO")
+        else:
+            compiled = ie.compile_model(model_path, "AUTO")
+        self.compiled = compiled
+        self._infer_request = compiled.create_infer_request()
+        self.fixed_batch = None  # Whatever the caller compiled for
+
+    def infer(self, blob: np.ndarray) -> np.ndarray:
+        """Output view into the request's tensor — valid until the next call."""
+        self._infer_request.infer({0: blob})
+        return self._infer_request.get_output_tensor(0).data
+
+
+class OnnxRuntimeBackend:
+    """ONNX Runtime session (works with .onnx files only), tuned for boxes that
+    run it permanently: explicit thread counts and optimization level, the
+    optimized graph saved next to the model for fast restarts, and IOBinding
+    into preallocated buffers. Fixed-batch models get short batches padded.
+    infer() returns a view into the output buffer, valid until the next call —
+    callers consume it under the model lock."""
+    name = "onnxruntime"
+    label = "ONNX Runtime"
+    needs_lock = True
+
+    OPT_LEVELS = ("disable", "basic", "extended", "all")
+
+    def __init__(self, onnx_path: str, config: Config, batch_size: int = 1):
+        import onnxruntime as ort
+        level = config.ort_graph_optimization
+        if level not in self.OPT_LEVELS:
+            log.warning(f"Unknown ort_graph_optimization {level!r} — using 'all'")
+            level = "all"
+        options = ort.SessionOptions()
+        # Pinned: one thread per inference core (ORT's default pins its own
+        # threads across every core)
+        options.intra_op_num_threads = config.ort_intra_op_threads or placement.threads("inference")
+        options.inter_op_num_threads = config.ort_inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+
+        # Reuse a graph optimized by an earlier start (same ORT version + level)
+        source = Path(onnx_path)
+        optimized = source.with_name(f"{source.stem}.ort{ort.__version__}-{level}.onnx")
+        self.session = None
+        if config.ort_save_optimized and level != "disable":
+            if optimized.exists() and optimized.stat().st_mtime >= source.stat().st_mtime:
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+                try:
+                    self.session = ort.InferenceSession(str(optimized), options,
+                                                        providers=["CPUExecutionProvider"])
+                except Exception as e:
+                    log.warning(f"Discarding saved optimized model {optimized.name}: {e}")
+                    optimized.unlink(missing_ok=True)
+            if self.session is None and os.access(source.parent, os.W_OK):
+                options.optimized_model_filepath = str(optimized)
+        if self.session is None:
+            options.graph_optimization_level = getattr(
+                ort.GraphOptimizationLevel,
+                {"disable": "ORT_DISABLE_ALL", "basic": "ORT_ENABLE_BASIC",
+                 "extended": "ORT_ENABLE_EXTENDED", "all": "ORT_ENABLE_ALL"}[level])
+            self.session = ort.InferenceSession(onnx_path, options,
+                                                providers=["CPUExecutionProvider"])
+        self.optimized_path = optimized if optimized.exists() else None
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch_dim = model_input.shape[0]
+        self.fixed_batch = batch_dim if isinstance(batch_dim, int) else None
+        self._outputs = self.session.get_outputs()
+        self._binding = self.session.io_binding()
+        self._out_buffers: dict[int, np.ndarray] = {}
+        self._in_buffer = None
+        if self.fixed_batch:
+            input_h, input_w = config.model_input_size
+            self._in_buffer = np.zeros((self.fixed_batch, 3, input_h, input_w), dtype=np.float32)
+        self._output_buffer(self.fixed_batch or max(1, batch_size))
+
+    def _output_buffer(self, batch: int) -> np.ndarray | None:
+        """Preallocated main output for a batch size (None if not fully static)."""
+        if batch not in self._out_buffers:
+            dims = self._outputs[0].shape[1:]
+            if not all(isinstance(d, int) for d in dims):
+                return None
+            if len(self._out_buffers) >= 4:
+                self._out_buffers.pop(next(iter(self._out_buffers)))
+            self._out_buffers[batch] = np.empty((batch, *dims), dtype=np.float32)
+        return self._out_buffers[batch]
+
+    def infer(self, blob: np.ndarray) -> np.ndarray:
+        n = len(blob)
+        if self._in_buffer is not None and blob.shape != self._in_buffer.shape:
+            # Fixed-batch model: copy into the padded input buffer
+            self._in_buffer[:n] = blob
+            self._in_buffer[n:] = 0
+            blob = self._in_buffer
+        blob = np.ascontiguousarray(blob, dtype=np.float32)
+        binding = self._binding
+        binding.clear_binding_inputs()
+        binding.clear_binding_outputs()
+        binding.bind_cpu_input(self.input_name, blob)
+        out = self._output_buffer(len(blob))
+        if out is not None:
+            binding.bind_output(self._outputs[0].name, "cpu", 0, np.float32,
+                                out.shape, out.ctypes.data)
+        else:
+            binding.bind_output(self._outputs[0].name, "cpu")
+        for extra in self._outputs[1:]:
+            binding.bind_output(extra.name, "cpu")
+        self.session.run_with_iobinding(binding)
+        if out is None:
+            out = binding.copy_outputs_to_cpu()[0]
+        return out[:n]
+
+
+class RemoteBackend:
+    """Runs the model on a peer started with `detect.py --serve-inference`.
+    Concurrent calls (one per camera) are coalesced into one POST of up to
+    max_batch letterboxed uint8 frames. On timeout or error the call runs on
+    the local fallback backend and the peer is skipped for RETRY_AFTER seconds.
+    Only the batch thread writes the peer state (_down, _skip_until): POSTs
+    run one at a time there, so a stale result can't flip it back."""
+    name = "remote"
+    label = "remote"
+    needs_lock = False  # Calls queue into the batcher; the fallback has its own lock
+    RETRY_AFTER = 30
+    BATCH_WINDOW = 0.005  # Seconds to wait for more callers before sending
+
+    def __init__(self, url: str, model: str, fallback, timeout: float = 1.0,
+                 max_batch: int = 8, min_score: float = 0.0, token: str = ""):
+        self.url = url.rstrip("/") + "/infer"
+        self.model = model
+        self.fallback = fallback
+        self.fixed_batch = None
+        self.timeout = timeout
+        self.max_batch = max(1, max_batch)
+        self.min_score = min_score
+        self._fallback_lock = threading.Lock()
+        self._session = requests.Session()
+        if token:
+            self._session.headers["X-Clearpoint-Inference-Token"] = token
+        self._pending: queue.Queue = queue.Queue()
+        self._skip_until = 0.0
+        self._down = False
+        threading.Thread(target=self._batch_loop, daemon=True,
+                         name=f"remote-{model}").start()
+
+    def infer(self, blob: np.ndarray) -> np.ndarray:
+        if time.time() >= self._skip_until:
+            future = concurrent.futures.Future()
+            self._pending.put((blob, future))
+            try:
+                return future.result(timeout=self.timeout * 2 + 1)
+            except Exception:
+                pass  # The batch thread marks the peer down if the POST failed
+        metrics.remote_fallbacks.inc(self.model)
+        with self._fallback_lock:
+            # Callers don't hold a lock past this call, and the fallback's
+            # buffer is reused by the next one
+            return self.fallback.infer(blob).copy()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.BATCH_WINDOW
+            frames = len(batch[0][0])
+            while frames < self.max_batch:
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+                frames += len(item[0])
+            if time.time() < self._skip_until:
+                # Queued before the peer was marked down
+                for _, future in batch:
+                    future.set_exception(RuntimeError("remote peer skipped"))
+                continue
+            try:
+                output = self._post(np.concatenate([blob for blob, _ in batch]))
+            except Exception as e:
+                self._mark_down(e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            if self._down:
+                self._down = False
+                log.info(f"🌐 Remote inference ({self.model}) back at {self.url}")
+            start = 0
+            for blob, future in batch:
+                future.set_result(output[start:start + len(blob)])
+                start += len(blob)
+
+    def _mark_down(self, error: Exception):
+        self._skip_until = time.time() + self.RETRY_AFTER
+        if not self._down:
+            self._down = True
+            log.warning(f"🌐 Remote inference ({self.model}) failed ({error}) — "
+                        f"running locally for {self.RETRY_AFTER}s")
+
+    def _post(self, blob: np.ndarray) -> np.ndarray:
+        # The blob is uint8 / 255 — send the uint8 frames (4x smaller)
+        frames = np.rint(blob * 255).astype(np.uint8).transpose(0, 2, 3, 1)
+        body = BytesIO()
+        np.save(body, np.ascontiguousarray(frames), allow_pickle=False)
+        resp = self._session.post(
+            self.url, data=body.getvalue(), timeout=self.timeout,
+            params={"model": self.model, "min_score": self.min_score},
+            headers={"Content-Type": "application/octet-stream"})
+        resp.raise_for_status()
+        return decode_sparse_output(resp.content)
+
+
+def encode_sparse_output(output: np.ndarray, min_score: float) -> bytes:
+    """Raw YOLOv8 output (N, 4 + classes, anchors) → only the anchors whose best
+    class score reaches min_score (a few KB instead of ~2.7MB per frame)."""
+    return pack_sparse_output([sparse_rows(output, min_score)])
+
+
+def sparse_rows(output: np.ndarray, min_score: float) -> tuple:
+    """(shape, frame_idx, anchor_idx, rows) of the anchors above min_score —
+    a copy, so the output buffer can be reused right after."""
+    if output.shape[1] > output.shape[2]:
+        output = output.transpose(0, 2, 1)
+    scores = output[:, 4:, :].max(axis=1)
+    frame_idx, anchor_idx = np.nonzero(scores >= min_score)
+    return (output.shape, frame_idx.astype(np.int32), anchor_idx.astype(np.int32),
+            output[frame_idx, :, anchor_idx].astype(np.float32))
+
+
+def pack_sparse_output(chunks: list) -> bytes:
+    """sparse_rows() of consecutive batches → one encode_sparse_output payload."""
+    offsets = np.cumsum([0] + [shape[0] for shape, *_ in chunks])
+    buf = BytesIO()
+    np.savez(buf, shape=np.array((offsets[-1], *chunks[0][0][1:])),
+             frame_idx=np.concatenate([c[1] + off for c, off in zip(chunks, offsets)]),
+             anchor_idx=np.concatenate([c[2] for c in chunks]),
+             rows=np.concatenate([c[3] for c in chunks]))
+    return buf.getvalue()
+
+
+def decode_sparse_output(data: bytes) -> np.ndarray:
+    """Inverse of encode_sparse_output — dropped anchors come back as zeros."""
+    with np.load(BytesIO(data), allow_pickle=False) as z:
+        output = np.zeros(tuple(z["shape"]), dtype=np.float32)
+        output[z["frame_idx"], :, z["anchor_idx"]] = z["rows"]
+    return output
+
+
 # ─── YOLOv8 Model (generic — supports COCO + custom models) ──
 class YOLOv8Detector:
     def __init__(self, config: Config, ir_path=None, onnx_path=None,
-                 class_map=None, class_names=None, name="main"):
+                 class_map=None, class_names=None, name="main",
+                 preprocess_cache: PreprocessCache | None = None,
+                 backend: str | None = None, batch_size: int = 1):
         self.config = config
-        self.model = None
-        self.use_openvino = False
+        self.model = None  # OpenVINOBackend | OnnxRuntimeBackend | RemoteBackend
+        self.backend = backend or config.inference_backend
+        self.batch_size = max(1, batch_size)  # Frames per inference call (see detect_batch)
         self._lock = threading.Lock()
         self.name = name
+        self.preprocess_cache = preprocess_cache
         self.class_map = class_map if class_map is not None else COCO_TO_DETECTION
         self.class_names = class_names if class_names is not None else COCO_CLASSES
         self._ir_path = ir_path or str(config.model_ir_path)
@@ -264,60 +1360,145 @@ class YOLOv8Detector:
             log.warning(f"[{self.name}] Model not found at {ir_path} or {onnx_path}")
             return
 
-        # Try OpenVINO first (optimized for Intel)
-        try:
-            from openvino.runtime import Core
-            ie = Core()
-            compiled = ie.compile_model(model_path, "AUTO")
-            self._infer_request = compiled.create_infer_request()
-            self.model = compiled
-            self.use_openvino = True
-            fmt = "IR FP16" if model_path.endswith(".xml") else "ONNX"
-            log.info(f"✅ Loaded {self.name} model ({fmt}) with OpenVINO")
+        # "remote" keeps a local model loaded as its fallback
+        local_backend = "auto" if self.backend == "remote" else self.backend
+        self.model = self._load_local(model_path, onnx_path, local_backend)
+        if self.model is None or self.backend != "remote":
             return
-        except Exception as e:
-            log.info(f"OpenVINO not available ({e}), falling back to ONNX Runtime")
+        if not self.config.remote_inference_url:
+            log.warning(f"[{self.name}] inference_backend is remote but remote_inference_url "
+                        f"is not set — running locally")
+            return
+        self.model = RemoteBackend(
+            self.config.remote_inference_url, self.name, fallback=self.model,
+            timeout=self.config.remote_inference_timeout,
+            max_batch=self.config.remote_inference_batch,
+            min_score=self.config.default_confidence,
+            token=self.config.inference_token,
+        )
+        log.info(f"🌐 {self.name} model runs on {self.config.remote_inference_url} "
+                 f"(local {self.model.fallback.label} fallback)")
+
+    def _load_local(self, model_path: str, onnx_path: str, backend: str):
+        # Try OpenVINO first (optimized for Intel)
+        if backend in ("auto", "openvino"):
+            try:
+                model = OpenVINOBackend(model_path, self.batch_size, self.config.model_input_size,
+                                        threads=placement.threads("inference"))
+                fmt = "IR FP16" if model_path.endswith(".xml") else "ONNX"
+                log.info(f"✅ Loaded {self.name} model ({fmt}) with OpenVINO")
+                return model
+            except Exception as e:
+                if backend == "openvino":
+                    log.error(f"Failed to load {self.name} model with OpenVINO: {e}")
+                    return None
+                log.info(f"OpenVINO not available ({e}), falling back to ONNX Runtime")
 
         # Fallback to ONNX Runtime (only works with ONNX files)
         try:
-            import onnxruntime as ort
-            self.model = ort.InferenceSession(onnx_path)
-            self.use_openvino = False
-            log.info(f"✅ Loaded {self.name} model with ONNX Runtime")
+            model = OnnxRuntimeBackend(onnx_path, self.config, self.batch_size)
+            if model.fixed_batch:
+                self.batch_size = model.fixed_batch  # Exported with a fixed batch
+            threads = self.config.ort_intra_op_threads or placement.threads("inference") or "auto"
+            saved = f", optimized graph {model.optimized_path.name}" if model.optimized_path else ""
+            log.info(f"✅ Loaded {self.name} model with ONNX Runtime "
+                     f"({threads} threads, {self.config.ort_graph_optimization}{saved})")
+            return model
         except Exception as e:
             log.error(f"Failed to load {self.name} model: {e}")
-            self.model = None
+            return None
 
-    def detect(self, frame: np.ndarray) -> list:
+    @property
+    def backend_name(self) -> str:
+        return self.model.name if self.model else self.backend
+
+    def detect(self, frame: np.ndarray, frame_key: tuple | None = None,
+               timings: dict | None = None) -> list:
         """Run YOLOv8s inference on a frame.
+        frame_key (camera_id, frame_seq) lets models share one preprocessing pass.
+        If timings is given, it is filled with per-stage durations in ms
+        (preprocess, lock_wait, inference, postprocess).
         Returns list of detections: [{class_id, class_name, detection_type, confidence, bbox}]
         """
         if self.model is None:
             return []
 
-        # Preprocess
+        # Preprocess (shared with other models when the frame is keyed)
+        t0 = time.perf_counter()
         input_h, input_w = self.config.model_input_size
-        img, ratio = self._preprocess(frame, input_h, input_w)
-
-        # Inference (thread-safe — single lock for all cameras)
-        with self._lock:
+        if frame_key is not None and self.preprocess_cache is not None:
+            img, ratio = self.preprocess_cache.get_or_compute(
+                frame_key, (input_h, input_w),
+                lambda: self._preprocess(frame, input_h, input_w))
+        else:
+            img, ratio = self._preprocess(frame, input_h, input_w)
+        t1 = time.perf_counter()
+
+        # Inference (thread-safe — single lock for all cameras; the remote
+        # backend batches concurrent callers instead). The output is the
+        # backend's reused buffer, so postprocess before releasing the lock
+        with self._lock if self.model.needs_lock else nullcontext():
+            t2 = time.perf_counter()
             try:
-                if self.use_openvino:
-                    self._infer_request.infer({0: img})
-                    output = self._infer_request.get_output_tensor(0).data.copy()
-                else:
-                    input_name = self.model.get_inputs()[0].name
-                    output = self.model.run(None, {input_name: img})[0]
+                output = self._infer(img)
             except Exception as e:
-                log.warning(f"Inference error (skipping frame): {e}")
+                log.warning(f"Inference error (skipping frame): {e}",
+                            extra={"rate_key": ("inference_error", self.name)})
                 return []
-
-        # Postprocess
-        detections = self._postprocess(output, ratio, frame.shape)
+            t3 = time.perf_counter()
+            detections = self._postprocess(output, ratio, frame.shape)
+
+        stage_ms = {
+            "preprocess": (t1 - t0) * 1000,
+            "lock_wait": (t2 - t1) * 1000,
+            "inference": (t3 - t2) * 1000,
+            "postprocess": (time.perf_counter() - t3) * 1000,
+        }
+        metrics.observe_detect(self.name, stage_ms)
+        if timings is not None:
+            timings.update(stage_ms)
         return detections
 
+    def _infer(self, blob: np.ndarray) -> np.ndarray:
+        """Run the model on an NCHW float32 blob. Caller holds self._lock and
+        is done with the output before releasing it (the buffer is reused)."""
+        return self.model.infer(blob)
+
+    def detect_batch(self, padded_frames: list, ratios: list, shapes: list) -> list:
+        """Run inference on already-letterboxed uint8 frames (see _letterbox).
+        Frames are sent in chunks of self.batch_size; the last chunk is
+        zero-padded for fixed-batch models. Returns one detection list per frame."""
+        if self.model is None or not padded_frames:
+            return [[] for _ in padded_frames]
+
+        results = []
+        for start in range(0, len(padded_frames), self.batch_size):
+            chunk = padded_frames[start:start + self.batch_size]
+            blob = self._to_blob(np.stack(chunk))
+            if self.batch_size > 1 and len(chunk) < self.batch_size:
+                pad = np.zeros((self.batch_size - len(chunk), *blob.shape[1:]), dtype=blob.dtype)
+                blob = np.concatenate([blob, pad])
+            with self._lock:
+                try:
+                    output = self._infer(blob)
+                except Exception as e:
+                    log.warning(f"Batch inference error (skipping {len(chunk)} frames): {e}")
+                    results.extend([] for _ in chunk)
+                    continue
+                # Postprocess while the output buffer is still ours
+                results.extend(
+                    self._postprocess(output[i:i + 1], ratios[start + i], shapes[start + i])
+                    for i in range(len(chunk)))
+        return results
+
     def _preprocess(self, img: np.ndarray, input_h: int, input_w: int):
         """Resize + letterbox pad + normalize for YOLOv8"""
+        padded, ratio = self._letterbox(img, input_h, input_w)
+        return self._to_blob(padded[np.newaxis]), ratio
+
+    @staticmethod
+    def _letterbox(img: np.ndarray, input_h: int, input_w: int):
+        """BGR frame → RGB uint8 (input_h, input_w, 3), padded bottom/right."""
         # YOLOv8 expects RGB input, OpenCV reads BGR
         img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         h, w = img.shape[:2]
@@ -328,12 +1509,12 @@ class YOLOv8Detector:
 
         padded = np.full((input_h, input_w, 3), 114, dtype=np.uint8)
         padded[:new_h, :new_w, :] = resized
+        return padded, ratio
 
-        # HWC → CHW, uint8 → float32, normalize to 0-1
-        blob = padded.transpose(2, 0, 1).astype(np.float32) / 255.0
-        blob = np.expand_dims(blob, axis=0)
-
-        return blob, ratio
+    @staticmethod
+    def _to_blob(padded: np.ndarray) -> np.ndarray:
+        """NHWC uint8 → NCHW float32, normalized to 0-1"""
+        return padded.transpose(0, 3, 1, 2).astype(np.float32) / 255.0
 
     def _postprocess(self, output: np.ndarray, ratio: float, img_shape: tuple) -> list:
         """Parse YOLOv8 output into detections.
@@ -367,6 +1548,7 @@ class YOLOv8Detector:
         boxes_cxcywh = boxes_cxcywh[mask]
         scores_filtered = scores[mask]
         class_ids_filtered = class_ids[mask]
+        class_scores_filtered = class_scores[mask]
 
         # cx, cy, w, h → x1, y1, x2, y2 (in input space)
         x1 = boxes_cxcywh[:, 0] - boxes_cxcywh[:, 2] / 2
@@ -400,12 +1582,16 @@ class YOLOv8Detector:
             bx2, by2 = min(w, bx2), min(h, by2)
 
             class_name = self.class_names[class_id] if class_id < len(self.class_names) else str(class_id)
+            raw = class_scores_filtered[i]
             detections.append({
                 "class_id": class_id,
                 "class_name": class_name,
                 "detection_type": detection_type,
                 "confidence": float(scores_filtered[i]),
                 "bbox": [int(bx1), int(by1), int(bx2), int(by2)],
+                # Runner-up classes (debug view) — a low margin means a confusable object
+                "top3": [(self.class_names[c] if c < len(self.class_names) else str(c), float(raw[c]))
+                         for c in np.argsort(raw)[::-1][:3]],
             })
 
         return detections
@@ -413,8 +1599,10 @@ class YOLOv8Detector:
 
 # ─── Motion Detector ───────────────────────────────────────
 class MotionDetector:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, min_area: float | None = None):
         self.config = config
+        # Scale min_area down when feeding downscaled frames
+        self.min_area = config.motion_min_area if min_area is None else min_area
         self.prev_gray = None
 
     def reset(self):
@@ -426,7 +1614,7 @@ class MotionDetector:
         gray = cv2.GaussianBlur(gray, (self.config.motion_blur_size,
                                         self.config.motion_blur_size), 0)
 
-        if self.prev_gray is None:
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
             self.prev_gray = gray
             return False
 
@@ -441,37 +1629,203 @@ class MotionDetector:
                                         cv2.CHAIN_APPROX_SIMPLE)
 
         for c in contours:
-            if cv2.contourArea(c) > self.config.motion_min_area:
+            if cv2.contourArea(c) > self.min_area:
                 return True
 
         return False
 
 
+# ─── Frame Quality Gate (skips unusable frames before the models) ──
+class FrameQualityGate:
+    """Cheap per-camera checks on a small grey thumbnail before inference:
+    black (IR switchover, dead sensor), frozen (pixel-identical to the last
+    frame) and corrupt (packet-loss smear: the decoder drags the last good
+    rows down or fills grey, so the share of blocks with no vertical detail
+    jumps above this camera's norm). Black and frozen frames skip the models;
+    a smear alone looks just like a large plain object entering the scene, so
+    corrupt frames are still analyzed and only count toward "degraded". At
+    each heartbeat the camera is flagged "frozen" or "degraded" from the window."""
+
+    THUMB = (160, 96)    # 10 x 6 blocks of 16px
+    BLOCK = 16
+    FLAT_DETAIL = 1.0    # Mean |row-to-row| difference of a block with no vertical detail
+    SMEAR_RUN = 4        # Longer "smears" are the scene itself (lights off, fog)
+
+    def __init__(self, config: Config, cam_name: str):
+        self.config = config
+        self.cam_name = cam_name
+        self.state = "ok"
+        self._prev_digest = None
+        self._frozen_since = None
+        self._flat_norm = None
+        self._smear_run = 0
+        self._window = defaultdict(int)
+        self.rejected = defaultdict(int)  # By reason, since the last hourly report
+
+    def check(self, frame: np.ndarray) -> str | None:
+        """Returns why the frame should skip the models, or None."""
+        thumb = cv2.resize(frame, self.THUMB, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        reason = self._classify(gray)
+        self._window["checked"] += 1
+        if reason:
+            self._window[reason] += 1
+            if reason == "corrupt":
+                return None  # Never skip the models on the smear signal alone
+            self.rejected[reason] += 1
+            metrics.frames_rejected.inc(self.cam_name, reason)
+        return reason
+
+    def _classify(self, gray: np.ndarray) -> str | None:
+        digest = hash(gray.tobytes())
+        if digest == self._prev_digest:
+            # Sensor noise alone changes a live thumbnail — identical means stuck
+            if self._frozen_since is None:
+                self._frozen_since = time.time()
+            return "frozen"
+        self._prev_digest = digest
+        self._frozen_since = None
+
+        mean, std = (float(v[0][0]) for v in cv2.meanStdDev(gray))
+        if mean < self.config.quality_black_level and std < 8:
+            return "black"
+
+        h, w = gray.shape
+        dy = np.abs(np.diff(gray.astype(np.int16), axis=0, prepend=gray[:1].astype(np.int16)))
+        blocks = dy.reshape(h // self.BLOCK, self.BLOCK, w // self.BLOCK, self.BLOCK).mean(axis=(1, 3))
+        flat = float((blocks < self.FLAT_DETAIL).mean())
+        if self._flat_norm is not None and flat - self._flat_norm > self.config.quality_smear_jump:
+            self._smear_run += 1
+            if self._smear_run <= self.SMEAR_RUN:
+                return "corrupt"
+            self._flat_norm = flat
+        self._smear_run = 0
+        self._flat_norm = flat if self._flat_norm is None else self._flat_norm * 0.9 + flat * 0.1
+        return None
+
+    def evaluate(self, read_failures: int = 0) -> str | None:
+        """Heartbeat: derive the camera state from the window since the last
+        call. Returns the previous state when it changed."""
+        window, self._window = self._window, defaultdict(int)
+        checked = window["checked"]
+        unusable = window["black"] + window["corrupt"]
+        if self._frozen_since and time.time() - self._frozen_since >= self.config.quality_frozen_seconds:
+            state = "frozen"
+        elif (checked and unusable / checked >= 0.5) or \
+                read_failures >= self.config.quality_read_failures:
+            state = "degraded"
+        else:
+            state = "ok"
+        previous, self.state = self.state, state
+        return previous if state != previous else None
+
+    def take_rejected(self) -> dict:
+        rejected, self.rejected = dict(self.rejected), defaultdict(int)
+        return rejected
+
+
+# ─── Alert Latency (glass-to-alert, per camera) ────────────
+class AlertLatencyTracker:
+    """Rolling window of capture → successful /ingest/alert latencies."""
+
+    def __init__(self, window_seconds: float = 3600, max_samples: int = 500):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}  # camera_id → deque[(recorded_at, seconds)]
+
+    def record(self, camera_id: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(camera_id)
+            if samples is None:
+                samples = self._samples[camera_id] = deque(maxlen=self.max_samples)
+            samples.append((time.time(), seconds))
+
+    def report(self) -> dict:
+        """{camera_id: {count, p50_ms, p95_ms, p99_ms, max_ms}} over the window."""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            snapshot = {cam: [s for t, s in samples if t >= cutoff]
+                        for cam, samples in self._samples.items()}
+        report = {}
+        for camera_id, values in snapshot.items():
+            if not values:
+                continue
+            p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+            report[camera_id] = {
+                "count": len(values),
+                "p50_ms": round(float(p50)),
+                "p95_ms": round(float(p95)),
+                "p99_ms": round(float(p99)),
+                "max_ms": round(max(values) * 1000),
+            }
+        return report
+
+    def write_report(self, path: Path, names: dict | None = None):
+        """Write the rolling report as JSON (atomic replace)."""
+        report = self.report()
+        for camera_id, stats in report.items():
+            stats["name"] = (names or {}).get(camera_id, camera_id[:8])
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "window_seconds": self.window_seconds,
+            "cameras": report,
+        }, indent=2, ensure_ascii=False))
+        tmp.replace(path)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
 # ─── Alert Sender ──────────────────────────────────────────
 class AlertSender:
+    """Snapshots are encoded on the caller's thread; the POST happens on a
+    background worker so camera threads never block on the network."""
+
     def __init__(self, config: Config):
         self.config = config
         # Cooldown tracker: {(camera_id, detection_type): last_sent_timestamp}
         self.cooldowns: dict[tuple, float] = {}
+        # Keys queued or being POSTed — not cooled down until the POST settles
+        self._in_flight: set[tuple] = set()
+        self._cooldown_lock = threading.Lock()
         self.session = requests.Session()
         self.session.headers.update({
             "Content-Type": "application/json",
             "x-clearpoint-device-token": config.device_token,
         })
+        self.latency = AlertLatencyTracker()
+        self.clips = ClipExtractor(config, self) if config.alert_clips else None
+        self._queue: queue.Queue = queue.Queue(maxsize=config.alert_queue_size)
+        metrics.alert_queue_depth.callback = self._queue.qsize
+        self._worker = threading.Thread(target=self._post_loop, daemon=True,
+                                        name="alert-sender")
+        self._worker.start()
 
     def is_cooled_down(self, camera_id: str, detection_type: str) -> bool:
         key = (camera_id, detection_type)
+        if key in self._in_flight:
+            return False
         last = self.cooldowns.get(key, 0)
         return (time.time() - last) >= self.config.cooldown_seconds
 
-    def send_alert(self, camera_id: str, detection: dict, snapshot: np.ndarray | None):
+    def send_alert(self, camera_id: str, detection: dict, snapshot: np.ndarray | None,
+                   trace: dict | None = None) -> str | None:
+        """Queue an alert. trace carries the frame's trace_id and timestamps
+        (captured_at, analysis_started_at, detected_at) for latency tracking.
+        Returns the saved snapshot path if an alert was queued."""
         detection_type = detection["detection_type"]
         key = (camera_id, detection_type)
 
-        if not self.is_cooled_down(camera_id, detection_type):
-            return
+        with self._cooldown_lock:
+            if not self.is_cooled_down(camera_id, detection_type):
+                return None
+            self._in_flight.add(key)
 
         # Save snapshot
+        encode_start = time.perf_counter()
         snapshot_path = None
         snapshot_b64 = None
         if snapshot is not None:
@@ -483,6 +1837,11 @@ class AlertSender:
             # Encode as base64 for API
             _, buf = cv2.imencode(".jpg", snapshot, [cv2.IMWRITE_JPEG_QUALITY, 60])
             snapshot_b64 = base64.b64encode(buf.tobytes()).decode("utf-8")
+            metrics.snapshot_encode.observe(time.perf_counter() - encode_start)
+
+        trace = dict(trace or {})
+        trace["queued_at"] = time.time()
+        event_time = trace.get("captured_at") or time.time()
 
         payload = {
             "camera_id": camera_id,
@@ -498,24 +1857,100 @@ class AlertSender:
                 "snapshot_file": str(snapshot_path) if snapshot_path else None,
             },
         }
+        if self.clips:
+            payload["metadata"]["clip"] = self.clips.describe(event_time)
+
+        try:
+            self._queue.put_nowait((key, payload, trace))
+        except queue.Full:
+            with self._cooldown_lock:
+                self._in_flight.discard(key)
+            metrics.alerts.inc(detection_type, "dropped")
+            log.warning(f"Alert queue full — dropped {detection_type} on camera {camera_id[:8]}...",
+                        extra={"rate_key": ("alert_queue_full", camera_id)})
+            return None
+        if self.clips:
+            self.clips.request(camera_id, detection_type, event_time, trace.get("trace_id"))
+        return str(snapshot_path) if snapshot_path else None
+
+    def _post_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            key, payload, trace = item
+            try:
+                self._post_alert(key, payload, trace)
+            finally:
+                with self._cooldown_lock:
+                    self._in_flight.discard(key)
+
+    @staticmethod
+    def _trace_metadata(trace: dict, sent_at: float) -> dict:
+        """Trace timings for alert metadata (ms between pipeline stages)."""
+        captured = trace.get("captured_at")
+        if not captured:
+            return {"trace_id": trace.get("trace_id")}
+
+        def ms(a, b):
+            if trace.get(a) and trace.get(b):
+                return round((trace[b] - trace[a]) * 1000)
+            return None
+
+        trace = dict(trace, sent_at=sent_at)
+        return {
+            "trace_id": trace.get("trace_id"),
+            "captured_at": _iso(captured),
+            "capture_to_analysis_ms": ms("captured_at", "analysis_started_at"),
+            "analysis_ms": ms("analysis_started_at", "detected_at"),
+            "snapshot_ms": ms("detected_at", "queued_at"),
+            "queue_ms": ms("queued_at", "sent_at"),
+            "capture_to_send_ms": ms("captured_at", "sent_at"),
+        }
 
+    def _post_alert(self, key: tuple, payload: dict, trace: dict):
+        camera_id, detection_type = key
+        payload["metadata"]["trace"] = self._trace_metadata(trace, time.time())
+        post_start = time.perf_counter()
         try:
             resp = self.session.post(
                 f"{self.config.api_base}/ingest/alert",
                 json=payload,
                 timeout=10,
             )
+            metrics.alert_post.observe(time.perf_counter() - post_start)
             if resp.ok:
-                self.cooldowns[key] = time.time()
+                acked_at = time.time()
+                with self._cooldown_lock:
+                    self.cooldowns[key] = acked_at
+                metrics.alerts.inc(detection_type, "sent")
+                latency_note = ""
+                if trace.get("captured_at"):
+                    glass_to_alert = acked_at - trace["captured_at"]
+                    self.latency.record(camera_id, glass_to_alert)
+                    metrics.glass_to_alert.observe(glass_to_alert)
+                    latency_note = f", {glass_to_alert:.1f}s from capture"
                 log.info(
                     f"✅ Alert sent: {detection_type} on camera {camera_id[:8]}... "
-                    f"({detection['confidence']:.0%})"
+                    f"({payload['confidence']:.0%}{latency_note})"
                 )
             else:
+                metrics.alerts.inc(detection_type, "error")
                 log.warning(f"Alert API error: {resp.status_code} {resp.text[:200]}")
         except Exception as e:
+            metrics.alerts.inc(detection_type, "error")
             log.error(f"Failed to send alert: {e}")
 
+    def stop(self, timeout: float = 5):
+        """Flush queued alerts (best effort) and stop the workers."""
+        if self.clips:
+            self.clips.stop()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._worker.join(timeout=timeout)
+
     def send_system_log(self, category: str, event: str, message: str,
                         severity: str = "info", camera_id: str | None = None,
                         metadata: dict | None = None):
@@ -540,11 +1975,416 @@ class AlertSender:
             log.debug(f"Failed to send system log: {e}")
 
     def cleanup_snapshots(self):
-        """Remove old snapshots if over limit"""
+        """Remove old snapshots (and clips) if over limit"""
         files = sorted(self.config.snapshot_dir.glob("*.jpg"), key=lambda f: f.stat().st_mtime)
         if len(files) > self.config.max_snapshots:
             for f in files[: len(files) - self.config.max_snapshots]:
                 f.unlink()
+        if self.clips:
+            self.clips.cleanup()
+
+
+# ─── Alert Clips (stream copy from recorder segments) ──────
+class ClipExtractor:
+    """Cuts a short clip around each alert out of the recorder's segments
+    with the concat demuxer and -c copy, so no frame is re-encoded.
+    The cut starts on a keyframe from a per-segment keyframe index (one
+    ffprobe packet scan per segment, cached). mp4 segments are only readable
+    once the recorder closes them, so jobs wait — up to one segment length.
+    Runs on a niced thread; ffmpeg/ffprobe run under nice + ionice idle."""
+
+    POLL_SECONDS = 10
+    GIVE_UP_AFTER = 1200      # Seconds past the clip end (segments are 300s)
+    CLOSED_AFTER = 60         # Newest segment untouched this long → recorder stopped
+    INDEX_CACHE_SIZE = 64
+
+    def __init__(self, config: Config, sender: "AlertSender"):
+        self.config = config
+        self.sender = sender
+        self.config.clip_dir.mkdir(parents=True, exist_ok=True)
+        self._jobs: list[dict] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._keyframes: OrderedDict = OrderedDict()  # (path, mtime_ns) → [keyframe pts]
+        self._low_priority = [cmd for cmd in (["nice", "-n", "19"], ["ionice", "-c", "3"])
+                              if shutil.which(cmd[0])]
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="clip-worker")
+        self._thread.start()
+
+    def describe(self, event_time: float) -> dict:
+        """Alert metadata for a clip that is still being produced."""
+        return {
+            "status": "pending",
+            "start": _iso(event_time - self.config.clip_pre_seconds),
+            "end": _iso(event_time + self.config.clip_post_seconds),
+        }
+
+    def request(self, camera_id: str, detection_type: str, event_time: float,
+                trace_id: str | None = None):
+        with self._lock:
+            self._jobs.append({
+                "camera_id": camera_id,
+                "detection_type": detection_type,
+                "trace_id": trace_id,
+                "start": event_time - self.config.clip_pre_seconds,
+                "end": event_time + self.config.clip_post_seconds,
+            })
+        self._wake.set()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def cleanup(self):
+        files = sorted(self.config.clip_dir.glob("*.mp4"), key=lambda f: f.stat().st_mtime)
+        for f in files[: max(len(files) - self.config.max_clips, 0)]:
+            f.unlink(missing_ok=True)
+
+    def _run(self):
+        placement.apply("decode")
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)  # This thread only
+        except (AttributeError, OSError):
+            pass
+        while self.running:
+            self._wake.wait(self.POLL_SECONDS)
+            self._wake.clear()
+            with self._lock:
+                jobs = list(self._jobs)
+            for job in jobs:
+                if not self.running:
+                    break
+                if time.time() < job["end"]:
+                    continue
+                try:
+                    done = self._try_cut(job)
+                except Exception as e:
+                    log.warning(f"Clip failed for {job['camera_id'][:8]}...: {e}")
+                    done = True
+                if not done and time.time() - job["end"] > self.GIVE_UP_AFTER:
+                    log.warning(f"Clip skipped for {job['camera_id'][:8]}... — no closed recording")
+                    done = True
+                if done:
+                    with self._lock:
+                        self._jobs.remove(job)
+
+    def _segments(self, camera_id: str) -> list[tuple[float, float, Path]]:
+        """Closed segments of a camera as (start, end, path), oldest first."""
+        root = self.config.recordings_dir
+        paths = list(root.glob(f"*/footage/{camera_id}/*.mp4"))
+        if not paths:
+            paths = list(root.rglob(f"{camera_id}_*.mp4"))
+        starts = []
+        for path in paths:
+            started = parse_segment_start(path)
+            if started is not None and not path.stem.endswith("_h264"):
+                starts.append((started.timestamp(), path))
+        starts.sort()
+
+        segments = []
+        for i, (start, path) in enumerate(starts):
+            if i + 1 < len(starts):
+                end = starts[i + 1][0]
+            else:
+                try:
+                    mtime = path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if time.time() - mtime < self.CLOSED_AFTER:
+                    continue  # Still being written
+                end = mtime
+            segments.append((start, end, path))
+        return segments
+
+    def _keyframe_times(self, path: Path) -> list[float]:
+        """Keyframe pts (seconds from segment start) — packet flags only, no decode."""
+        key = (str(path), path.stat().st_mtime_ns)
+        cached = self._keyframes.get(key)
+        if cached is not None:
+            self._keyframes.move_to_end(key)
+            return cached
+        out = subprocess.run(
+            [*self._nice(), "ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path)],
+            capture_output=True, text=True, timeout=60, check=True).stdout
+        times = []
+        for line in out.splitlines():
+            pts, _, flags = line.partition(",")
+            if "K" in flags:
+                try:
+                    times.append(float(pts))
+                except ValueError:
+                    continue
+        times.sort()
+        self._keyframes[key] = times
+        if len(self._keyframes) > self.INDEX_CACHE_SIZE:
+            self._keyframes.popitem(last=False)
+        return times
+
+    def _nice(self) -> list[str]:
+        return [arg for cmd in self._low_priority for arg in cmd]
+
+    def _try_cut(self, job: dict) -> bool:
+        """Cut the clip if every segment it needs is closed. Returns False to retry later."""
+        segments = self._segments(job["camera_id"])
+        if not segments or segments[-1][1] < job["end"]:
+            return False  # The end of the clip is not in a closed segment yet
+        parts = [seg for seg in segments if seg[0] < job["end"] and seg[1] > job["start"]]
+        if not parts:
+            log.warning(f"Clip skipped for {job['camera_id'][:8]}... — not recorded")
+            return True
+
+        # Concat list: first part starts on the keyframe at/before the clip start
+        lines = []
+        for i, (start, _, path) in enumerate(parts):
+            lines.append(f"file '{path}'")
+            if i == 0 and job["start"] > start:
+                offset = job["start"] - start
+                keyframes = [t for t in self._keyframe_times(path) if t <= offset]
+                if keyframes:
+                    lines.append(f"inpoint {keyframes[-1]:.3f}")
+            if i == len(parts) - 1:
+                lines.append(f"outpoint {job['end'] - start:.3f}")
+
+        stamp = datetime.fromtimestamp(job["start"]).strftime("%Y%m%d_%H%M%S")
+        output = self.config.clip_dir / f"{job['camera_id']}_{job['detection_type']}_{stamp}.mp4"
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("\n".join(lines) + "\n")
+            list_path = f.name
+        try:
+            subprocess.run(
+                [*self._nice(), "ffmpeg", "-nostdin", "-v", "error", "-f", "concat", "-safe", "0",
+                 "-i", list_path, "-c", "copy", "-movflags", "+faststart", "-y", str(output)],
+                capture_output=True, timeout=120, check=True)
+        finally:
+            os.unlink(list_path)
+
+        size_kb = output.stat().st_size // 1024
+        log.info(f"🎞️  Clip ready: {output.name} ({size_kb}KB, {len(parts)} segment(s))")
+        self.sender.send_system_log(
+            category="alert",
+            event="ai_alert_clip",
+            message=f"Alert clip ready ({job['detection_type']})",
+            camera_id=job["camera_id"],
+            metadata={
+                "trace_id": job["trace_id"],
+                "detection_type": job["detection_type"],
+                "clip_file": str(output),
+                "size_kb": size_kb,
+                "start": _iso(job["start"]),
+                "end": _iso(job["end"]),
+            },
+        )
+        return True
+
+
+# ─── Detection history (local SQLite, WAL) ─────────────────
+class DetectionStore:
+    """Every detection, appended in batches by one writer thread, indexed by
+    (camera, time), with per-hour rollups and retention. Readers open their
+    own connections — WAL lets them query while the writer appends."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS detections (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,              -- frame capture time (unix)
+            camera_id TEXT NOT NULL,
+            detection_type TEXT NOT NULL,
+            class_name TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+            snapshot TEXT,                 -- alert snapshot file, when one was sent
+            trace_id TEXT
+        );
+        CREATE INDEX IF NOT EXISTS detections_camera_ts ON detections (camera_id, ts);
+        CREATE INDEX IF NOT EXISTS detections_ts ON detections (ts);
+        CREATE TABLE IF NOT EXISTS detection_rollups (
+            camera_id TEXT NOT NULL,
+            hour INTEGER NOT NULL,         -- unix time of the hour start
+            detection_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            max_confidence REAL NOT NULL,
+            PRIMARY KEY (camera_id, hour, detection_type)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS detection_rollups_hour ON detection_rollups (hour);
+    """
+    COLUMNS = ("ts", "camera_id", "detection_type", "class_name", "confidence",
+               "x1", "y1", "x2", "y2", "snapshot", "trace_id")
+    BATCH = 500
+    FLUSH_SECONDS = 1.0
+    PRUNE_SECONDS = 3600
+
+    def __init__(self, config: Config, readonly: bool = False):
+        self.config = config
+        self.path = Path(config.detection_db)
+        if readonly:
+            return  # Queries only (support tooling) — no writer thread
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(self.SCHEMA)
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="detection-store")
+        self._thread.start()
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        if readonly:
+            db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=5)
+        else:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute("PRAGMA synchronous=NORMAL")  # WAL: durable up to the last checkpoint
+        db.row_factory = sqlite3.Row
+        return db
+
+    def add(self, camera_id: str, detection: dict, captured_at: float,
+            snapshot: str | None = None, trace_id: str | None = None):
+        """Queue one detection (never blocks a camera thread)."""
+        x1, y1, x2, y2 = detection["bbox"]
+        row = (captured_at, camera_id, detection["detection_type"], detection["class_name"],
+               round(detection["confidence"], 4), x1, y1, x2, y2, snapshot, trace_id)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            log.debug(f"Detection store queue full — dropped a {detection['detection_type']}")
+
+    def stop(self, timeout: float = 5):
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _run(self):
+        db = self._connect()
+        last_prune = 0.0
+        running = True
+        while running:
+            rows = []
+            try:
+                item = self._queue.get(timeout=self.FLUSH_SECONDS)
+                while item is not None:
+                    rows.append(item)
+                    if len(rows) >= self.BATCH:
+                        break
+                    item = self._queue.get_nowait()
+                running = item is not None
+            except queue.Empty:
+                pass
+            try:
+                if rows:
+                    self._write(db, rows)
+                if time.time() - last_prune >= self.PRUNE_SECONDS:
+                    self._prune(db)
+                    last_prune = time.time()
+            except sqlite3.Error as e:
+                log.warning(f"Detection store write failed ({len(rows)} rows lost): {e}")
+        db.close()
+
+    def _write(self, db: sqlite3.Connection, rows: list):
+        with db:
+            db.executemany(
+                f"INSERT INTO detections ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})", rows)
+            db.executemany(
+                "INSERT INTO detection_rollups VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (camera_id, hour, detection_type) DO UPDATE SET "
+                "count = count + 1, max_confidence = max(max_confidence, excluded.max_confidence)",
+                [(r[1], int(r[0] // 3600 * 3600), r[2], r[4]) for r in rows])
+
+    def _prune(self, db: sqlite3.Connection):
+        now = time.time()
+        with db:
+            raw = db.execute("DELETE FROM detections WHERE ts < ?",
+                             (now - self.config.detection_retention_days * 86400,)).rowcount
+            db.execute("DELETE FROM detection_rollups WHERE hour < ?",
+                       (now - self.config.detection_rollup_retention_days * 86400,))
+        if raw:
+            log.info(f"🗄️  Detection store: pruned {raw} detections older than "
+                     f"{self.config.detection_retention_days} days")
+
+    # Queries: any thread, or another process (support tooling)
+    def query(self, camera_id: str | None = None, start: float | None = None,
+              end: float | None = None, detection_type: str | None = None,
+              min_confidence: float = 0.0, limit: int = 1000) -> list[dict]:
+        """Detections in [start, end), newest first."""
+        where, args = self._where(camera_id, start, end, detection_type, "ts")
+        if min_confidence:
+            where.append("confidence >= ?")
+            args.append(min_confidence)
+        sql = (f"SELECT {', '.join(self.COLUMNS)} FROM detections"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY ts DESC LIMIT ?")
+        with closing(self._connect(readonly=True)) as db:
+            rows = db.execute(sql, (*args, int(limit))).fetchall()
+        return [{
+            "timestamp": _iso(r["ts"]),
+            "camera_id": r["camera_id"],
+            "detection_type": r["detection_type"],
+            "class_name": r["class_name"],
+            "confidence": r["confidence"],
+            "bbox": [r["x1"], r["y1"], r["x2"], r["y2"]],
+            "snapshot": r["snapshot"],
+            "trace_id": r["trace_id"],
+        } for r in rows]
+
+    def rollups(self, camera_id: str | None = None, start: float | None = None,
+                end: float | None = None) -> list[dict]:
+        """Per-hour counts by camera and type — kept long after raw rows expire."""
+        where, args = self._where(camera_id, start, end, None, "hour")
+        sql = ("SELECT camera_id, hour, detection_type, count, max_confidence FROM detection_rollups"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY hour, camera_id")
+        with closing(self._connect(readonly=True)) as db:
+            rows = db.execute(sql, args).fetchall()
+        return [{"camera_id": r["camera_id"], "hour": _iso(r["hour"]),
+                 "detection_type": r["detection_type"], "count": r["count"],
+                 "max_confidence": r["max_confidence"]} for r in rows]
+
+    def counts(self, start: float, end: float | None = None) -> dict:
+        """{camera_id: {detection_type: count}} over [start, end) from raw rows."""
+        where, args = self._where(None, start, end, None, "ts")
+        sql = ("SELECT camera_id, detection_type, count(*) AS n FROM detections "
+               f"WHERE {' AND '.join(where)} GROUP BY camera_id, detection_type")
+        counts = defaultdict(dict)
+        with closing(self._connect(readonly=True)) as db:
+            for r in db.execute(sql, args):
+                counts[r["camera_id"]][r["detection_type"]] = r["n"]
+        return dict(counts)
+
+    @staticmethod
+    def _where(camera_id, start, end, detection_type, time_column: str) -> tuple[list, list]:
+        where, args = [], []
+        if camera_id:
+            where.append("camera_id = ?")
+            args.append(camera_id)
+        if start is not None:
+            where.append(f"{time_column} >= ?")
+            args.append(start)
+        if end is not None:
+            where.append(f"{time_column} < ?")
+            args.append(end)
+        if detection_type:
+            where.append("detection_type = ?")
+            args.append(detection_type)
+        return where, args
+
+
+def resolve_camera_id(cameras: list, value: str | None) -> str | None:
+    """Camera id, id prefix or name → id. Unknown values pass through (the
+    camera may have been removed while its history remains)."""
+    if not value:
+        return None
+    for cam in cameras:
+        if value == cam["id"] or value.lower() == str(cam.get("name", "")).lower():
+            return cam["id"]
+    prefixed = [cam["id"] for cam in cameras if cam["id"].startswith(value)]
+    return prefixed[0] if len(prefixed) == 1 else value
+
+
+def parse_time(value: str | None) -> float | None:
+    """Unix seconds or ISO 8601 (local time if no offset) → unix seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
 
 
 # ─── Frame Grabber (drains RTSP buffer, keeps latest frame) ──
@@ -552,18 +2392,28 @@ class FrameGrabber:
     """Continuously reads RTSP frames in a background thread.
     Always keeps only the LATEST frame — prevents buffer buildup."""
 
+    # Frame sequence numbers are unique across all grabbers and reconnects
+    _seq_counter = itertools.count(1)
+
     def __init__(self, rtsp_url: str, name: str):
         self.rtsp_url = rtsp_url
         self.name = name
         self.frame = None
+        self.frame_seq = 0  # Sequence number of self.frame
+        self.frame_time = 0.0  # Wall-clock time self.frame was decoded
+        self._consumed = True  # Has self.frame been handed out yet?
+        self.frames_decoded = 0
+        self.read_failures = 0
         self.ret = False
         self.lock = threading.Lock()
         self.running = True
         self.connected = False
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"grabber-{name}")
         self._thread.start()
 
     def _run(self):
+        placement.apply("decode")
         while self.running:
             cap = None
             try:
@@ -586,14 +2436,16 @@ class FrameGrabber:
                         break
                     if not ret:
                         fails += 1
+                        self.read_failures += 1
+                        metrics.read_failures.inc(self.name)
                         if fails > 30:
                             break
                         time.sleep(0.05)
                         continue
                     fails = 0
-                    with self.lock:
-                        self.frame = frame
-                        self.ret = True
+                    metrics.frames_decoded.inc(self.name)
+                    self.frames_decoded += 1
+                    self._publish(frame)
 
             except Exception:
                 pass
@@ -607,64 +2459,721 @@ class FrameGrabber:
                 if self.running:
                     time.sleep(5)
 
+    def _publish(self, frame: np.ndarray):
+        """Make a decoded frame the latest one."""
+        with self.lock:
+            if not self._consumed:
+                metrics.frames_dropped.inc(self.name)
+            self.frame = frame
+            self.frame_seq = next(self._seq_counter)
+            self.frame_time = time.time()
+            self._consumed = False
+            self.ret = True
+
     def get_latest_frame(self):
-        """Get the most recent frame (non-blocking). Returns (ok, frame)."""
+        """Get the most recent frame (non-blocking).
+        Returns (ok, frame, seq, captured_at)."""
         with self.lock:
             if self.ret and self.frame is not None:
                 frame = self.frame.copy()
-                return True, frame
-            return False, None
+                self._consumed = True
+                return True, frame, self.frame_seq, self.frame_time
+            return False, None, 0, 0.0
 
     def stop(self):
         self.running = False
         self._thread.join(timeout=5)
 
 
-# ─── Camera Monitor (per camera thread) ───────────────────
-class CameraMonitor(threading.Thread):
-    def __init__(self, camera: dict, config: Config,
-                 detector: YOLOv8Detector, sender: AlertSender,
-                 fire_detector: YOLOv8Detector | None = None):
-        super().__init__(daemon=True)
-        self.camera = camera
-        self.config = config
-        self.detector = detector
-        self.fire_detector = fire_detector
-        self.sender = sender
-        self.running = True
-        self.cam_id = camera["id"]
-        self.cam_name = camera.get("name", self.cam_id[:8])
-        # Thread-safe stats for hourly report
-        self._stats_lock = threading.Lock()
-        self._stats_frames = 0
-        self._stats_detections = 0
-        self.grabber = None
+# ─── Shared-memory frame transport (process mode) ──────────
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment the supervisor owns (and unlinks).
+    Spawned workers share the supervisor's resource tracker, so on Python
+    < 3.13 the extra registration is a no-op rather than a second owner."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
 
-    def stop(self):
-        self.running = False
-        if self.grabber:
-            self.grabber.stop()
 
-    def get_and_reset_stats(self) -> tuple[int, int]:
-        """Return (frames, detections) since last call, then reset."""
-        with self._stats_lock:
-            f, d = self._stats_frames, self._stats_detections
-            self._stats_frames = 0
-            self._stats_detections = 0
-            return f, d
+class SharedFrameRing:
+    """Latest-frame handoff between processes without pickling.
+    One writer (grabber worker) and one reader (inference process) per camera.
+    Layout: ring header, then SLOTS × (slot header + max-size BGR frame).
+    Each slot is a seqlock: seq is 0 while the writer copies, and the reader
+    retries if seq changed under it."""
 
-    def run(self):
-        log.info(f"📷 Starting monitor: {self.cam_name} ({self.cam_id[:8]}...)")
-        retry_delay = 5
+    SLOTS = 3
+    HEADER_FIELDS = 8   # float64: latest slot, heartbeat, connected, decoded, read failures
+    LATEST, HEARTBEAT, CONNECTED, DECODED, READ_FAILURES = range(5)
+    SLOT_FIELDS = 4     # float64: seq, captured_at, height, width
 
-        while self.running:
-            try:
-                rtsp_url = self.camera["rtsp_url"]
-                self.grabber = FrameGrabber(rtsp_url, self.cam_name)
+    def __init__(self, name: str, max_width: int, max_height: int, create: bool = False):
+        self.name = name
+        self.max_width = max_width
+        self.max_height = max_height
+        frame_bytes = max_width * max_height * 3
+        slot_size = self.SLOT_FIELDS * 8 + frame_bytes
+        size = self.HEADER_FIELDS * 8 + self.SLOTS * slot_size
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach_shared_memory(name)
+        buf = self.shm.buf
+        self.header = np.ndarray((self.HEADER_FIELDS,), np.float64, buffer=buf)
+        self._slot_headers = []
+        self._slot_frames = []
+        for i in range(self.SLOTS):
+            offset = self.HEADER_FIELDS * 8 + i * slot_size
+            self._slot_headers.append(
+                np.ndarray((self.SLOT_FIELDS,), np.float64, buffer=buf, offset=offset))
+            self._slot_frames.append(
+                np.ndarray((frame_bytes,), np.uint8, buffer=buf, offset=offset + self.SLOT_FIELDS * 8))
+        if create:
+            self.header[:] = 0
+            self.header[self.LATEST] = -1
+            for hdr in self._slot_headers:
+                hdr[:] = 0
+        # Continue after whatever a previous writer left, so the reader sees new seqs
+        self._next_seq = int(max(hdr[0] for hdr in self._slot_headers)) + 1
+
+    def write(self, frame: np.ndarray, captured_at: float):
+        h, w = frame.shape[:2]
+        if w > self.max_width or h > self.max_height:
+            scale = min(self.max_width / w, self.max_height / h)
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            h, w = frame.shape[:2]
+        idx = (int(self.header[self.LATEST]) + 1) % self.SLOTS
+        hdr = self._slot_headers[idx]
+        hdr[0] = 0
+        self._slot_frames[idx][:h * w * 3] = np.ascontiguousarray(frame).reshape(-1)
+        hdr[1] = captured_at
+        hdr[2] = h
+        hdr[3] = w
+        hdr[0] = self._next_seq
+        self._next_seq += 1
+        self.header[self.LATEST] = idx
+
+    def latest_seq(self) -> int:
+        idx = int(self.header[self.LATEST])
+        return int(self._slot_headers[idx][0]) if idx >= 0 else 0
+
+    def read(self):
+        """Copy of the newest frame → (seq, frame, captured_at), or None."""
+        for _ in range(3):
+            idx = int(self.header[self.LATEST])
+            if idx < 0:
+                return None
+            hdr = self._slot_headers[idx]
+            seq = hdr[0]
+            if seq == 0:
+                continue  # Writer is mid-copy
+            h, w, captured_at = int(hdr[2]), int(hdr[3]), float(hdr[1])
+            frame = self._slot_frames[idx][:h * w * 3].reshape(h, w, 3).copy()
+            if hdr[0] == seq:
+                return int(seq), frame, captured_at
+        return None
 
-                # Wait for connection
-                for _ in range(30):
-                    if self.grabber.connected or not self.running:
+    def mark(self, connected: bool, decoded: int, read_failures: int):
+        """Writer status, refreshed by the grabber worker every ~0.5s."""
+        self.header[self.HEARTBEAT] = time.time()
+        self.header[self.CONNECTED] = 1 if connected else 0
+        self.header[self.DECODED] = decoded
+        self.header[self.READ_FAILURES] = read_failures
+
+    def close(self):
+        # numpy views pin the buffer — drop them first
+        self.header = None
+        self._slot_headers = []
+        self._slot_frames = []
+        self.shm.close()
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class RingWriterGrabber(FrameGrabber):
+    """FrameGrabber (in a grabber worker process) that publishes every
+    decoded frame straight into the camera's shared-memory ring."""
+
+    def __init__(self, rtsp_url: str, name: str, ring: SharedFrameRing):
+        self.ring = ring
+        super().__init__(rtsp_url, name)
+
+    def _publish(self, frame: np.ndarray):
+        self.ring.write(frame, time.time())
+
+
+class SharedRingGrabber:
+    """Inference-side stand-in for FrameGrabber that reads a camera's ring."""
+
+    STALE_AFTER = 10  # Seconds without a worker heartbeat → disconnected
+
+    def __init__(self, ring: SharedFrameRing, name: str):
+        self.ring = ring
+        self.name = name
+        self.frame_seq = 0
+        self._frame = None
+        self._frame_time = 0.0
+        self._ring_seq = 0
+        self._decoded = int(ring.header[ring.DECODED])
+        self._read_failures = int(ring.header[ring.READ_FAILURES])
+
+    @property
+    def connected(self) -> bool:
+        header = self.ring.header
+        return bool(header[self.ring.CONNECTED]) and \
+            time.time() - header[self.ring.HEARTBEAT] < self.STALE_AFTER
+
+    @property
+    def frames_decoded(self) -> int:
+        self._sync_counters()
+        return self._decoded
+
+    @property
+    def read_failures(self) -> int:
+        self._sync_counters()
+        return self._read_failures
+
+    def _sync_counters(self):
+        """Mirror the worker's counters into this process' metrics."""
+        decoded = int(self.ring.header[self.ring.DECODED])
+        failures = int(self.ring.header[self.ring.READ_FAILURES])
+        # Counters restart with the worker — count from zero again
+        delta = decoded - self._decoded if decoded >= self._decoded else decoded
+        if delta:
+            metrics.frames_decoded.inc(self.name, amount=delta)
+        delta = failures - self._read_failures if failures >= self._read_failures else failures
+        if delta:
+            metrics.read_failures.inc(self.name, amount=delta)
+        self._decoded, self._read_failures = decoded, failures
+
+    def get_latest_frame(self):
+        """Same contract as FrameGrabber.get_latest_frame()."""
+        self._sync_counters()
+        if self.ring.latest_seq() != self._ring_seq:
+            item = self.ring.read()
+            if item is not None:
+                ring_seq, frame, captured_at = item
+                if ring_seq > self._ring_seq + 1 and self._ring_seq:
+                    metrics.frames_dropped.inc(self.name, amount=ring_seq - self._ring_seq - 1)
+                self._ring_seq = ring_seq
+                self._frame = frame
+                self._frame_time = captured_at
+                self.frame_seq = next(FrameGrabber._seq_counter)
+        if self._frame is None:
+            return False, None, 0, 0.0
+        return True, self._frame, self.frame_seq, self._frame_time
+
+    def stop(self):
+        pass  # The ring outlives monitor restarts; the supervisor unlinks it
+
+
+# ─── Secondary Model Scheduler (fire/smoke, shared) ────────
+class SecondaryModelScheduler(threading.Thread):
+    """Runs a secondary model on one camera at a time, round-robin.
+    Cameras hand over the frame the main model just analyzed; only the
+    latest frame per camera is kept. Total inferences are capped by a
+    global per-minute budget, so cost doesn't burst with camera count."""
+
+    def __init__(self, detector: YOLOv8Detector, per_minute: int):
+        super().__init__(daemon=True, name=f"scheduler-{detector.name}")
+        self.detector = detector
+        self.cache = detector.preprocess_cache
+        self.interval = 60.0 / max(1, per_minute)
+        self._lock = threading.Lock()
+        # {camera_id: (frame, frame_key, callback)} — latest frame wins
+        self._pending: dict[str, tuple] = {}
+        self._order: deque[str] = deque()
+        self._stop_event = threading.Event()
+
+    def submit(self, camera_id: str, frame: np.ndarray, callback,
+               frame_key: tuple | None = None):
+        """Queue a frame for the secondary model (non-blocking).
+        callback(frame, detections) runs on the scheduler thread.
+        A pending frame_key stays pinned in the preprocess cache so the
+        secondary model can reuse the main model's blob."""
+        if frame_key is not None and self.cache is not None:
+            self.cache.acquire(frame_key)
+        with self._lock:
+            if camera_id not in self._order:
+                self._order.append(camera_id)
+            replaced = self._pending.get(camera_id)
+            self._pending[camera_id] = (frame, frame_key, callback)
+        if replaced is not None:
+            self._release(replaced[1])
+
+    def forget(self, camera_id: str):
+        with self._lock:
+            job = self._pending.pop(camera_id, None)
+            if camera_id in self._order:
+                self._order.remove(camera_id)
+        if job is not None:
+            self._release(job[1])
+
+    def _release(self, frame_key: tuple | None):
+        if frame_key is not None and self.cache is not None:
+            self.cache.release(frame_key)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _next_job(self):
+        """Pick the next camera (in rotation) that has a pending frame."""
+        with self._lock:
+            for _ in range(len(self._order)):
+                camera_id = self._order[0]
+                self._order.rotate(-1)
+                job = self._pending.pop(camera_id, None)
+                if job is not None:
+                    return camera_id, job
+        return None
+
+    def run(self):
+        log.info(f"🔁 {self.detector.name} scheduler: 1 inference every {self.interval:.1f}s")
+        next_run = time.time()
+        while not self._stop_event.is_set():
+            delay = next_run - time.time()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+            job = self._next_job()
+            if job is None:
+                self._stop_event.wait(0.2)  # Nothing queued yet
+                continue
+            next_run = time.time() + self.interval
+
+            camera_id, (frame, frame_key, callback) = job
+            try:
+                detections = self.detector.detect(frame, frame_key=frame_key)
+            except Exception as e:
+                log.warning(f"{self.detector.name} detection error on {camera_id[:8]}: {e}")
+                continue
+            finally:
+                self._release(frame_key)
+            if detections:
+                try:
+                    callback(frame, detections)
+                except Exception as e:
+                    log.error(f"{self.detector.name} callback error on {camera_id[:8]}: {e}")
+
+
+# ─── Arming schedules (per camera, from the alert rules) ───
+class ArmingSchedule:
+    """When a camera is armed. Each window has the alert_rules fields:
+    schedule_start / schedule_end ("HH:MM", end minute inclusive, overnight
+    when start > end, null = all day) and days_of_week (0 = Sunday, matched
+    against the current day) — evaluated exactly like /api/ingest/alert,
+    so nothing the server would accept is missed. Armed lead_seconds before
+    a window opens."""
+
+    def __init__(self, windows: list, lead_seconds: float = 120, timezone_name: str = "Asia/Jerusalem"):
+        self.windows = [self._parse(w) for w in windows]
+        self.lead_seconds = lead_seconds
+        try:
+            self.tz = ZoneInfo(timezone_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            log.warning(f"Unknown arming_timezone {timezone_name!r} — using the box's local time")
+            self.tz = None
+
+    @classmethod
+    def for_camera(cls, camera: dict, lead_seconds: float,
+                   timezone_name: str) -> "ArmingSchedule | None":
+        """The camera's schedule, or None when it is armed 24/7."""
+        windows = camera.get("arming_schedule")
+        if not windows:
+            return None
+        try:
+            return cls(windows, lead_seconds, timezone_name)
+        except (TypeError, ValueError, AttributeError) as e:
+            log.warning(f"Ignoring invalid arming_schedule for {camera.get('name', camera['id'])}: "
+                        f"{e} — armed 24/7")
+            return None
+
+    @staticmethod
+    def _parse(window: dict) -> tuple:
+        start, end = window.get("schedule_start"), window.get("schedule_end")
+        if start and end:
+            # Supabase TIME columns come as "HH:MM:SS"
+            start, end = (datetime.strptime(v[:5], "%H:%M").strftime("%H:%M") for v in (start, end))
+        else:
+            start = end = None
+        days = {int(d) for d in window.get("days_of_week") or ()}
+        return start, end, days
+
+    def _in_window(self, ts: float) -> bool:
+        local = datetime.fromtimestamp(ts, self.tz)
+        hhmm = local.strftime("%H:%M")
+        day = local.isoweekday() % 7  # 0 = Sunday
+        for start, end, days in self.windows:
+            if days and day not in days:
+                continue
+            if start is not None:
+                if start <= end and (hhmm < start or hhmm > end):
+                    continue
+                if start > end and start > hhmm > end:
+                    continue
+            return True
+        return False
+
+    def armed(self, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return self._in_window(now) or self._in_window(now + self.lead_seconds)
+
+    def next_armed(self, now: float | None = None) -> float | None:
+        """When the camera next arms (minute resolution, within a week)."""
+        now = time.time() if now is None else now
+        minute = now - now % 60
+        for i in range(1, 8 * 24 * 60):
+            if self.armed(minute + i * 60):
+                return minute + i * 60
+        return None
+
+
+def grab_keyframe(url: str, timeout: float = 15) -> np.ndarray | None:
+    """Decode just the first keyframe of a stream (ffmpeg -skip_frame nokey)."""
+    proc = subprocess.Popen(keyframe_command(url), stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    placement.apply("decode", proc.pid)
+    try:
+        out, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        return None
+    return decode_keyframe(out)
+
+
+def keyframe_command(url: str) -> list[str]:
+    return ["ffmpeg", "-nostdin", "-v", "error",
+            *(["-rtsp_transport", "tcp"] if url.startswith("rtsp") else []),
+            "-skip_frame", "nokey", "-i", url, "-an", "-frames:v", "1",
+            "-f", "image2pipe", "-c:v", "mjpeg", "-q:v", "5", "pipe:1"]
+
+
+def decode_keyframe(data: bytes) -> np.ndarray | None:
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+# ─── Camera Monitor (per camera thread) ───────────────────
+class CameraAnalyzer:
+    """Per-camera analysis (models → alerts) and stats, shared by the
+    threaded CameraMonitor and the event-loop AsyncCameraMonitor."""
+
+    def __init__(self, camera: dict, config: Config,
+                 detector: YOLOv8Detector, sender: AlertSender,
+                 fire_scheduler: SecondaryModelScheduler | None = None,
+                 store: DetectionStore | None = None):
+        self.camera = camera
+        self.config = config
+        self.detector = detector
+        self.fire_scheduler = fire_scheduler
+        self.sender = sender
+        self.store = store
+        self.running = True
+        self.cam_id = camera["id"]
+        self.cam_name = camera.get("name", self.cam_id[:8])
+        # Thread-safe stats for hourly report
+        self._stats_lock = threading.Lock()
+        self._stats_frames = 0
+        self._stats_detections = 0
+        # Degradation knobs, set by LoadController
+        self.interval_multiplier = 1.0
+        self.fire_enabled = True
+        # Burst sampling
+        self._burst_until = 0.0
+        self._last_detection_at = 0.0
+        self._motion: MotionDetector | None = None
+        # Snapshot hold: detection_type → (confidence, frame, detections, trace)
+        self._hold: dict[str, tuple] = {}
+        self._hold_lock = threading.Lock()
+        self._hold_timer: threading.Timer | None = None
+        self.quality = FrameQualityGate(config, self.cam_name) if config.quality_gate else None
+        # Arming schedule (None = armed 24/7)
+        self.schedule = ArmingSchedule.for_camera(camera, config.arming_lead_seconds,
+                                                  config.arming_timezone)
+        self.armed = True
+        metrics.camera_armed.set(1, self.cam_name)
+
+    def stop(self):
+        self.running = False
+        if self.fire_scheduler:
+            self.fire_scheduler.forget(self.cam_id)
+        self._release_hold()
+
+    def _update_armed(self) -> bool:
+        """Follow the arming schedule; returns whether the camera is armed."""
+        armed = self.schedule is None or self.schedule.armed()
+        if armed == self.armed:
+            return armed
+        self.armed = armed
+        metrics.camera_armed.set(int(armed), self.cam_name)
+        if armed:
+            log.info(f"🔔 {self.cam_name}: armed — analysis resumes")
+            return True
+        # Nothing from before the disarmed stretch should carry over
+        if self.fire_scheduler:
+            self.fire_scheduler.forget(self.cam_id)
+        if self._motion is not None:
+            self._motion.reset()
+        self._burst_until = 0.0
+        self._release_hold()
+        next_armed = self.schedule.next_armed()
+        until = (f" until {datetime.fromtimestamp(next_armed, self.schedule.tz):%a %H:%M}"
+                 if next_armed else "")
+        log.info(f"🌙 {self.cam_name}: disarmed{until} — no analysis, keyframe check "
+                 f"every {self.config.disarmed_check_interval:g}s")
+        return False
+
+    def _record_keyframe_check(self, frame: np.ndarray | None):
+        """Disarmed health check: reachable, and the quality gate's verdict."""
+        ok = frame is not None
+        metrics.keyframe_checks.inc(self.cam_name, "ok" if ok else "failed")
+        if not ok:
+            log.warning(f"Keyframe check failed: {self.cam_name}",
+                        extra={"rate_key": ("keyframe_check", self.cam_id)})
+        if self.quality:
+            if ok:
+                self.quality.check(frame)
+            # A failed check counts as a heartbeat's worth of failed reads
+            failures = 0 if ok else self.config.quality_read_failures
+            previous = self.quality.evaluate(failures)
+            if previous is not None:
+                self._report_quality(previous, failures)
+
+    def get_and_reset_stats(self) -> tuple[int, int]:
+        """Return (frames, detections) since last call, then reset."""
+        with self._stats_lock:
+            f, d = self._stats_frames, self._stats_detections
+            self._stats_frames = 0
+            self._stats_detections = 0
+            return f, d
+
+    def analyze_frame(self, frame: np.ndarray, seq: int, captured_at: float) -> list:
+        """Run the models on one frame and alert on what they find.
+        Every analyzed frame carries a trace (ID + timestamps from capture on)
+        that ends up in the alert metadata. Returns the main-model detections."""
+        rejected = self.quality.check(frame) if self.quality else None
+        if rejected:
+            debug_view.publish(self.cam_id, frame, rejected=rejected)
+            return []  # Black / frozen — nothing the models could use
+        now = time.time()
+        trace = {
+            "trace_id": uuid.uuid4().hex[:16],
+            "captured_at": captured_at,
+            "analysis_started_at": now,
+        }
+        with self._stats_lock:
+            self._stats_frames += 1
+        metrics.frames_analyzed.inc(self.cam_name)
+        metrics.grab_age.observe(now - captured_at, self.cam_name)
+
+        # YOLOv8 inference on latest frame (main COCO model).
+        # The frame stays pinned in the preprocess cache until
+        # every model that wants it (fire/smoke too) is done.
+        frame_key = (self.cam_id, seq)
+        cache = self.detector.preprocess_cache
+        if cache is not None:
+            cache.acquire(frame_key)
+        timings = {}
+        try:
+            detections = self.detector.detect(frame, frame_key=frame_key, timings=timings)
+        except Exception as e:
+            log.warning(f"Detection error on {self.cam_name}: {e}",
+                        extra={"rate_key": ("detection_error", self.cam_id)})
+            detections = []
+        trace["detected_at"] = time.time()
+        debug_view.publish(self.cam_id, frame, detections, timings, now - captured_at)
+
+        # Fire/smoke runs on the shared scheduler, same frame + blob + trace
+        if self.fire_scheduler and self.fire_enabled:
+            self.fire_scheduler.submit(
+                self.cam_id, frame,
+                lambda _, dets: self._handle_detections(frame, dets,
+                                                        dict(trace, detected_at=time.time())),
+                frame_key=frame_key)
+        if cache is not None:
+            cache.release(frame_key)
+
+        if detections:
+            event_start = now - self._last_detection_at > max(self.config.burst_seconds,
+                                                              self.config.analysis_interval * 2)
+            if event_start:
+                # Only a new event bursts — a parked car detected every
+                # analysis must not hold the camera at burst_interval
+                self._start_burst("detection")
+            if not self._hold_detections(frame, detections, trace, event_start):
+                self._handle_detections(frame, detections, trace)
+        return detections
+
+    def _hold_detections(self, frame: np.ndarray, detections: list, trace: dict,
+                         event_start: bool) -> bool:
+        """From the first detection of an event, keep the most confident frame
+        per detection type for snapshot_hold_seconds, then alert once with it
+        (_release_hold). Returns False if nothing is held — alert now."""
+        with self._hold_lock:
+            if self._hold_timer is None:
+                if not (event_start and self.config.snapshot_hold_seconds
+                        and self.interval_multiplier <= 1):
+                    return False
+                self._hold_timer = threading.Timer(self.config.snapshot_hold_seconds,
+                                                   self._release_hold)
+                self._hold_timer.daemon = True
+                self._hold_timer.start()
+            for d in detections:
+                t = d["detection_type"]
+                if t not in self._hold or d["confidence"] > self._hold[t][0]:
+                    self._hold[t] = (d["confidence"], frame, detections, trace)
+        self._last_detection_at = time.time()
+        return True
+
+    def _release_hold(self):
+        """Alert on the held frames (hold timer, stop or disarm)."""
+        with self._hold_lock:
+            held, self._hold = self._hold, {}
+            if self._hold_timer is not None:
+                self._hold_timer.cancel()
+                self._hold_timer = None
+        groups = {}  # id(frame) → (frame, trace, detections to alert on)
+        for t, (_, frame, dets, trace) in held.items():
+            group = groups.setdefault(id(frame), (frame, trace, []))
+            group[2].extend(d for d in dets if d["detection_type"] == t)
+        for frame, trace, dets in groups.values():
+            self._handle_detections(frame, dets, trace)
+
+    def _in_burst(self) -> bool:
+        return time.time() < self._burst_until
+
+    def _start_burst(self, reason: str):
+        """Analyze at burst_interval for the next burst_seconds (not while
+        shed). A running burst is never extended, so it always falls back."""
+        if not self.config.burst_seconds or self.interval_multiplier > 1:
+            return
+        now = time.time()
+        if now < self._burst_until:
+            return
+        metrics.bursts.inc(self.cam_name, reason)
+        (log.info if reason == "detection" else log.debug)(
+            f"⚡ {self.cam_name}: burst sampling ({reason})")
+        self._burst_until = now + self.config.burst_seconds
+
+    def _next_interval(self) -> float:
+        """Seconds from this analysis to the next one."""
+        if self.interval_multiplier <= 1 and (self._in_burst() or self._hold_timer is not None):
+            return min(self.config.burst_interval, self.config.analysis_interval)
+        return self.config.analysis_interval * self.interval_multiplier
+
+    @property
+    def _observing(self) -> bool:
+        return bool(self.config.burst_seconds)
+
+    def _observe_frame(self, frame: np.ndarray) -> bool:
+        """Between analyses: check a downscaled copy for motion. Returns True
+        if motion just started a burst."""
+        scale = min(1.0, self.config.motion_sample_width / frame.shape[1])
+        small = frame
+        if scale < 1.0:
+            small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if self._motion is None:
+            self._motion = MotionDetector(self.config, self.config.motion_min_area * scale * scale)
+        if self._motion.detect(small) and not self._in_burst():
+            self._start_burst("motion")
+            return True
+        return False
+
+    def _handle_detections(self, frame: np.ndarray, detections: list, trace: dict | None = None):
+        """Count, log, annotate and alert on detections for one frame."""
+        with self._stats_lock:
+            self._stats_detections += len(detections)
+        self._last_detection_at = time.time()
+        for d in detections:
+            # Busy scenes detect every frame — one line per camera+type per 10s
+            log.info(f"🎯 {self.cam_name}: {d['detection_type']} {d['confidence']:.0%}",
+                     extra={"rate_key": ("detection", self.cam_id, d["detection_type"])})
+        annotated = draw_detections(frame, detections)
+        captured_at = (trace or {}).get("captured_at") or time.time()
+        for det in detections:
+            snapshot = self.sender.send_alert(self.cam_id, det, annotated, trace=trace)
+            if self.store:
+                self.store.add(self.cam_id, det, captured_at, snapshot,
+                               (trace or {}).get("trace_id"))
+
+    def _report_heartbeat(self, frames: int, detections: int, elapsed: float, decoded: int,
+                          read_failures: int = 0):
+        """Local heartbeat log + per-camera FPS gauges (every ~30s)."""
+        log.info(f"💓 {self.cam_name}: {frames} frames analyzed, {detections} detections in last 30s")
+        metrics.camera_fps.set(frames / elapsed, self.cam_name, "analyzed")
+        metrics.camera_fps.set(decoded / elapsed, self.cam_name, "decoded")
+        if self.quality:
+            previous = self.quality.evaluate(read_failures)
+            if previous is not None:
+                self._report_quality(previous, read_failures)
+
+    def _report_quality(self, previous: str, read_failures: int):
+        state = self.quality.state
+        if state == "frozen":
+            message = f"Camera {self.cam_name} frozen — identical frames for {self.config.quality_frozen_seconds}s+"
+        elif state == "degraded":
+            message = f"Camera {self.cam_name} degraded — mostly black/corrupt frames or failing reads"
+        else:
+            message = f"Camera {self.cam_name} picture back to normal (was {previous})"
+        (log.warning if state != "ok" else log.info)(f"🎞️  {message}")
+        self.sender.send_system_log(
+            category="camera",
+            event="ai_camera_quality",
+            message=message,
+            severity="warning" if state != "ok" else "info",
+            metadata={
+                "camera_id": self.cam_id,
+                "camera_name": self.cam_name,
+                "state": state,
+                "previous_state": previous,
+                "read_failures": read_failures,
+                "rejected_frames": dict(self.quality.rejected),
+            },
+        )
+
+
+class CameraMonitor(CameraAnalyzer, threading.Thread):
+    """Threaded monitor: a FrameGrabber thread decodes, this thread analyzes."""
+
+    def __init__(self, camera: dict, config: Config,
+                 detector: YOLOv8Detector, sender: AlertSender,
+                 fire_scheduler: SecondaryModelScheduler | None = None,
+                 frame_ring: SharedFrameRing | None = None,
+                 store: DetectionStore | None = None):
+        CameraAnalyzer.__init__(self, camera, config, detector, sender, fire_scheduler, store)
+        threading.Thread.__init__(self, daemon=True, name=f"monitor-{self.cam_name}")
+        self.frame_ring = frame_ring  # Process mode: frames come from a grabber worker
+        self.grabber = None
+
+    def stop(self):
+        super().stop()
+        if self.grabber:
+            self.grabber.stop()
+
+    def run(self):
+        log.info(f"📷 Starting monitor: {self.cam_name} ({self.cam_id[:8]}...)")
+        retry_delay = 5
+
+        while self.running:
+            if not self._update_armed():
+                self._wait_disarmed()
+                continue
+            try:
+                if self.frame_ring is not None:
+                    self.grabber = SharedRingGrabber(self.frame_ring, self.cam_name)
+                else:
+                    self.grabber = FrameGrabber(self.camera["rtsp_url"], self.cam_name)
+
+                # Wait for connection
+                for _ in range(30):
+                    if self.grabber.connected or not self.running:
                         break
                     time.sleep(0.5)
 
@@ -680,70 +3189,66 @@ class CameraMonitor(threading.Thread):
                 heartbeat_frames = 0
                 heartbeat_detections = 0
                 heartbeat_time = time.time()
-                last_frame_id = None
-                fire_frame_counter = 0
+                heartbeat_decoded = self.grabber.frames_decoded
+                heartbeat_failures = self.grabber.read_failures
+                last_seq = 0
+                observed_seq = 0
+                next_analysis = 0.0
+                next_arming_check = time.time() + 10
 
                 while self.running and self.grabber.connected:
                     start = time.time()
+                    if start >= next_arming_check:
+                        if not self._update_armed():
+                            break
+                        next_arming_check = start + 10
+
+                    # Pace BEFORE grabbing, so the analyzed frame is the freshest one.
+                    # Meanwhile sample frames for motion (motion → analyze now)
+                    if start < next_analysis:
+                        if not self._observing:
+                            time.sleep(min(next_analysis - start, 0.5))
+                            continue
+                        time.sleep(min(next_analysis - start, self.config.motion_sample_interval))
+                        ok, frame, seq, captured_at = self.grabber.get_latest_frame()
+                        if ok and seq not in (last_seq, observed_seq):
+                            observed_seq = seq
+                            if self._observe_frame(frame):
+                                next_analysis = 0.0
+                        continue
 
                     # Get latest frame (always fresh, no buffer lag)
-                    ret, frame = self.grabber.get_latest_frame()
+                    ret, frame, seq, captured_at = self.grabber.get_latest_frame()
                     if not ret:
                         time.sleep(0.2)
                         continue
 
                     # Skip if same frame (grabber hasn't updated yet)
-                    frame_id = id(frame)
-                    if frame_id == last_frame_id:
+                    if seq == last_seq:
                         time.sleep(0.1)
                         continue
-                    last_frame_id = frame_id
-
+                    last_seq = seq
                     heartbeat_frames += 1
-                    # Throttle: analyze 1 frame per 2 seconds per camera.
-                    # Reduces CPU from ~185% to ~123% while still detecting people/vehicles.
-                    time.sleep(2)
-                    fire_frame_counter += 1
-                    with self._stats_lock:
-                        self._stats_frames += 1
-
-                    # YOLOv8 inference on latest frame (main COCO model)
-                    try:
-                        detections = self.detector.detect(frame)
-                    except Exception as e:
-                        log.warning(f"Detection error on {self.cam_name}: {e}")
-                        detections = []
-
-                    # Fire/smoke detection (secondary model, every N frames)
-                    if self.fire_detector and self.fire_detector.model and \
-                       fire_frame_counter >= self.config.fire_scan_interval:
-                        fire_frame_counter = 0
-                        try:
-                            fire_dets = self.fire_detector.detect(frame)
-                            if fire_dets:
-                                detections.extend(fire_dets)
-                        except Exception as e:
-                            log.warning(f"Fire detection error on {self.cam_name}: {e}")
-
-                    if detections:
-                        heartbeat_detections += len(detections)
-                        with self._stats_lock:
-                            self._stats_detections += len(detections)
-                        for d in detections:
-                            log.info(f"🎯 {self.cam_name}: {d['detection_type']} {d['confidence']:.0%}")
-                        annotated = draw_detections(frame, detections)
-                        for det in detections:
-                            self.sender.send_alert(self.cam_id, det, annotated)
+                    detections = self.analyze_frame(frame, seq, captured_at)
+                    next_analysis = start + self._next_interval()
+                    heartbeat_detections += len(detections)
 
                     # Heartbeat log every 30 seconds (local only)
                     if start - heartbeat_time >= 30:
-                        log.info(f"💓 {self.cam_name}: {heartbeat_frames} frames analyzed, {heartbeat_detections} detections in last 30s")
+                        decoded = self.grabber.frames_decoded
+                        failures = self.grabber.read_failures
+                        self._report_heartbeat(heartbeat_frames, heartbeat_detections,
+                                               start - heartbeat_time, decoded - heartbeat_decoded,
+                                               max(0, failures - heartbeat_failures))
                         heartbeat_frames = 0
                         heartbeat_detections = 0
                         heartbeat_time = start
+                        heartbeat_decoded = decoded
+                        heartbeat_failures = failures
 
-                # Grabber disconnected — clean up and retry
-                log.warning(f"Stream lost: {self.cam_name}")
+                # Grabber disconnected (or disarmed) — clean up and retry
+                if self.armed:
+                    log.warning(f"Stream lost: {self.cam_name}")
 
             except Exception as e:
                 log.error(f"Error in {self.cam_name}: {e}")
@@ -754,12 +3259,944 @@ class CameraMonitor(threading.Thread):
                     self.grabber.stop()
                     self.grabber = None
 
+    def _wait_disarmed(self):
+        """No decoding or inference until the schedule re-arms the camera —
+        just a keyframe every disarmed_check_interval."""
+        next_check = 0.0
+        while self.running and not self._update_armed():
+            if time.time() >= next_check:
+                self._record_keyframe_check(grab_keyframe(self.camera["rtsp_url"]))
+                next_check = time.time() + self.config.disarmed_check_interval
+            time.sleep(1)
+
+
+# ─── Event-loop ingestion (ingest_mode "async") ────────────
+class AsyncIngestLoop:
+    """One asyncio loop (one thread) that multiplexes every camera's ffmpeg
+    pipe, reconnect timers and analysis pacing. Decoding happens in the
+    ffmpeg processes; inference runs on a bounded thread pool. Thread count
+    stays at 1 + inference_workers whatever the camera count."""
+
+    def __init__(self, inference_workers: int = 2):
+        self.loop = asyncio.new_event_loop()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, inference_workers), thread_name_prefix="inference",
+            initializer=placement.apply, initargs=("inference",))
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ingest-loop")
+
+    def _run(self):
+        placement.apply("decode")  # Pipe reads; the executor threads re-pin to inference
+        asyncio.set_event_loop(self.loop)
+        if sys.version_info < (3, 12) and hasattr(os, "pidfd_open"):
+            # Default watcher on 3.11 is a thread per child process
+            watcher = asyncio.PidfdChildWatcher()
+            watcher.attach_loop(self.loop)
+            asyncio.set_child_watcher(watcher)
+        self.loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 10):
+        async def cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._thread.is_alive():
+            try:
+                self.submit(cancel_all()).result(timeout=timeout)
+            except Exception:
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncCameraMonitor(CameraAnalyzer):
+    """Camera monitor as two coroutines on the AsyncIngestLoop: one reads raw
+    BGR frames from an ffmpeg pipe, one paces analysis. Exposes the same
+    start/stop/is_alive/join surface as CameraMonitor."""
+
+    OPEN_TIMEOUT = 15   # Seconds for ffprobe to open the stream
+    READ_TIMEOUT = 15   # Seconds without a frame → stream lost
+
+    def __init__(self, camera: dict, config: Config,
+                 detector: YOLOv8Detector, sender: AlertSender,
+                 ingest: AsyncIngestLoop,
+                 fire_scheduler: SecondaryModelScheduler | None = None,
+                 store: DetectionStore | None = None):
+        super().__init__(camera, config, detector, sender, fire_scheduler, store)
+        self.ingest = ingest
+        self.frame_ring = None
+        self.frames_decoded = 0
+        self._frame = None
+        self._frame_seq = 0
+        self._frame_time = 0.0
+        self._future: concurrent.futures.Future | None = None
+        self._entered = False
+        self._done = threading.Event()  # Set once _run has cleaned up
+
+    def start(self):
+        self._future = self.ingest.submit(self._run())
+
+    def is_alive(self) -> bool:
+        # A cancelled future reports done before the coroutine has killed
+        # its ffmpeg, so once it runs only _done counts
+        if self._future is None or self._done.is_set():
+            return False
+        return self._entered or not self._future.done()
+
+    def join(self, timeout: float | None = None):
+        deadline = None if timeout is None else time.time() + timeout
+        while self.is_alive() and (deadline is None or time.time() < deadline):
+            self._done.wait(0.05)
+
+    def stop(self):
+        super().stop()
+        if self._future is not None:
+            self._future.cancel()
+
+    @staticmethod
+    def _input_args(url: str) -> list[str]:
+        return ["-rtsp_transport", "tcp"] if url.startswith("rtsp") else []
+
+    async def _probe(self, url: str) -> tuple[int, int] | None:
+        """(width, height) of the first video stream, or None if unreachable."""
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", *self._input_args(url),
+            "-select_streams", "v:0", "-show_entries", "stream=width,height",
+            "-of", "csv=p=0", url,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout=self.OPEN_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return None
+        try:
+            width, height = (int(v) for v in out.decode().split(",")[:2])
+        except ValueError:
+            return None
+        return width, height
+
+    async def _run(self):
+        self._entered = True
+        try:
+            await self._monitor()
+        finally:
+            self._done.set()
+
+    async def _monitor(self):
+        log.info(f"📷 Starting monitor: {self.cam_name} ({self.cam_id[:8]}...)")
+        url = self.camera["rtsp_url"]
+        retry_delay = 5
+
+        while self.running:
+            try:
+                if not self._update_armed():
+                    await self._wait_disarmed(url)
+                    continue
+                size = await self._probe(url)
+                if size is None:
+                    log.warning(f"Cannot open stream: {self.cam_name}")
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, 60)
+                    continue
+                retry_delay = 5
+                await self._stream(url, *size)
+                if self.armed:
+                    log.warning(f"Stream lost: {self.cam_name}")
+                    await asyncio.sleep(retry_delay)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Error in {self.cam_name}: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+
+    async def _stream(self, url: str, width: int, height: int):
+        """Read frames until the pipe ends or stalls."""
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-loglevel", "error", *self._input_args(url), "-i", url,
+            "-an", "-vf", f"fps={self.config.ingest_fps}",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        placement.apply("decode", proc.pid)
+        frame_bytes = width * height * 3
+        analysis = None
+        next_arming_check = time.time() + 10
+        try:
+            while self.running:
+                if time.time() >= next_arming_check:
+                    if not self._update_armed():
+                        break
+                    next_arming_check = time.time() + 10
+                try:
+                    data = await asyncio.wait_for(proc.stdout.readexactly(frame_bytes),
+                                                  timeout=self.READ_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                self._frame = np.frombuffer(data, np.uint8).reshape(height, width, 3)
+                self._frame_seq = next(FrameGrabber._seq_counter)
+                self._frame_time = time.time()
+                self.frames_decoded += 1
+                metrics.frames_decoded.inc(self.cam_name)
+                if analysis is None:
+                    log.info(f"🟢 Connected: {self.cam_name}")
+                    analysis = asyncio.ensure_future(self._analyze_loop())
+        finally:
+            if analysis is not None:
+                analysis.cancel()
+            if proc.returncode is None:
+                proc.kill()
+            await proc.wait()
+
+    async def _wait_disarmed(self, url: str):
+        """Async counterpart of CameraMonitor._wait_disarmed."""
+        next_check = 0.0
+        while self.running and not self._update_armed():
+            if time.time() >= next_check:
+                self._record_keyframe_check(await self._grab_keyframe(url))
+                next_check = time.time() + self.config.disarmed_check_interval
+            await asyncio.sleep(1)
+
+    async def _grab_keyframe(self, url: str) -> np.ndarray | None:
+        proc = await asyncio.create_subprocess_exec(
+            *keyframe_command(url),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        placement.apply("decode", proc.pid)
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout=self.OPEN_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return None
+        return decode_keyframe(out)
+
+    async def _analyze_loop(self):
+        """Analyze the latest frame every analysis_interval (at most one
+        inference in flight per camera)."""
+        loop = asyncio.get_running_loop()
+        last_seq = 0
+        observed_seq = 0
+        heartbeat_frames = 0
+        heartbeat_detections = 0
+        heartbeat_time = time.time()
+        heartbeat_decoded = self.frames_decoded
+
+        while self.running:
+            if self._frame_seq == last_seq:
+                await asyncio.sleep(0.1)
+                continue
+            start = time.time()
+            frame, seq, captured_at = self._frame, self._frame_seq, self._frame_time
+            last_seq = seq
+            heartbeat_frames += 1
+            detections = await loop.run_in_executor(
+                self.ingest.executor, self.analyze_frame, frame, seq, captured_at)
+            heartbeat_detections += len(detections)
+
+            if start - heartbeat_time >= 30:
+                self._report_heartbeat(heartbeat_frames, heartbeat_detections,
+                                       start - heartbeat_time, self.frames_decoded - heartbeat_decoded)
+                heartbeat_frames = 0
+                heartbeat_detections = 0
+                heartbeat_time = start
+                heartbeat_decoded = self.frames_decoded
+
+            # Wait for the next analysis, sampling frames for motion meanwhile
+            deadline = start + self._next_interval()
+            while self.running and time.time() < deadline:
+                if not self._observing:
+                    await asyncio.sleep(deadline - time.time())
+                    break
+                await asyncio.sleep(min(deadline - time.time(), self.config.motion_sample_interval))
+                if self._frame_seq in (last_seq, observed_seq):
+                    continue
+                observed_seq = self._frame_seq
+                if await loop.run_in_executor(self.ingest.executor, self._observe_frame, self._frame):
+                    break  # Motion — analyze now
+
+
+# ─── Local HTTP endpoint (metrics/status, 127.0.0.1 only) ──
+class LocalStatusServer:
+    """Small HTTP server for on-box tooling (Prometheus scrape, support).
+    Routes map a path to handler(query) → (status, content_type, body);
+    POST routes get handler(query, body, headers). A body that is an
+    iterator of bytes is streamed until it ends or the client leaves."""
+
+    MAX_BODY = 128 * 1024 * 1024
+
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self.routes: dict[str, callable] = {}
+        self.post_routes: dict[str, callable] = {}
+        self._server: ThreadingHTTPServer | None = None
+
+    def add_route(self, path: str, handler, method: str = "GET"):
+        (self.post_routes if method == "POST" else self.routes)[path] = handler
+
+    def start(self):
+        routes = self.routes
+        post_routes = self.post_routes
+        max_body = self.MAX_BODY
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._handle(routes, lambda h, q: h(q))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > max_body:
+                    self.send_error(413)
+                    return
+                body = self.rfile.read(length)
+                self._handle(post_routes, lambda h, q: h(q, body, self.headers))
+
+            def _handle(self, table, call):
+                url = urlparse(self.path)
+                handler = table.get(url.path)
+                if handler is None:
+                    self.send_error(404)
+                    return
+                try:
+                    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    status, content_type, body = call(handler, query)
+                except Exception as e:
+                    log.warning(f"Status endpoint {url.path} failed: {e}")
+                    self.send_error(500)
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if isinstance(body, bytes):
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                try:
+                    for chunk in body:
+                        self.wfile.write(chunk)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Viewer closed the stream
+                finally:
+                    body.close()
+
+            def log_message(self, *_):
+                pass  # Scrapes every few seconds would flood the log
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            log.warning(f"Status endpoint disabled — cannot bind {self.host}:{self.port}: {e}")
+            return
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]  # Port 0 → the one picked
+        threading.Thread(target=self._server.serve_forever, daemon=True,
+                         name="status-http").start()
+        if "/metrics" in self.routes:
+            log.info(f"📈 Metrics: http://{self.host}:{self.port}/metrics")
+        if "/debug/stream" in self.routes:
+            log.info(f"🐞 Debug view: http://{self.host}:{self.port}/debug/stream?camera=<id|name>")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class Profiler:
+    """On-demand profiling window that runs beside live detection.
+    "stack" samples every thread's Python stack (folded, flamegraph.pl /
+    speedscope compatible) plus per-thread CPU time; "memory" diffs
+    tracemalloc snapshots. Results go to LOG_DIR/profile-<ts>.*"""
+
+    MODES = ("stack", "memory")
+    SAMPLE_INTERVAL = 0.01   # 100 Hz — ~1% of one core while sampling
+    MAX_SECONDS = 600
+
+    def __init__(self, out_dir: Path = LOG_DIR):
+        self.out_dir = out_dir
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, mode: str = "stack") -> Path | None:
+        """Begin a profiling window; returns the output path, or None if one
+        is already running."""
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        seconds = max(1.0, min(float(seconds), self.MAX_SECONDS))
+        with self._lock:
+            if self.busy:
+                return None
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            suffix = "folded" if mode == "stack" else "txt"
+            path = self.out_dir / f"profile-{mode}-{stamp}.{suffix}"
+            target = self._sample_stacks if mode == "stack" else self._trace_memory
+            self._thread = threading.Thread(target=self._run, args=(target, seconds, path),
+                                            daemon=True, name="profiler")
+            self._thread.start()
+        log.info(f"🔬 Profiling ({mode}) for {seconds:g}s → {path}")
+        return path
+
+    def _run(self, target, seconds: float, path: Path):
+        try:
+            target(seconds, path)
+        except Exception as e:
+            log.error(f"Profiling failed: {e}")
+
+    @staticmethod
+    def _thread_cpu(ident: int) -> float | None:
+        try:
+            return time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError):
+            return None  # Not Linux, or the thread has exited
+
+    def _sample_stacks(self, seconds: float, path: Path):
+        me = threading.get_ident()
+        threads = {t.ident: t.name for t in threading.enumerate() if t.ident}
+        cpu_start = {ident: self._thread_cpu(ident) for ident in threads}
+        process_start = time.process_time()
+        stacks: dict[str, int] = defaultdict(int)
+        samples: dict[str, int] = defaultdict(int)
+        ticks = 0
+        end = time.monotonic() + seconds
+
+        while time.monotonic() < end:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                name = threads.get(ident)
+                if name is None:
+                    # Thread started mid-window (e.g. a restarted monitor)
+                    for t in threading.enumerate():
+                        threads.setdefault(t.ident, t.name)
+                        cpu_start.setdefault(t.ident, self._thread_cpu(t.ident))
+                    name = threads.get(ident, f"thread-{ident}")
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                parts.append(name)
+                stacks[";".join(reversed(parts))] += 1
+                samples[name] += 1
+            ticks += 1
+            time.sleep(self.SAMPLE_INTERVAL)
+
+        process_cpu = time.process_time() - process_start
+        per_thread = {}
+        for ident, name in threads.items():
+            start_cpu, end_cpu = cpu_start.get(ident), self._thread_cpu(ident)
+            if ident == me or start_cpu is None or end_cpu is None:
+                continue
+            per_thread[name] = round(end_cpu - start_cpu, 3)
+        python_cpu = sum(per_thread.values())
+
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items())))
+        summary = {
+            "mode": "stack",
+            "seconds": seconds,
+            "samples": ticks,
+            "process_cpu_seconds": round(process_cpu, 3),
+            # Native worker pools (OpenVINO / ORT / FFmpeg) that Python does not see
+            "unattributed_cpu_seconds": round(max(process_cpu - python_cpu, 0), 3),
+            "threads": {
+                name: {"cpu_seconds": per_thread.get(name),
+                       "cpu_percent": round(100 * per_thread[name] / seconds, 1)
+                       if name in per_thread else None,
+                       "samples": samples.get(name, 0)}
+                for name in sorted(set(per_thread) | set(samples))
+            },
+        }
+        path.with_suffix(".json").write_text(json.dumps(summary, indent=2))
+
+        top = sorted(per_thread.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        log.info(f"🔬 Profile written: {path.name} — process {process_cpu / seconds * 100:.0f}% CPU, top: "
+                 + ", ".join(f"{n} {c / seconds * 100:.0f}%" for n, c in top))
+
+    def _trace_memory(self, seconds: float, path: Path):
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start(25)
+        try:
+            before = tracemalloc.take_snapshot()
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+
+        stats = after.compare_to(before, "traceback")
+        lines = [f"# tracemalloc growth over {seconds:g}s — current {current / 1e6:.1f}MB, "
+                 f"peak {peak / 1e6:.1f}MB (Python allocations only)"]
+        for stat in stats[:50]:
+            lines.append(f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks), "
+                         f"now {stat.size / 1024:.1f} KiB")
+            lines.extend(f"    {line}" for line in stat.traceback.format(most_recent_first=True)[:12])
+        path.write_text("\n".join(lines) + "\n")
+        log.info(f"🔬 Memory profile written: {path.name} — traced {current / 1e6:.1f}MB")
+
+
+# ─── Live debug view (annotated analyses, MJPEG on the status port) ──
+class DebugView:
+    """What the engine's own detector sees, for live_debug.py or a browser:
+    the last analyzed frame per camera with boxes, top-3 class scores,
+    stage timings and skip rates. Cameras only hand over references, and
+    only while someone watches; drawing and JPEG encoding happen on the
+    viewer's HTTP thread."""
+
+    BOUNDARY = "clearpoint-frame"
+    KEEPALIVE = 2.0      # Re-send the last frame this often (stats, dead-client detection)
+    RATE_WINDOW = 10.0   # Seconds of counters behind the skip rates
+
+    def __init__(self):
+        self.enabled = False
+        self.fps = 5
+        self.width = 1280
+        self.quality = 70
+        self._config = None
+        self._latest: dict[str, dict] = {}
+        self._viewers: dict[str, int] = defaultdict(int)
+        self._rates: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def configure(self, config: "Config"):
+        self.enabled = True
+        self.fps = max(float(config.debug_stream_fps), 0.5)
+        self.width = int(config.debug_stream_width)
+        self.quality = int(config.debug_stream_quality)
+        self._config = config
+
+    @property
+    def names(self) -> dict[str, str]:
+        """Camera id → name, following camera-list reloads."""
+        return {cam["id"]: cam.get("name", cam["id"]) for cam in self._config.cameras}
+
+    def stop(self):
+        self._stopped.set()
+
+    def publish(self, cam_id: str, frame: np.ndarray, detections: list = (),
+                timings: dict | None = None, age: float = 0.0, rejected: str | None = None):
+        """Called from analyze_frame — a no-op unless a viewer is on this camera."""
+        if not self.enabled or not self._viewers.get(cam_id):
+            return
+        entry = {"frame": frame, "detections": list(detections), "timings": timings or {},
+                 "age": age, "rejected": rejected, "at": time.time()}
+        with self._lock:
+            self._latest[cam_id] = entry
+
+    def cameras(self) -> list[dict]:
+        return [{"id": cam_id, "name": name, "viewers": self._viewers.get(cam_id, 0),
+                 **self._skip_rates(cam_id, name)}
+                for cam_id, name in self.names.items()]
+
+    def stream(self, cam_id: str):
+        """multipart/x-mixed-replace JPEG parts: a new part per analysis,
+        capped at debug_stream_fps."""
+        with self._lock:
+            self._viewers[cam_id] += 1
+        try:
+            last, sent_at = None, 0.0
+            while not self._stopped.is_set():
+                entry = self._latest.get(cam_id)
+                if entry is not last or time.time() - sent_at >= self.KEEPALIVE:
+                    jpeg = self.render(cam_id, entry)
+                    yield (f"--{self.BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                           f"Content-Length: {len(jpeg)}\r\n\r\n").encode() + jpeg + b"\r\n"
+                    last, sent_at = entry, time.time()
+                time.sleep(1 / self.fps)
+        finally:
+            with self._lock:
+                self._viewers[cam_id] -= 1
+                if self._viewers[cam_id] <= 0:
+                    self._viewers.pop(cam_id, None)
+                    self._latest.pop(cam_id, None)  # Don't pin the last frame in memory
+
+    def render(self, cam_id: str, entry: dict | None) -> bytes:
+        name = self.names.get(cam_id, cam_id)
+        if entry is None:
+            frame = np.zeros((int(self.width * 9 / 16), self.width, 3), dtype=np.uint8)
+            cv2.putText(frame, f"{name}: waiting for the next analysis...", (20, frame.shape[0] // 2),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 2, cv2.LINE_AA)
+        else:
+            frame = self._annotate(entry)
+        header = [name + "  |  " + self._timing_line(entry)]
+        if entry is not None and entry["timings"]:
+            t = entry["timings"]
+            header.append("  ".join(f"{stage} {t[stage]:.1f}ms" for stage in
+                                    ("preprocess", "lock_wait", "inference", "postprocess") if stage in t))
+        rates = self._skip_rates(cam_id, name)
+        header.append(f"decoded {rates['decoded_fps']:.1f} fps  analyzed {rates['analyzed_fps']:.1f} fps  "
+                      f"skipped {rates['skipped']:.0%}  rejected {rates['rejected']:.0%}")
+        bar = np.zeros((22 * len(header) + 8, frame.shape[1], 3), dtype=np.uint8)
+        for i, line in enumerate(header):
+            cv2.putText(bar, line, (8, 22 * (i + 1)), cv2.FONT_HERSHEY_SIMPLEX, 0.55,
+                        (255, 255, 255), 1, cv2.LINE_AA)
+        ok, jpeg = cv2.imencode(".jpg", np.vstack([bar, frame]),
+                                [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg.tobytes() if ok else b""
+
+    def _annotate(self, entry: dict) -> np.ndarray:
+        frame = entry["frame"]
+        scale = self.width / frame.shape[1] if frame.shape[1] > self.width else 1.0
+        if scale != 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        detections = [{**det, "bbox": [v * scale for v in det["bbox"]]} for det in entry["detections"]]
+        annotated = draw_detections(frame, detections)
+        for det in detections:
+            x1, _, _, y2 = [int(v) for v in det["bbox"]]
+            for i, (cls, score) in enumerate(det.get("top3", [])):
+                cv2.putText(annotated, f"{cls} {score:.2f}", (x1 + 3, y2 + 16 * (i + 1)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+        if entry["rejected"]:
+            cv2.putText(annotated, f"REJECTED: {entry['rejected']}", (20, 40),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2, cv2.LINE_AA)
+        return annotated
+
+    @staticmethod
+    def _timing_line(entry: dict | None) -> str:
+        if entry is None:
+            return "no analysis yet"
+        verdict = f"quality gate: {entry['rejected']}" if entry["rejected"] else f"{len(entry['detections'])} det"
+        return f"{verdict}  |  frame age {entry['age'] * 1000:.0f}ms"
+
+    def _skip_rates(self, cam_id: str, name: str) -> dict:
+        """Decoded vs analyzed frame rate over RATE_WINDOW: skipped = frames
+        never shown to the models, rejected = the quality gate's share."""
+        now = time.time()
+        rejected = sum(v for labels, v in metrics.frames_rejected.snapshot().items() if labels[0] == name)
+        sample = (now, metrics.frames_decoded.snapshot().get((name,), 0),
+                  metrics.frames_analyzed.snapshot().get((name,), 0), rejected)
+        with self._lock:
+            window = self._rates.setdefault(cam_id, deque())
+            window.append(sample)
+            while len(window) > 2 and now - window[1][0] >= self.RATE_WINDOW:
+                window.popleft()
+            first = window[0]
+        seconds = max(now - first[0], 1e-6)
+        decoded, analyzed, rejected = (sample[i] - first[i] for i in (1, 2, 3))
+        looked_at = analyzed + rejected
+        return {"decoded_fps": decoded / seconds if len(window) > 1 else 0.0,
+                "analyzed_fps": analyzed / seconds if len(window) > 1 else 0.0,
+                "skipped": max(1 - looked_at / decoded, 0.0) if decoded else 0.0,
+                "rejected": rejected / looked_at if looked_at else 0.0}
+
+
+debug_view = DebugView()
+
+
+# ─── Load shedding ─────────────────────────────────────────
+class LoadController:
+    """Degrades low-priority cameras first when the box is overloaded and
+    restores them when load drops. Driven by the engine's 5s maintenance
+    tick. Overloaded = average main-model lock wait (inference saturated)
+    or 1-min load average per CPU above the configured thresholds."""
+
+    PRIORITIES = ("high", "normal", "low")
+    # Level → {priority: (analysis interval ×, fire/smoke on)}.
+    # "high" cameras (entrances) keep full cadence at every level. No frame
+    # downscaling: every frame is letterboxed to the fixed model input
+    # anyway, so a smaller frame costs the model just as much.
+    LADDER = (
+        {},
+        {"low": (2, False)},
+        {"low": (5, False), "normal": (1.5, False)},
+        {"low": (8, False), "normal": (3, False)},
+    )
+    FULL_RATE = (1.0, True)
+    ESCALATE_AFTER = 2   # Overloaded ticks in a row before shedding more (~10s)
+    RESTORE_AFTER = 6    # Calm ticks in a row before restoring a level (~30s)
+
+    def __init__(self, config: Config, sender: AlertSender):
+        self.config = config
+        self.sender = sender
+        self.level = 0
+        self._overloaded_ticks = 0
+        self._calm_ticks = 0
+        self._cpus = os.cpu_count() or 1
+        self._last_wait = metrics.lock_wait.totals("main")
+
+    @classmethod
+    def camera_priority(cls, camera: dict) -> str:
+        priority = str(camera.get("priority", "normal")).lower()
+        return priority if priority in cls.PRIORITIES else "normal"
+
+    def sample(self) -> tuple[float, float]:
+        """(average main-model lock wait in ms since the last sample, load per CPU)"""
+        count, total = metrics.lock_wait.totals("main")
+        last_count, last_total = self._last_wait
+        self._last_wait = (count, total)
+        wait_ms = (total - last_total) / (count - last_count) * 1000 if count > last_count else 0.0
+        try:
+            load = os.getloadavg()[0] / self._cpus
+        except OSError:
+            load = 0.0
+        return wait_ms, load
+
+    def update(self, monitors: list, cap: tuple = FULL_RATE):
+        wait_ms, load = self.sample()
+        overloaded = (wait_ms > self.config.shed_lock_wait_ms
+                      or load > self.config.shed_load_per_cpu)
+        calm = (wait_ms < self.config.shed_lock_wait_ms / 4
+                and load < self.config.shed_load_per_cpu * 0.75)
+        self._overloaded_ticks = self._overloaded_ticks + 1 if overloaded else 0
+        self._calm_ticks = self._calm_ticks + 1 if calm else 0
+
+        if self._overloaded_ticks >= self.ESCALATE_AFTER and self.level < len(self.LADDER) - 1:
+            self._overloaded_ticks = 0
+            self._set_level(self.level + 1, wait_ms, load, monitors)
+        elif self._calm_ticks >= self.RESTORE_AFTER and self.level > 0:
+            self._calm_ticks = 0
+            self._set_level(self.level - 1, wait_ms, load, monitors)
+        self.apply(monitors, cap)
+
+    def apply(self, monitors: list, cap: tuple = FULL_RATE):
+        """Push the current level's knobs to every monitor (new ones included)."""
+        self.set_knobs(monitors, self.LADDER[self.level], cap)
+
+    @classmethod
+    def set_knobs(cls, monitors: list, rules: dict, cap: tuple = FULL_RATE):
+        """Per-priority rules, further limited by a box-wide cap (thermal)."""
+        cap_interval, cap_fire = cap
+        for m in monitors:
+            interval, fire = rules.get(cls.camera_priority(m.camera), cls.FULL_RATE)
+            m.interval_multiplier = interval * cap_interval
+            m.fire_enabled = fire and cap_fire
+
+    def _set_level(self, level: int, wait_ms: float, load: float, monitors: list):
+        raising = level > self.level
+        self.level = level
+        metrics.shed_level.set(level)
+        rules = self.LADDER[level]
+        degraded = [m.cam_name for m in monitors if self.camera_priority(m.camera) in rules]
+        if raising:
+            message = (f"Load shedding level {level}: {len(degraded)} cameras degraded "
+                       f"(lock wait {wait_ms:.0f}ms, load {load:.2f}/CPU)")
+        elif level:
+            message = f"Load easing — shedding level {level}, {len(degraded)} cameras still degraded"
+        else:
+            message = "Load normal — all cameras back to full analysis"
+        (log.warning if raising else log.info)(f"⚖️  {message}")
+        self.sender.send_system_log(
+            category="minipc",
+            event="ai_load_shedding",
+            message=message,
+            severity="warning" if raising else "info",
+            metadata={
+                "level": level,
+                "lock_wait_ms": round(wait_ms),
+                "load_per_cpu": round(load, 2),
+                "degraded_cameras": degraded,
+                "rules": {p: {"interval_multiplier": r[0], "fire": r[1]}
+                          for p, r in rules.items()},
+            },
+        )
+
+
+# ─── Thermal throttling ────────────────────────────────────
+class ThermalController:
+    """Backs the whole box off before the CPU thermal-throttles (fanless
+    boxes in summer cabinets) and recovers with hysteresis. Reads thermal
+    zones / hwmon and cpufreq under a configurable sysfs root, on the
+    engine's 5s tick. Its level is a cap applied on top of load shedding."""
+
+    # Level → (analysis interval ×, secondary models on) for every camera.
+    # Fewer analyses is the only lever — the model input size is fixed.
+    LADDER = (
+        (1.0, True),
+        (1.5, False),
+        (3.0, False),
+    )
+    CPU_ZONE_TYPES = ("x86_pkg_temp", "cpu-thermal", "cpu_thermal", "soc_thermal")
+    CPU_HWMON_NAMES = ("coretemp", "k10temp", "zenpower")
+    ESCALATE_AFTER = 2   # Hot ticks in a row before backing off more (~10s)
+    RESTORE_AFTER = 12   # Cool ticks in a row before restoring a level (~60s)
+
+    def __init__(self, config: Config, sender: AlertSender):
+        self.config = config
+        self.sender = sender
+        self.root = Path(config.thermal_sysfs_root)
+        self.level = 0
+        self.temp_c = None
+        self._hot_ticks = 0
+        self._cool_ticks = 0
+        self._sensors = self._find_sensors()
+        self.throttle_c = config.thermal_throttle_c or self._passive_trip() or 100.0
+        self._throttle_count = self._read_throttle_count()
+
+    @property
+    def available(self) -> bool:
+        return bool(self._sensors)
+
+    def _find_sensors(self) -> list[Path]:
+        """CPU temperature inputs (millidegrees C); any thermal zone if none match."""
+        zones = {}
+        for zone in sorted(self.root.glob("class/thermal/thermal_zone*")):
+            try:
+                zones[zone] = (zone / "type").read_text().strip()
+            except OSError:
+                continue
+        cpu = [z / "temp" for z, kind in zones.items() if kind in self.CPU_ZONE_TYPES]
+        for hwmon in sorted(self.root.glob("class/hwmon/hwmon*")):
+            try:
+                if (hwmon / "name").read_text().strip() in self.CPU_HWMON_NAMES:
+                    cpu.extend(sorted(hwmon.glob("temp*_input")))
+            except OSError:
+                continue
+        return cpu or [z / "temp" for z in zones]
+
+    def _passive_trip(self) -> float | None:
+        """Lowest "passive" trip point of the CPU zones — where cooling kicks in."""
+        trips = []
+        for sensor in self._sensors:
+            for trip_type in sensor.parent.glob("trip_point_*_type"):
+                try:
+                    if trip_type.read_text().strip() != "passive":
+                        continue
+                    temp = trip_type.with_name(trip_type.name.replace("_type", "_temp"))
+                    trips.append(int(temp.read_text()) / 1000)
+                except (OSError, ValueError):
+                    continue
+        trips = [t for t in trips if 50 <= t <= 125]
+        return min(trips) if trips else None
+
+    def read_temp(self) -> float | None:
+        temps = []
+        for sensor in self._sensors:
+            try:
+                temps.append(int(sensor.read_text()) / 1000)
+            except (OSError, ValueError):
+                continue
+        temps = [t for t in temps if 0 < t < 150]  # Disconnected sensors read 0 or garbage
+        return max(temps) if temps else None
+
+    def read_freq_ratio(self) -> float | None:
+        """Average current / max frequency across CPUs (1.0 = full speed)."""
+        ratios = []
+        for cpufreq in self.root.glob("devices/system/cpu/cpu[0-9]*/cpufreq"):
+            try:
+                cur = int((cpufreq / "scaling_cur_freq").read_text())
+                top = int((cpufreq / "cpuinfo_max_freq").read_text())
+            except (OSError, ValueError):
+                continue
+            if top > 0:
+                ratios.append(cur / top)
+        return sum(ratios) / len(ratios) if ratios else None
+
+    def _read_throttle_count(self) -> int:
+        """Intel throttle event counters (summed) — they only ever go up."""
+        total = 0
+        for counter in self.root.glob("devices/system/cpu/cpu[0-9]*/thermal_throttle/*_throttle_count"):
+            try:
+                total += int(counter.read_text())
+            except (OSError, ValueError):
+                continue
+        return total
+
+    def thresholds(self) -> tuple[float, float]:
+        """(level 1, level 2) temperatures"""
+        margin = self.config.thermal_margin_c
+        return self.throttle_c - margin, self.throttle_c - margin / 3
+
+    def update(self, monitors: list) -> tuple:
+        """Sample sensors, maybe change level; returns the cap for this tick."""
+        temp = self.read_temp()
+        freq = self.read_freq_ratio()
+        count = self._read_throttle_count()
+        throttled = count > self._throttle_count
+        self._throttle_count = count
+        if temp is None:
+            return self.LADDER[self.level]
+        self.temp_c = temp
+        metrics.cpu_temp.set(round(temp, 1))
+
+        warm, hot = self.thresholds()
+        # A slow clock only counts while warm — idle boxes clock down too
+        slowed = freq is not None and freq < self.config.thermal_freq_ratio and temp >= warm - 5
+        target = 2 if temp >= hot or throttled else 1 if temp >= warm or slowed else 0
+        restore_below = (warm, hot)[self.level - 1] - self.config.thermal_hysteresis_c \
+            if self.level else None
+
+        if target > self.level:
+            self._cool_ticks = 0
+            self._hot_ticks += 1
+            if self._hot_ticks >= self.ESCALATE_AFTER or throttled:
+                self._hot_ticks = 0
+                self._set_level(target, temp, freq, throttled, monitors)
+        elif self.level and temp < restore_below and not slowed:
+            self._hot_ticks = 0
+            self._cool_ticks += 1
+            if self._cool_ticks >= self.RESTORE_AFTER:
+                self._cool_ticks = 0
+                self._set_level(self.level - 1, temp, freq, throttled, monitors)
+        else:
+            self._hot_ticks = self._cool_ticks = 0
+        return self.LADDER[self.level]
+
+    def _set_level(self, level: int, temp: float, freq: float | None, throttled: bool,
+                   monitors: list):
+        raising = level > self.level
+        self.level = level
+        metrics.thermal_level.set(level)
+        interval, secondary = self.LADDER[level]
+        freq_text = f", clock {freq:.0%}" if freq is not None else ""
+        if raising:
+            message = (f"Thermal level {level}: CPU {temp:.0f}°C (throttles ~{self.throttle_c:.0f}°C"
+                       f"{freq_text}{', throttling now' if throttled else ''}) — analysis ×{interval:g}"
+                       f"{', fire/smoke off' if not secondary else ''}")
+        elif level:
+            message = f"Cooling down — thermal level {level}, CPU {temp:.0f}°C{freq_text}"
+        else:
+            message = f"CPU back to {temp:.0f}°C — thermal limits lifted"
+        (log.warning if raising else log.info)(f"🌡️  {message}")
+        self.sender.send_system_log(
+            category="minipc",
+            event="ai_thermal_throttling",
+            message=message,
+            severity="warning" if raising else "info",
+            metadata={
+                "level": level,
+                "cpu_temp_c": round(temp, 1),
+                "throttle_temp_c": self.throttle_c,
+                "freq_ratio": round(freq, 2) if freq is not None else None,
+                "throttle_events": throttled,
+                "interval_multiplier": interval,
+                "secondary_models": secondary,
+                "cameras": len(monitors),
+            },
+        )
+
 
 # ─── Main Engine ───────────────────────────────────────────
 class DetectionEngine:
-    def __init__(self):
-        self.config = Config()
-        self.detector = YOLOv8Detector(self.config)
+    MONITOR_JOIN_TIMEOUT = 5  # Seconds to wait for edited cameras' old monitors on reload
+
+    def __init__(self, config: Config | None = None,
+                 frame_rings: dict[str, SharedFrameRing] | None = None,
+                 ring_updates=None):
+        self.config = config or Config()
+        self.frame_rings = frame_rings or {}  # camera id → ring (process mode)
+        self.ring_updates = ring_updates      # Supervisor's camera-list changes (process mode)
+        # Pin before the models load — their thread pools inherit this thread's cores
+        placement.configure(self.config)
+        placement.apply("inference")
+        self.preprocess_cache = PreprocessCache(self.config.preprocess_cache_entries)
+        self.detector = YOLOv8Detector(self.config, preprocess_cache=self.preprocess_cache)
 
         # Load fire/smoke model (optional — runs if model files exist)
         self.fire_detector = YOLOv8Detector(
@@ -769,31 +4206,212 @@ class DetectionEngine:
             class_map=FIRE_CLASS_MAP,
             class_names=FIRE_CLASSES,
             name="fire/smoke",
+            preprocess_cache=self.preprocess_cache,
         )
+        self.fire_scheduler = None
         if self.fire_detector.model:
-            log.info(f"🔥 Fire/smoke detection enabled (every {self.config.fire_scan_interval} frames)")
+            self.fire_scheduler = SecondaryModelScheduler(
+                self.fire_detector, self.config.fire_inferences_per_minute)
+            log.info(f"🔥 Fire/smoke detection enabled "
+                     f"({self.config.fire_inferences_per_minute}/min across all cameras)")
         else:
             log.info("🔥 Fire/smoke model not found — fire detection disabled")
 
         self.sender = AlertSender(self.config)
-        self.monitors: list[CameraMonitor] = []
+        self.monitors: list[CameraAnalyzer] = []
         self.running = True
+        self.load_controller = (LoadController(self.config, self.sender)
+                                if self.config.load_shedding else None)
+        self.thermal = None
+        if self.config.thermal_control:
+            self.thermal = ThermalController(self.config, self.sender)
+            if not self.thermal.available:
+                log.info(f"🌡️  No temperature sensors under {self.config.thermal_sysfs_root} "
+                         f"— thermal back-off disabled")
+                self.thermal = None
+
+        self.store = None
+        if self.config.detection_history:
+            try:
+                self.store = DetectionStore(self.config)
+            except (OSError, sqlite3.Error) as e:
+                log.warning(f"Detection history disabled — cannot open {self.config.detection_db}: {e}")
+
+        # Event-loop ingestion (frames from shared memory in process mode instead)
+        self.ingest = None
+        if self.config.ingest_mode == "async" and not self.frame_rings:
+            self.ingest = AsyncIngestLoop(self.config.inference_workers)
+
+        self.status_server = None
+        if self.config.metrics_port:
+            self.status_server = LocalStatusServer(self.config.metrics_port)
+            self.status_server.add_route("/metrics", lambda _query: (
+                200, "text/plain; version=0.0.4", metrics.render().encode()))
+            self.status_server.add_route("/latency", lambda _query: (
+                200, "application/json", json.dumps(self.sender.latency.report()).encode()))
+            self.status_server.add_route("/profile", self._profile_route)
+            if self.store:
+                self.status_server.add_route("/detections", self._detections_route)
+                self.status_server.add_route("/detections/rollups",
+                                             lambda q: self._detections_route(q, rollups=True))
+            if self.config.debug_stream:
+                debug_view.configure(self.config)
+                self.status_server.add_route("/debug", lambda _query: (
+                    200, "application/json", json.dumps(debug_view.cameras()).encode()))
+                self.status_server.add_route("/debug/stream", self._debug_stream_route)
+        elif self.config.debug_stream:
+            log.warning("debug_stream needs metrics_port — live debug view disabled")
+
+        self.profiler = Profiler()
 
         signal.signal(signal.SIGINT, self._shutdown)
         signal.signal(signal.SIGTERM, self._shutdown)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._on_profile_signal)
+
+    def _on_profile_signal(self, *_):
+        """kill -USR1 <pid> → stack profile for profile_seconds."""
+        if self.profiler.start(self.config.profile_seconds) is None:
+            log.info("🔬 Profiling already in progress — ignoring SIGUSR1")
+
+    def _debug_stream_route(self, query: dict):
+        """GET /debug/stream?camera=<id|name> → MJPEG of that camera's analyses."""
+        camera_id = resolve_camera_id(self.config.cameras, query.get("camera"))
+        if camera_id not in debug_view.names:
+            return 404, "application/json", json.dumps({"error": "unknown camera"}).encode()
+        return (200, f"multipart/x-mixed-replace; boundary={DebugView.BOUNDARY}",
+                debug_view.stream(camera_id))
+
+    def _detections_route(self, query: dict, rollups: bool = False):
+        """GET /detections?camera=<id|name>&start=&end=&type=&min_confidence=&limit=
+        (times: unix seconds or ISO 8601); /detections/rollups for hourly counts."""
+        try:
+            camera_id = resolve_camera_id(self.config.cameras, query.get("camera"))
+            start, end = parse_time(query.get("start")), parse_time(query.get("end"))
+            if rollups:
+                rows = self.store.rollups(camera_id, start, end)
+            else:
+                rows = self.store.query(camera_id, start, end, query.get("type"),
+                                        float(query.get("min_confidence", 0)),
+                                        int(query.get("limit", 1000)))
+        except ValueError as e:
+            return 400, "application/json", json.dumps({"error": str(e)}).encode()
+        return 200, "application/json", json.dumps(rows, ensure_ascii=False).encode()
+
+    def _profile_route(self, query: dict):
+        """GET /profile?seconds=30&mode=stack|memory"""
+        try:
+            path = self.profiler.start(query.get("seconds", self.config.profile_seconds),
+                                       query.get("mode", "stack"))
+        except ValueError as e:
+            return 400, "application/json", json.dumps({"error": str(e)}).encode()
+        if path is None:
+            return 409, "application/json", json.dumps({"error": "profiling already running"}).encode()
+        return 202, "application/json", json.dumps({"started": True, "output": str(path)}).encode()
 
     def _shutdown(self, *_):
         log.info("🛑 Shutting down detection engine...")
         self.running = False
+        if self.fire_scheduler:
+            self.fire_scheduler.stop()
         for m in self.monitors:
             m.stop()
 
+    def _reload_cameras(self, cameras: list | None = None):
+        """Apply camera-list changes without touching the loaded models:
+        only added, removed or edited cameras get their monitor started or
+        stopped. In process mode the supervisor hands over the new list."""
+        if cameras is None:
+            cameras = self.config.reload_cameras()
+            if cameras is None:
+                return
+        else:
+            self.config.cameras = cameras
+        current = {m.cam_id: m for m in self.monitors}
+        wanted = {cam["id"]: cam for cam in cameras}
+        removed = current.keys() - wanted.keys()
+        added = wanted.keys() - current.keys()
+        changed = {cam_id for cam_id in current.keys() & wanted.keys()
+                   if current[cam_id].camera != wanted[cam_id]}
+        if not (removed or added or changed):
+            return
+
+        for cam_id in removed | changed:
+            m = current[cam_id]
+            m.stop()
+            self.monitors.remove(m)
+            for kind in ("analyzed", "decoded"):
+                metrics.camera_fps.remove(m.cam_name, kind)
+            metrics.camera_armed.remove(m.cam_name)
+            log.info(f"⏹️  Stopped monitor: {m.cam_name}" + (" (updated)" if cam_id in changed else ""))
+        # An edited camera's old stream must be closed before the new one
+        # connects — cheap cameras cap concurrent RTSP sessions
+        deadline = time.time() + self.MONITOR_JOIN_TIMEOUT
+        for cam_id in changed:
+            m = current[cam_id]
+            m.join(timeout=max(0.0, deadline - time.time()))
+            if m.is_alive():
+                log.warning(f"⏹️  {m.cam_name}: old monitor still running — starting the new one anyway")
+        for cam_id in added | changed:
+            monitor = self._new_monitor(wanted[cam_id])
+            self.monitors.append(monitor)
+            monitor.start()
+
+        message = (f"Cameras reloaded: +{len(added)} -{len(removed)} ~{len(changed)}, "
+                   f"{len(self.monitors)} active")
+        log.info(f"🔄 {message}")
+        self.sender.send_system_log(
+            category="minipc",
+            event="ai_config_reloaded",
+            message=message,
+            metadata={"added": sorted(added), "removed": sorted(removed),
+                      "updated": sorted(changed), "total_cameras": len(self.monitors)},
+        )
+
+    def _apply_ring_updates(self):
+        """Process mode: attach the rings of cameras the supervisor added,
+        reload the monitors, then let go of the rings it removed."""
+        while True:
+            try:
+                update = self.ring_updates.get_nowait()
+            except queue.Empty:
+                return
+            for cam_id, name in update["rings"].items():
+                if cam_id not in self.frame_rings:
+                    self.frame_rings[cam_id] = SharedFrameRing(name, *update["max_size"])
+            before = {m.cam_id: m for m in self.monitors}
+            self._reload_cameras(update["cameras"])
+            for cam_id in self.frame_rings.keys() - update["rings"].keys():
+                monitor = before.get(cam_id)
+                if monitor is not None:
+                    monitor.join(timeout=5)
+                    if monitor.is_alive():
+                        continue  # Still reading — the mapping goes at exit
+                self.frame_rings.pop(cam_id).close()
+
+    def _new_monitor(self, camera: dict) -> CameraAnalyzer:
+        if self.ingest is not None:
+            return AsyncCameraMonitor(camera, self.config, self.detector, self.sender,
+                                      self.ingest, fire_scheduler=self.fire_scheduler,
+                                      store=self.store)
+        return CameraMonitor(camera, self.config, self.detector, self.sender,
+                             fire_scheduler=self.fire_scheduler,
+                             frame_ring=self.frame_rings.get(camera["id"]),
+                             store=self.store)
+
     def _send_hourly_report(self):
         """Send ONE summary log to admin dashboard covering all cameras."""
         total_frames = 0
         total_detections = 0
         cam_details = []
         active_cameras = 0
+        latency = self.sender.latency.report()
+        by_type = {}
+        if self.store:
+            try:
+                by_type = self.store.counts(time.time() - 3600)
+            except sqlite3.Error as e:
+                log.debug(f"Detection store query failed: {e}")
 
         for m in self.monitors:
             frames, detections = m.get_and_reset_stats()
@@ -807,7 +4425,21 @@ class DetectionEngine:
                 "frames": frames,
                 "detections": detections,
                 "active": is_alive,
+                "armed": m.armed,
+                "priority": LoadController.camera_priority(m.camera),
+                "quality": m.quality.state if m.quality else None,
+                "rejected_frames": m.quality.take_rejected() if m.quality else {},
+                "alert_latency_ms": latency.get(m.cam_id),
+                "detections_by_type": by_type.get(m.cam_id, {}),
             })
+            if m.cam_id in latency:
+                lat = latency[m.cam_id]
+                log.info(f"⏱️  {m.cam_name}: glass-to-alert p50 {lat['p50_ms']}ms, "
+                         f"p95 {lat['p95_ms']}ms, p99 {lat['p99_ms']}ms ({lat['count']} alerts)")
+
+        log_dropped = log_pipeline.take_dropped()
+        if log_dropped:
+            log.warning(f"📝 {log_dropped} log lines dropped in the last hour (log queue full)")
 
         num_cameras = len(self.monitors)
         message = (
@@ -830,6 +4462,10 @@ class DetectionEngine:
                 "total_detections": total_detections,
                 "active_cameras": active_cameras,
                 "total_cameras": num_cameras,
+                "shed_level": self.load_controller.level if self.load_controller else 0,
+                "thermal_level": self.thermal.level if self.thermal else 0,
+                "cpu_temp_c": self.thermal.temp_c if self.thermal else None,
+                "log_records_dropped": log_dropped,
                 "cameras": cam_details,
             },
         )
@@ -847,17 +4483,39 @@ class DetectionEngine:
         log.info("=" * 50)
         log.info("🚀 Clearpoint AI Detection Engine")
         log.info(f"   Cameras: {len(self.config.cameras)}")
-        log.info(f"   Analysis FPS: {self.config.analysis_fps}")
+        log.info(f"   Analysis: 1 frame / {self.config.analysis_interval:g}s per camera")
         log.info(f"   Cooldown: {self.config.cooldown_seconds}s")
         log.info(f"   Mode: continuous YOLO (every frame)")
-        log.info(f"   Model: {'OpenVINO' if self.detector.use_openvino else 'ONNX Runtime'}")
+        if self.frame_rings:
+            log.info(f"   Frames: shared memory from grabber worker processes")
+        elif self.ingest:
+            log.info(f"   Ingest: async ffmpeg pipes @ {self.config.ingest_fps} fps, "
+                     f"{self.config.inference_workers} inference threads")
+        log.info(f"   Model: {self.detector.model.label}")
+        log.info(f"   CPUs: {placement.describe()}")
+        if self.load_controller:
+            high = sum(LoadController.camera_priority(c) == "high" for c in self.config.cameras)
+            log.info(f"   Load shedding: on ({high} high-priority cameras never shed)")
+        if self.thermal:
+            warm, hot = self.thermal.thresholds()
+            log.info(f"   Thermal back-off: {warm:.0f}°C / {hot:.0f}°C "
+                     f"(throttles ~{self.thermal.throttle_c:.0f}°C)")
+        scheduled = sum(bool(c.get("arming_schedule")) for c in self.config.cameras)
+        if scheduled:
+            log.info(f"   Arming schedules: {scheduled} cameras ({self.config.arming_timezone}, "
+                     f"armed {self.config.arming_lead_seconds:g}s early)")
         log.info("=" * 50)
 
-        # Start a monitor thread per camera
-        fire_det = self.fire_detector if self.fire_detector.model else None
+        if self.fire_scheduler:
+            self.fire_scheduler.start()
+        if self.status_server:
+            self.status_server.start()
+        if self.ingest:
+            self.ingest.start()
+
+        # Start a monitor per camera
         for cam in self.config.cameras:
-            monitor = CameraMonitor(cam, self.config, self.detector, self.sender,
-                                    fire_detector=fire_det)
+            monitor = self._new_monitor(cam)
             self.monitors.append(monitor)
             monitor.start()
 
@@ -865,6 +4523,10 @@ class DetectionEngine:
         cleanup_interval = 3600  # Cleanup snapshots every hour
         last_cleanup = time.time()
         last_hourly_report = time.time()
+        last_latency_report = time.time()
+        latency_report_path = LOG_DIR / "alert-latency.json"
+        # Hot reload of the camera list (the supervisor handles it in process mode)
+        camera_signature = self.config.camera_sources_signature()
 
         try:
             while self.running:
@@ -874,19 +4536,45 @@ class DetectionEngine:
                 for m in self.monitors:
                     if not m.is_alive() and self.running:
                         log.warning(f"Restarting dead monitor: {m.cam_name}")
-                        new_m = CameraMonitor(m.camera, self.config,
-                                              self.detector, self.sender,
-                                              fire_detector=fire_det)
+                        new_m = self._new_monitor(m.camera)
                         self.monitors.remove(m)
                         self.monitors.append(new_m)
                         new_m.start()
 
+                # Camera list changed on disk → start/stop only the affected monitors
+                # (in process mode the supervisor watches the file and tells us)
+                if self.ring_updates is not None:
+                    self._apply_ring_updates()
+                elif not self.frame_rings:
+                    signature = self.config.camera_sources_signature()
+                    if signature != camera_signature:
+                        # A half-written file is retried when its next write lands
+                        camera_signature = signature
+                        self._reload_cameras()
+
+                # Thermal cap for every camera, then shed / restore
+                # low-priority cameras under load within it
+                cap = self.thermal.update(self.monitors) if self.thermal else LoadController.FULL_RATE
+                if self.load_controller:
+                    self.load_controller.update(self.monitors, cap)
+                elif self.thermal:
+                    LoadController.set_knobs(self.monitors, {}, cap)
+
                 # Hourly summary report to admin dashboard (1 log per hour)
                 now = time.time()
                 if now - last_hourly_report >= 3600:
                     self._send_hourly_report()
                     last_hourly_report = now
 
+                # Rolling glass-to-alert report (local file, every 5 minutes)
+                if now - last_latency_report >= 300:
+                    names = {m.cam_id: m.cam_name for m in self.monitors}
+                    try:
+                        self.sender.latency.write_report(latency_report_path, names)
+                    except OSError as e:
+                        log.debug(f"Failed to write latency report: {e}")
+                    last_latency_report = now
+
                 # Periodic snapshot cleanup
                 if time.time() - last_cleanup > cleanup_interval:
                     self.sender.cleanup_snapshots()
@@ -897,11 +4585,724 @@ class DetectionEngine:
         # Wait for threads
         for m in self.monitors:
             m.join(timeout=5)
+        if self.ingest:
+            self.ingest.stop()
+        self.sender.stop()
+        if self.store:
+            self.store.stop()
+        debug_view.stop()
+        if self.status_server:
+            self.status_server.stop()
+
+        log.info("✅ Detection engine stopped")
+
+
+# ─── Process mode (supervisor + worker processes) ──────────
+def _exit_with_parent(on_exit):
+    """Run on_exit() if the supervisor goes away without stopping us."""
+    parent = os.getppid()
+
+    def watch():
+        while os.getppid() == parent:
+            time.sleep(1)
+        log.warning("Supervisor gone — stopping worker")
+        on_exit()
+
+    threading.Thread(target=watch, daemon=True, name="parent-watch").start()
+
+
+def _worker_main(log_queue, target, args: tuple):
+    """Spawned worker entry: log through the supervisor, then run target."""
+    log_pipeline.forward_to(log_queue)
+    target(*args)
+
+
+def _grabber_process(cameras: list, ring_names: dict, max_size: tuple,
+                     cpu_layout: dict | None = None, arming: tuple = (120, "Asia/Jerusalem"),
+                     control=None):
+    """Grabber worker: decodes a group of cameras into their frame rings
+    (only while each camera's arming schedule has it armed). The supervisor
+    sends {"cameras", "rings"} on control when the group changes; only the
+    added, removed or edited cameras' streams are touched."""
+    placement.load(cpu_layout)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    _exit_with_parent(stop.set)
+
+    def open_slot(cam: dict, ring_name: str) -> list:
+        # [camera, name, ring, schedule, grabber or None while disarmed]
+        return [cam, cam.get("name", cam["id"][:8]), SharedFrameRing(ring_name, *max_size),
+                ArmingSchedule.for_camera(cam, *arming), None]
+
+    def close_slot(slot: list):
+        _, _, ring, _, g = slot
+        if g is not None:
+            g.stop()
+            ring.mark(False, g.frames_decoded, g.read_failures)
+        ring.close()
+
+    slots = [open_slot(cam, ring_names[cam["id"]]) for cam in cameras]
+    cpus = f" (CPUs {format_cpu_list(placement.cpus['decode'])})" if placement.cpus else ""
+    log.info(f"📹 Grabber worker {os.getpid()}: {', '.join(s[1] for s in slots)}{cpus}")
+
+    while not stop.is_set():
+        while control is not None:
+            try:
+                update = control.get_nowait()
+            except queue.Empty:
+                break
+            wanted = {cam["id"]: cam for cam in update["cameras"]}
+            kept = []
+            for slot in slots:
+                if wanted.get(slot[0]["id"]) == slot[0]:
+                    kept.append(slot)
+                else:
+                    close_slot(slot)  # Removed, or edited (reopened below)
+            kept_ids = {slot[0]["id"] for slot in kept}
+            slots = kept + [open_slot(cam, update["rings"][cam["id"]])
+                            for cam in update["cameras"] if cam["id"] not in kept_ids]
+            log.info(f"📹 Grabber worker {os.getpid()} now: {', '.join(s[1] for s in slots)}")
+
+        for slot in slots:
+            cam, name, ring, schedule, g = slot
+            armed = schedule is None or schedule.armed()
+            if armed and g is None:
+                g = slot[4] = RingWriterGrabber(cam["rtsp_url"], name, ring)
+            elif not armed and g is not None:
+                g.stop()
+                ring.mark(False, g.frames_decoded, g.read_failures)
+                g = slot[4] = None
+            if g is not None:
+                ring.mark(g.connected, g.frames_decoded, g.read_failures)
+        stop.wait(0.5)
+
+    for slot in slots:
+        close_slot(slot)
+
+
+def _inference_process(ring_names: dict, max_size: tuple, control=None):
+    """Inference worker: owns the models and runs the normal engine on
+    frames read from the rings. Camera-list changes arrive on control."""
+    rings = {cam_id: SharedFrameRing(name, *max_size) for cam_id, name in ring_names.items()}
+    engine = DetectionEngine(frame_rings=rings, ring_updates=control)
+    _exit_with_parent(engine._shutdown)
+    engine.start()
 
+
+class EngineSupervisor:
+    """Process mode: grabber workers (cameras_per_worker cameras each) decode
+    RTSP into shared-memory rings, and one inference process owns the models
+    and reads them. Each worker is restarted on its own when it dies; the
+    rings outlive restarts, so a crashed grabber does not take down inference
+    and vice versa."""
+
+    MIN_RESTART_DELAY = 2
+    MAX_RESTART_DELAY = 60
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.ctx = multiprocessing.get_context("spawn")
+        # Workers log into this queue; the supervisor's listener writes it out
+        self._log_queue = self.ctx.Queue(LOG_QUEUE_SIZE)
+        log_pipeline.listen(self._log_queue)
+        placement.configure(config)  # The inference process configures its own
+        self.sender = AlertSender(config)
+        self.rings: dict[str, SharedFrameRing] = {}
+        self.max_size = (config.shared_frame_max_width, config.shared_frame_max_height)
+        self.workers: dict[str, dict] = {}
+        self._ring_ids = itertools.count()
+        self._grabber_ids = itertools.count(1)
+        self.running = True
+        signal.signal(signal.SIGINT, self._shutdown)
+        signal.signal(signal.SIGTERM, self._shutdown)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._forward_profile_signal)
+
+    def _shutdown(self, *_):
+        log.info("🛑 Shutting down detection engine (process mode)...")
+        self.running = False
+
+    def _forward_profile_signal(self, *_):
+        proc = self.workers.get("inference", {}).get("process")
+        if proc is not None and proc.is_alive():
+            os.kill(proc.pid, signal.SIGUSR1)
+
+    def _add_worker(self, name: str, target, args: tuple, cameras: list | None = None):
+        # args are updated in place on reloads, so a restart gets the current
+        # cameras; control carries the same change to the running process
+        self.workers[name] = {"target": target, "args": args, "process": None,
+                              "started_at": 0.0, "delay": self.MIN_RESTART_DELAY,
+                              "next_start": 0.0, "cameras": cameras,
+                              "control": self.ctx.Queue()}
+        self._spawn(name)
+
+    def _spawn(self, name: str):
+        worker = self.workers[name]
+        proc = self.ctx.Process(target=_worker_main,
+                                args=(self._log_queue, worker["target"],
+                                      worker["args"] + (worker["control"],)),
+                                name=f"clearpoint-{name}", daemon=False)
+        proc.start()
+        worker["process"] = proc
+        worker["started_at"] = time.time()
+
+    def _check_workers(self):
+        now = time.time()
+        for name, worker in self.workers.items():
+            proc = worker["process"]
+            if proc is not None:
+                if proc.is_alive():
+                    continue
+                # Died — schedule a restart, backing off if it keeps crashing
+                uptime = now - worker["started_at"]
+                if uptime > 300:
+                    worker["delay"] = self.MIN_RESTART_DELAY
+                log.warning(f"Worker {name} exited (code {proc.exitcode}) after {uptime:.0f}s — "
+                            f"restarting in {worker['delay']}s")
+                self.sender.send_system_log(
+                    category="minipc",
+                    event="ai_worker_restart",
+                    message=f"תהליך AI {name} נעצר (קוד {proc.exitcode}) ומופעל מחדש",
+                    severity="warning",
+                    metadata={"worker": name, "exit_code": proc.exitcode,
+                              "uptime_seconds": round(uptime)},
+                )
+                proc.close()
+                worker["process"] = None
+                worker["next_start"] = now + worker["delay"]
+                worker["delay"] = min(worker["delay"] * 2, self.MAX_RESTART_DELAY)
+            elif now >= worker["next_start"]:
+                log.info(f"🔁 Restarting worker {name}")
+                self._spawn(name)
+
+    def _new_ring(self, cam_id: str):
+        name = f"clearpoint-{os.getpid()}-{next(self._ring_ids)}"
+        self.rings[cam_id] = SharedFrameRing(name, *self.max_size, create=True)
+
+    def _ring_names(self, cameras: list | None = None) -> dict:
+        ids = self.rings.keys() if cameras is None else [cam["id"] for cam in cameras]
+        return {cam_id: self.rings[cam_id].name for cam_id in ids}
+
+    def _grabber_args(self, group: list) -> tuple:
+        return (group, self._ring_names(group), self.max_size, placement.layout(),
+                (self.config.arming_lead_seconds, self.config.arming_timezone))
+
+    def _add_grabber(self, group: list):
+        self._add_worker(f"grabbers-{next(self._grabber_ids)}", _grabber_process,
+                         self._grabber_args(group), cameras=group)
+
+    def _stop_worker(self, name: str):
+        proc = self.workers.pop(name)["process"]
+        if proc is not None:
+            proc.terminate()
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+
+    def _launch(self):
+        """Create the rings and start every worker for config.cameras."""
+        cameras = self.config.cameras
+        for cam in cameras:
+            self._new_ring(cam["id"])
+
+        per_worker = max(1, self.config.cameras_per_worker)
+        groups = [cameras[i:i + per_worker] for i in range(0, len(cameras), per_worker)]
+        ring_mb = sum(r.shm.size for r in self.rings.values()) / 1e6
+        log.info(f"🧩 Process mode: {len(groups)} grabber workers + 1 inference process, "
+                 f"{ring_mb:.0f}MB shared frame memory")
+
+        self._add_worker("inference", _inference_process, (self._ring_names(), self.max_size))
+        for group in groups:
+            self._add_grabber(group)
+
+    def _reload(self, cameras: list):
+        """Apply a camera-list change in place. Grabber workers keep their
+        cameras; only those holding added, removed or edited ones are told
+        (new cameras fill free places first, then new workers), and the
+        inference process keeps its models and swaps only those monitors."""
+        wanted = {cam["id"]: cam for cam in cameras}
+        added = [cam for cam in cameras if cam["id"] not in self.rings]
+        removed = self.rings.keys() - wanted.keys()
+        for cam in added:
+            self._new_ring(cam["id"])
+
+        per_worker = max(1, self.config.cameras_per_worker)
+        touched = 0
+        for name, worker in list(self.workers.items()):
+            if worker["cameras"] is None:
+                continue  # Inference
+            group = [wanted[cam["id"]] for cam in worker["cameras"] if cam["id"] in wanted]
+            while added and len(group) < per_worker:
+                group.append(added.pop(0))
+            if group == worker["cameras"]:
+                continue
+            touched += 1
+            if not group:
+                self._stop_worker(name)
+                log.info(f"⏹️  Stopped grabber worker {name} (no cameras left)")
+                continue
+            worker["cameras"] = group
+            worker["args"] = self._grabber_args(group)
+            worker["control"].put({"cameras": group, "rings": self._ring_names(group)})
+        for i in range(0, len(added), per_worker):
+            self._add_grabber(added[i:i + per_worker])
+            touched += 1
+
+        inference = self.workers["inference"]
+        inference["args"] = (self._ring_names(), self.max_size)
+        inference["control"].put({"cameras": cameras, "rings": self._ring_names(),
+                                  "max_size": self.max_size})
+        # Workers still mapping a removed ring keep it until they let go
+        for cam_id in removed:
+            ring = self.rings.pop(cam_id)
+            ring.close()
+            ring.unlink()
+        log.info(f"🔄 Camera list changed — {touched} grabber workers updated in place, "
+                 f"models and other streams untouched")
+
+    def _teardown(self):
+        """Stop every worker, then release the rings."""
+        for worker in self.workers.values():
+            if worker["process"] is not None and worker["process"].is_alive():
+                worker["process"].terminate()
+        for worker in self.workers.values():
+            proc = worker["process"]
+            if proc is not None:
+                proc.join(timeout=10)
+                if proc.is_alive():
+                    proc.kill()
+                    proc.join()
+        for ring in self.rings.values():
+            ring.close()
+            ring.unlink()
+        self.workers = {}
+        self.rings = {}
+
+    def start(self):
+        if not self.config.cameras:
+            log.error("No cameras configured. Run setup-ai.sh or create ai-config.json")
+            sys.exit(1)
+
+        camera_signature = self.config.camera_sources_signature()
+        try:
+            self._launch()
+            while self.running:
+                time.sleep(2)
+                if not self.running:
+                    break
+                self._check_workers()
+
+                # Camera list changed on disk → only the affected grabbers and
+                # monitors change; an empty list is ignored (keep watching)
+                signature = self.config.camera_sources_signature()
+                if signature != camera_signature:
+                    camera_signature = signature
+                    old = self.config.cameras
+                    cameras = self.config.reload_cameras()
+                    if not cameras:
+                        self.config.cameras = old
+                        continue
+                    if cameras != old:
+                        self._reload(cameras)
+        finally:
+            self._teardown()
+            self.sender.stop()
         log.info("✅ Detection engine stopped")
 
 
+# ─── Offline Segment Analysis (re-scan / backfill) ─────────
+# Recorder segment names: installer "%Y-%m-%d_%H-%M-%S.mp4",
+# USB installer "<camera_id>_%Y%m%d_%H%M%S.mp4"
+SEGMENT_NAME_PATTERNS = (
+    (re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})"), "%Y-%m-%d_%H-%M-%S"),
+    (re.compile(r"(\d{8}_\d{6})"), "%Y%m%d_%H%M%S"),
+)
+
+
+def parse_segment_start(path: Path) -> datetime | None:
+    """Segment start time from its file name (local time, recorder strftime)."""
+    for pattern, fmt in SEGMENT_NAME_PATTERNS:
+        match = pattern.search(path.stem)
+        if match:
+            try:
+                return datetime.strptime(match.group(1), fmt).astimezone()
+            except ValueError:
+                continue
+    return None
+
+
+def segment_camera_id(path: Path) -> str:
+    """Camera ID from .../footage/<camera_id>/<segment>.mp4 or <camera_id>_<ts>.mp4"""
+    if path.parent.parent.name == "footage":
+        return path.parent.name
+    for pattern, _ in SEGMENT_NAME_PATTERNS:
+        match = pattern.search(path.stem)
+        if match and match.start() > 1:
+            return path.stem[:match.start()].rstrip("_-")
+    return path.parent.name
+
+
+def _decode_segment_chunk(task: tuple) -> tuple:
+    """Process-pool worker: decode one time window of a segment, sample it
+    and letterbox the frames. Returns (task, [(offset_s, padded, ratio, shape)]).
+    Only letterboxed uint8 frames cross the process boundary."""
+    path, start_s, end_s, sample_fps, input_h, input_w = task
+    cv2.setNumThreads(1)  # Parallelism comes from the pool
+    frames = []
+    cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+    try:
+        if not cap.isOpened():
+            return task, frames
+        if start_s > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start_s * 1000)
+        step = 1.0 / sample_fps
+        next_sample = start_s
+        while True:
+            if not cap.grab():
+                break
+            pos_s = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if pos_s >= end_s:
+                break
+            if pos_s + 1e-3 < next_sample:
+                continue  # grab() without retrieve() skips the color conversion
+            ok, frame = cap.retrieve()
+            if not ok:
+                continue
+            padded, ratio = YOLOv8Detector._letterbox(frame, input_h, input_w)
+            frames.append((round(pos_s, 3), padded, ratio, frame.shape))
+            next_sample = pos_s + step
+    finally:
+        cap.release()
+    return task, frames
+
+
+def _segment_duration(path: Path) -> float:
+    cap = cv2.VideoCapture(str(path), cv2.CAP_FFMPEG)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        count = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+        return count / fps if fps > 0 else 0.0
+    finally:
+        cap.release()
+
+
+class SegmentAnalyzer:
+    """Analyzes recorded segments as fast as the hardware allows.
+    Decoding is spread over a process pool; frames are batched into the
+    detectors. Detections are written as JSONL — no alerts are sent."""
+
+    def __init__(self, config: Config, workers: int, sample_fps: float,
+                 batch_size: int, chunk_seconds: float = 60, use_fire: bool = True):
+        self.config = config
+        self.workers = max(1, workers)
+        self.sample_fps = sample_fps
+        self.chunk_seconds = chunk_seconds
+        self.detector = YOLOv8Detector(config, batch_size=batch_size)
+        self.fire_detector = None
+        if use_fire:
+            fire = YOLOv8Detector(
+                config,
+                ir_path=str(config.fire_model_ir_path),
+                onnx_path=str(config.fire_model_onnx_path),
+                class_map=FIRE_CLASS_MAP,
+                class_names=FIRE_CLASSES,
+                name="fire/smoke",
+                batch_size=batch_size,
+            )
+            self.fire_detector = fire if fire.model else None
+        self.batch_size = batch_size
+
+    def _plan(self, segments: list[Path]) -> list[tuple]:
+        input_h, input_w = self.config.model_input_size
+        tasks = []
+        for path in segments:
+            duration = _segment_duration(path)
+            if duration <= 0:
+                # Unknown length — decode to EOF in one chunk
+                tasks.append((str(path), 0.0, float("inf"), self.sample_fps, input_h, input_w))
+                continue
+            start = 0.0
+            while start < duration:
+                end = min(start + self.chunk_seconds, duration)
+                tasks.append((str(path), start, end, self.sample_fps, input_h, input_w))
+                start = end
+        return tasks
+
+    def run(self, segments: list[Path], output: Path) -> dict:
+        from concurrent.futures import ProcessPoolExecutor
+
+        if self.detector.model is None:
+            log.error("YOLOv8 model not loaded. Run setup-ai.sh to download.")
+            sys.exit(1)
+
+        tasks = self._plan(segments)
+        log.info(f"🎞️  Analyzing {len(segments)} segments ({len(tasks)} chunks) "
+                 f"with {self.workers} decoders, batch {self.batch_size}, "
+                 f"{self.sample_fps} fps sampling")
+
+        totals = {"segments": len(segments), "frames": 0, "detections": 0}
+        started = time.time()
+        pending: deque = deque()
+        max_in_flight = self.workers * 2  # Bounds decoded frames held in memory
+        ctx = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx) as pool, \
+                open(output, "a", encoding="utf-8") as out:
+            task_iter = iter(tasks)
+            for task in itertools.islice(task_iter, max_in_flight):
+                pending.append(pool.submit(_decode_segment_chunk, task))
+
+            # Results are consumed in submission order → JSONL stays chronological
+            while pending:
+                task, frames = pending.popleft().result()
+                next_task = next(task_iter, None)
+                if next_task is not None:
+                    pending.append(pool.submit(_decode_segment_chunk, next_task))
+                self._analyze_chunk(Path(task[0]), frames, out, totals)
+
+        elapsed = time.time() - started
+        totals["elapsed_s"] = round(elapsed, 1)
+        totals["fps"] = round(totals["frames"] / elapsed, 2) if elapsed else 0.0
+        return totals
+
+    def _analyze_chunk(self, path: Path, frames: list, out, totals: dict):
+        if not frames:
+            return
+        camera_id = segment_camera_id(path)
+        segment_start = parse_segment_start(path)
+        if segment_start is None:
+            mtime = datetime.fromtimestamp(path.stat().st_mtime).astimezone()
+            segment_start = mtime  # Best effort: unnamed segments
+        offsets = [f[0] for f in frames]
+        padded = [f[1] for f in frames]
+        ratios = [f[2] for f in frames]
+        shapes = [f[3] for f in frames]
+
+        results = self.detector.detect_batch(padded, ratios, shapes)
+        if self.fire_detector:
+            fire_results = self.fire_detector.detect_batch(padded, ratios, shapes)
+            results = [a + b for a, b in zip(results, fire_results)]
+
+        totals["frames"] += len(frames)
+        for offset, detections in zip(offsets, results):
+            for det in detections:
+                totals["detections"] += 1
+                out.write(json.dumps({
+                    "camera_id": camera_id,
+                    "segment": str(path),
+                    "segment_offset_s": offset,
+                    "timestamp": (segment_start + timedelta(seconds=offset)).isoformat(),
+                    "detection_type": det["detection_type"],
+                    "class_name": det["class_name"],
+                    "confidence": round(det["confidence"], 4),
+                    "bbox": det["bbox"],
+                }, ensure_ascii=False) + "\n")
+
+
+def run_offline_analysis(args):
+    root = Path(args.analyze).expanduser()
+    segments = sorted(root.rglob("*.mp4")) if root.is_dir() else [root]
+    segments = [p for p in segments if p.exists()]
+    if not segments:
+        log.error(f"No segments found in {root}")
+        sys.exit(1)
+
+    output = Path(args.output).expanduser() if args.output else \
+        LOG_DIR / f"analysis-{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    config = Config(require_token=False)
+    analyzer = SegmentAnalyzer(
+        config,
+        workers=args.workers or max(1, (os.cpu_count() or 2) - 1),
+        sample_fps=args.sample_fps,
+        batch_size=args.batch_size or 8,
+        use_fire=not args.no_fire,
+    )
+    totals = analyzer.run(segments, output)
+    log.info(f"✅ Analysis done: {totals['frames']} frames, {totals['detections']} detections "
+             f"in {totals['elapsed_s']}s ({totals['fps']} fps) → {output}")
+
+
+def print_detection_history(args):
+    """`detect.py --history --camera 3 --since 2026-10-19T02:00 --until 2026-10-19T03:00`"""
+    config = Config(require_token=False)
+    if not Path(config.detection_db).exists():
+        log.error(f"No detection history at {config.detection_db}")
+        sys.exit(1)
+    store = DetectionStore(config, readonly=True)
+    camera_id = resolve_camera_id(config.cameras, args.camera)
+    start, end = parse_time(args.since), parse_time(args.until)
+    if args.rollups:
+        rows = store.rollups(camera_id, start, end)
+    else:
+        rows = store.query(camera_id, start, end, args.type, limit=args.limit)
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+
+
+# ─── Inference server (lends this box's models to peers) ───
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class InferenceServer:
+    """`detect.py --serve-inference`: runs the local models for peers using the
+    "remote" backend. POST /infer?model=<name>&min_score=<s> takes an np.save'd
+    uint8 (N, H, W, 3) letterboxed batch and returns encode_sparse_output()."""
+
+    MAX_FRAMES = 64
+
+    def __init__(self, config: Config, host: str, port: int, batch_size: int = 1):
+        self.config = config
+        # Never chain to another peer from here
+        backend = "auto" if config.inference_backend == "remote" else config.inference_backend
+        placement.configure(config)
+        placement.apply("inference")
+        self.detectors = {}
+        main = YOLOv8Detector(config, backend=backend, batch_size=batch_size)
+        if main.model:
+            self.detectors[main.name] = main
+        fire = YOLOv8Detector(
+            config,
+            ir_path=str(config.fire_model_ir_path),
+            onnx_path=str(config.fire_model_onnx_path),
+            class_map=FIRE_CLASS_MAP,
+            class_names=FIRE_CLASSES,
+            name="fire/smoke",
+            backend=backend,
+            batch_size=batch_size,
+        )
+        if fire.model:
+            self.detectors[fire.name] = fire
+        self.server = LocalStatusServer(port, host)
+        self.server.add_route("/infer", self._infer, method="POST")
+        self.server.add_route("/health", self._health)
+        self.server.add_route("/metrics", lambda _q: (
+            200, "text/plain; version=0.0.4", metrics.render().encode()))
+        self._stop = threading.Event()
+
+    def start(self):
+        """Listen (non-blocking). Without inference_token only a loopback
+        address is allowed — anyone who can reach the port could use it."""
+        if not self.detectors:
+            log.error("No model loaded. Run setup-ai.sh to download.")
+            sys.exit(1)
+        if not self.config.inference_token and not _is_loopback(self.server.host):
+            log.error(f"Refusing to serve inference on {self.server.host} without inference_token "
+                      f"— set it on both peers, or listen on 127.0.0.1")
+            sys.exit(1)
+        self.server.start()
+        if self.server._server is None:
+            sys.exit(1)
+        log.info(f"🌐 Serving inference on {self.server.host}:{self.server.port} "
+                 f"({', '.join(f'{n}: {d.model.label}' for n, d in self.detectors.items())}, "
+                 f"CPUs: {placement.describe()})")
+
+    def run(self):
+        """start(), then serve until SIGINT/SIGTERM."""
+        self.start()
+        signal.signal(signal.SIGINT, lambda *_: self._stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        self._stop.wait()
+        self.stop()
+
+    def stop(self):
+        self._stop.set()
+        self.server.stop()
+        log.info("Inference server stopped")
+
+    def _health(self, _query):
+        body = json.dumps({"models": sorted(self.detectors)}).encode()
+        return 200, "application/json", body
+
+    def _infer(self, query, body, headers):
+        token = self.config.inference_token
+        if token and headers.get("X-Clearpoint-Inference-Token") != token:
+            return 403, "text/plain", b"bad token\n"
+        detector = self.detectors.get(query.get("model", "main"))
+        if detector is None:
+            return 404, "text/plain", b"unknown model\n"
+        try:
+            frames = np.load(BytesIO(body), allow_pickle=False)
+            min_score = float(query.get("min_score", self.config.default_confidence))
+        except ValueError as e:
+            return 400, "text/plain", f"{e}\n".encode()
+        input_h, input_w = self.config.model_input_size
+        if (frames.dtype != np.uint8 or frames.shape[1:] != (input_h, input_w, 3)
+                or not 0 < len(frames) <= self.MAX_FRAMES):
+            return 400, "text/plain", f"expected uint8 (N, {input_h}, {input_w}, 3)\n".encode()
+
+        t0 = time.perf_counter()
+        chunks = []
+        step = detector.batch_size
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            blob = detector._to_blob(chunk)
+            if step > 1 and len(chunk) < step:
+                pad = np.zeros((step - len(chunk), *blob.shape[1:]), dtype=blob.dtype)
+                blob = np.concatenate([blob, pad])
+            with detector._lock:
+                chunks.append(sparse_rows(detector._infer(blob)[:len(chunk)], min_score))
+        metrics.inference.observe(time.perf_counter() - t0, detector.name)
+        return 200, "application/octet-stream", pack_sparse_output(chunks)
+
+
 # ─── Entry Point ───────────────────────────────────────────
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Clearpoint AI Detection Engine")
+    parser.add_argument("--analyze", metavar="PATH",
+                        help="Analyze recorded segments (file or directory) offline, then exit")
+    parser.add_argument("--output", help="JSONL output for --analyze "
+                                         "(default: ~/clearpoint-logs/analysis-<ts>.jsonl)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Decoder processes for --analyze (default: CPUs - 1)")
+    parser.add_argument("--sample-fps", type=float, default=2.0,
+                        help="Frames per second of video to analyze (--analyze)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Frames per inference call (default: 8 for --analyze, "
+                             "1 for --serve-inference)")
+    parser.add_argument("--no-fire", action="store_true",
+                        help="Skip the fire/smoke model (--analyze)")
+    parser.add_argument("--history", action="store_true",
+                        help="Print stored detections as JSON lines, then exit")
+    parser.add_argument("--camera", help="Camera id, id prefix or name (--history)")
+    parser.add_argument("--since", help="Start time, ISO 8601 or unix seconds (--history)")
+    parser.add_argument("--until", help="End time, ISO 8601 or unix seconds (--history)")
+    parser.add_argument("--type", help="Detection type, e.g. person (--history)")
+    parser.add_argument("--limit", type=int, default=1000, help="Max rows (--history)")
+    parser.add_argument("--rollups", action="store_true",
+                        help="Hourly counts instead of single detections (--history)")
+    parser.add_argument("--serve-inference", action="store_true",
+                        help="Run only the models, for peers using inference_backend \"remote\"")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Listen address for --serve-inference (non-loopback needs inference_token)")
+    parser.add_argument("--port", type=int, default=0,
+                        help="Listen port for --serve-inference (default: inference_server_port)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    engine = DetectionEngine()
-    engine.start()
+    args = parse_args()
+    log_pipeline.start()
+    if args.analyze:
+        run_offline_analysis(args)
+    elif args.history:
+        print_detection_history(args)
+    elif args.serve_inference:
+        log_pipeline.add_file()
+        config = Config(require_token=False)
+        InferenceServer(config, args.host, args.port or config.inference_server_port,
+                        batch_size=args.batch_size or 1).run()
+    else:
+        log_pipeline.add_file()
+        config = Config()
+        if config.process_mode == "processes":
+            EngineSupervisor(config).start()
+        else:
+            DetectionEngine(config).start()
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Clearpoint AI — Camera Fleet Load Test
+Runs the full DetectionEngine against N fake cameras and a local mock of the
+Clearpoint API, stepping the camera count up to find how many cameras this
+box sustains and how alert latency and frame staleness degrade past that.
+
+Fake cameras are ffmpeg processes looping a clip in real time (-re
+-stream_loop -1, -c copy) to a local UDP MPEG-TS port, or publishing to a
+local RTSP server (e.g. mediamtx) with --rtsp-server. Each clip gets a
+scripted figure crossing the frame for 10s of every 30s (motion → burst
+sampling when burst_seconds is set), rendered once before the test so
+streaming costs no encode.
+
+Run:  python3 ~/clearpoint-ai/loadtest.py --cameras 1,2,4,8,12,16
+      python3 ~/clearpoint-ai/loadtest.py --video ~/clearpoint-recordings/<user>/footage/<cam> --step-seconds 120
+      python3 ~/clearpoint-ai/loadtest.py --api-latency 0.5 --api-failure-rate 0.1 --profile n100-16gb
+      python3 ~/clearpoint-ai/loadtest.py --summarize ~/clearpoint-logs/loadtest-*.json
+
+Writes a JSON report (one step per camera count, plus the max sustainable
+count for this box profile) to ~/clearpoint-logs.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+import threading
+from collections import Counter as Tally
+from datetime import datetime, timezone
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).parent))
+from detect import (  # noqa: E402
+    LOG_DIR, Config, DetectionEngine, LocalStatusServer, log, log_pipeline, metrics,
+)
+from benchmark import (  # noqa: E402
+    _collect_videos, _engine_version, _host_info, _parse_list, _percentiles,
+)
+
+REPORT_VERSION = 1
+MOTION_PERIOD = 30   # Seconds per scripted-motion cycle
+MOTION_ACTIVE = 10   # Seconds of each cycle with the figure crossing the frame
+
+
+# ─── Mock Clearpoint API ───────────────────────────────────
+class MockIngestServer:
+    """/api/ingest/alert and /api/ingest/system-log on 127.0.0.1 with
+    injected latency and failures. Records capture → ack time per alert."""
+
+    def __init__(self, port: int, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.api_base = f"http://127.0.0.1:{port}/api"
+        self._lock = threading.Lock()
+        self.reset()
+        self.server = LocalStatusServer(port)
+        self.server.add_route("/api/ingest/alert", self._alert, method="POST")
+        self.server.add_route("/api/ingest/system-log", self._system_log, method="POST")
+
+    def start(self):
+        self.server.start()
+
+    def stop(self):
+        self.server.stop()
+
+    def reset(self):
+        with self._lock:
+            self.alert_latency: list[float] = []  # Seconds, successful alerts only
+            self.alerts_ok = 0
+            self.alerts_failed = 0
+            self.system_logs: Tally = Tally()
+
+    def _respond(self) -> tuple[int, str, bytes]:
+        """Sleep the injected latency, then succeed or fail (503)."""
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if random.random() < self.failure_rate:
+            return 503, "application/json", b'{"error":"injected failure"}'
+        return 200, "application/json", b'{"ok":true}'
+
+    def _alert(self, _query, body, _headers):
+        payload = json.loads(body)
+        captured = (payload.get("metadata", {}).get("trace") or {}).get("captured_at")
+        status, content_type, resp = self._respond()
+        acked_at = time.time()
+        with self._lock:
+            if status != 200:
+                self.alerts_failed += 1
+            else:
+                self.alerts_ok += 1
+                if captured:
+                    self.alert_latency.append(
+                        acked_at - datetime.fromisoformat(captured).timestamp())
+        return status, content_type, resp
+
+    def _system_log(self, _query, body, _headers):
+        event = json.loads(body).get("event", "?")
+        with self._lock:
+            self.system_logs[event] += 1
+        return self._respond()
+
+    def take(self) -> dict:
+        """Counters and latencies since the last reset()."""
+        with self._lock:
+            return {
+                "alerts_ok": self.alerts_ok,
+                "alerts_failed": self.alerts_failed,
+                "alert_latency_ms": _percentiles([s * 1000 for s in self.alert_latency]),
+                "system_logs": dict(self.system_logs),
+            }
+
+
+# ─── Fake cameras ──────────────────────────────────────────
+def _clip_size(path: Path) -> tuple[int, int]:
+    cap = cv2.VideoCapture(str(path), cv2.CAP_FFMPEG)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        cap.release()
+
+
+def render_clip(source: Path | None, out: Path, seconds: float,
+                size: tuple[int, int], fps: int = 15) -> Path:
+    """Encode a loopable H.264 clip (a recorded segment, or SMPTE bars with
+    sensor-like noise when source is None) with a dark figure crossing the
+    frame for MOTION_ACTIVE seconds of every MOTION_PERIOD."""
+    if source is not None:
+        probed = _clip_size(source)
+        size = probed if all(probed) else size
+        inputs = ["-i", str(source)]
+    else:
+        # Noise keeps the quality gate from rejecting identical frames as frozen
+        inputs = ["-f", "lavfi", "-i",
+                  f"smptehdbars=size={size[0]}x{size[1]}:rate={fps},noise=alls=6:allf=t"]
+    w, h = size
+    figure = f"color=c=0x1e1e1e:size={max(2, w // 12) & ~1}x{max(2, h // 3) & ~1}"
+    overlay = (f"[0:v][1:v]overlay=shortest=1:y=(H-h)/2"
+               f":x='mod(t,{MOTION_PERIOD})/{MOTION_ACTIVE}*(W-w)'"
+               f":enable='lt(mod(t,{MOTION_PERIOD}),{MOTION_ACTIVE})'")
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-y", *inputs, "-f", "lavfi", "-i", figure,
+         "-filter_complex", overlay, "-t", str(seconds), "-an", "-c:v", "libx264",
+         "-preset", "veryfast", "-pix_fmt", "yuv420p", "-g", str(fps * 2), str(out)],
+        check=True, timeout=max(120, seconds * 10),
+    )
+    return out
+
+
+class FakeCamera:
+    """ffmpeg looping a clip in real time to UDP (MPEG-TS) or an RTSP server."""
+
+    def __init__(self, index: int, clip: Path, udp_port: int, rtsp_server: str = ""):
+        self.index = index
+        self.clip = clip
+        if rtsp_server:
+            self.url = f"{rtsp_server.rstrip('/')}/loadtest-{index}"
+            output = ["-f", "rtsp", "-rtsp_transport", "tcp", self.url]
+        else:
+            target = f"udp://127.0.0.1:{udp_port + index}"
+            self.url = f"{target}?overrun_nonfatal=1&fifo_size=1000000"
+            output = ["-f", "mpegts", f"{target}?pkt_size=1316"]
+        self.proc = subprocess.Popen(
+            ["ffmpeg", "-nostdin", "-v", "error", "-re", "-stream_loop", "-1",
+             "-i", str(clip), "-c", "copy", *output],
+            stdin=subprocess.DEVNULL,
+        )
+
+    @property
+    def camera(self) -> dict:
+        return {"id": f"loadtest-{self.index:03d}", "name": f"load-{self.index:03d}",
+                "rtsp_url": self.url}
+
+    def stop(self):
+        # Nothing to flush, and a looping -re ffmpeg ignores the first SIGTERM
+        self.proc.kill()
+        self.proc.wait()
+
+
+# ─── Step measurement ──────────────────────────────────────
+def _bucket_quantile(buckets: tuple, counts: list, q: float) -> float | None:
+    """Quantile estimate from histogram bucket counts (linear within a bucket)."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    cumulative, lower = 0, 0.0
+    for bound, count in zip(buckets + (float("inf"),), counts):
+        if count and cumulative + count >= rank:
+            if bound == float("inf"):
+                return lower  # Beyond the last bucket — report its bound
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    return lower
+
+
+def _staleness(before: dict, after: dict) -> dict:
+    """Frame age when analysis starts over the window: p50/p95 of all
+    cameras, and the worst camera's p95 (seconds, from histogram buckets)."""
+    buckets = metrics.grab_age.buckets
+    total = [0] * (len(buckets) + 1)
+    worst = 0.0
+    for labels, series in after.items():
+        prev = before.get(labels, [0] * len(series))
+        counts = [a - b for a, b in zip(series[:-1], prev[:-1])]
+        total = [t + c for t, c in zip(total, counts)]
+        worst = max(worst, _bucket_quantile(buckets, counts, 0.95) or 0.0)
+    p50, p95 = (_bucket_quantile(buckets, total, q) for q in (0.5, 0.95))
+    return {
+        "p50_s": round(p50, 3) if p50 is not None else None,
+        "p95_s": round(p95, 3) if p95 is not None else None,
+        "worst_camera_p95_s": round(worst, 3),
+    }
+
+
+def _counter_rate(before: dict, after: dict, seconds: float, cameras: int) -> float:
+    """Per-camera rate of a camera-labelled counter over the window."""
+    delta = sum(v - before.get(k, 0) for k, v in after.items())
+    return round(delta / seconds / cameras, 3) if seconds and cameras else 0.0
+
+
+def _snapshot() -> dict:
+    return {
+        "decoded": metrics.frames_decoded.snapshot(),
+        "analyzed": metrics.frames_analyzed.snapshot(),
+        "read_failures": metrics.read_failures.snapshot(),
+        "alerts": metrics.alerts.snapshot(),
+        "grab_age": metrics.grab_age.snapshot(),
+    }
+
+
+def _wait_for_frames(cameras: list[dict], timeout: float) -> bool:
+    names = {cam["name"] for cam in cameras}
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        decoded = {labels[0] for labels, v in metrics.frames_decoded.snapshot().items() if v}
+        if names <= decoded:
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def run_step(config: Config, fakes: list[FakeCamera], api: MockIngestServer, args,
+             source_fps: float) -> dict | None:
+    """Run the engine against len(fakes) cameras. None if interrupted."""
+    config.cameras = [f.camera for f in fakes]
+    engine = DetectionEngine(config)
+    if engine.detector.model is None:
+        log.error("Model not loaded — run setup-ai.sh first")
+        sys.exit(1)
+    runner = threading.Thread(target=engine.start, name="loadtest-engine", daemon=True)
+    runner.start()
+    try:
+        if not _wait_for_frames(config.cameras, args.connect_timeout):
+            log.warning(f"⚠️  Not every fake camera delivered frames within {args.connect_timeout:.0f}s")
+        time.sleep(args.warmup)
+
+        api.reset()
+        before = _snapshot()
+        cpu_start = os.times()
+        wall_start = time.time()
+        deadline = wall_start + args.step_seconds
+        while engine.running and time.time() < deadline:
+            time.sleep(0.5)
+        interrupted = not engine.running
+        wall = time.time() - wall_start
+        cpu_end = os.times()
+        after = _snapshot()
+        shed_level = engine.load_controller.level if engine.load_controller else 0
+        thermal_level = engine.thermal.level if engine.thermal else 0
+        alive = sum(m.is_alive() for m in engine.monitors)
+    finally:
+        engine._shutdown()
+        runner.join(timeout=30)
+    if interrupted:
+        return None
+
+    n = len(fakes)
+    cpu_seconds = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    dropped = sum(v - before["alerts"].get(k, 0)
+                  for k, v in after["alerts"].items() if k[1] == "dropped")
+    step = {
+        "cameras": n,
+        "duration_s": round(wall, 1),
+        "cpu_percent": round(cpu_seconds / wall * 100, 1) if wall else 0.0,
+        "load_per_cpu": round(os.getloadavg()[0] / (os.cpu_count() or 1), 2),
+        "decoded_fps_per_camera": _counter_rate(before["decoded"], after["decoded"], wall, n),
+        "analyzed_fps_per_camera": _counter_rate(before["analyzed"], after["analyzed"], wall, n),
+        "read_failures_per_camera_min": round(
+            _counter_rate(before["read_failures"], after["read_failures"], wall, n) * 60, 1),
+        "staleness": _staleness(before["grab_age"], after["grab_age"]),
+        "alerts_dropped": dropped,
+        "shed_level": shed_level,
+        "thermal_level": thermal_level,
+        "monitors_alive": alive,
+        "backend": engine.detector.backend_name,
+        **api.take(),
+    }
+    step["problems"] = _step_problems(step, config, args, source_fps)
+    step["sustainable"] = not step["problems"]
+    return step
+
+
+def _step_problems(step: dict, config: Config, args, source_fps: float) -> list[str]:
+    """Why this camera count is not sustainable (empty = sustainable)."""
+    problems = []
+    if step["monitors_alive"] < step["cameras"]:
+        problems.append(f"{step['cameras'] - step['monitors_alive']} monitors died")
+    # Async ingest has ffmpeg drop to ingest_fps before the frames reach Python
+    decode_rate = (min(source_fps, config.ingest_fps) if config.ingest_mode == "async"
+                   else source_fps)
+    if step["decoded_fps_per_camera"] < decode_rate * args.min_rate:
+        problems.append(f"decode {step['decoded_fps_per_camera']:.1f}/{decode_rate:g} fps")
+    base_rate = 1 / config.analysis_interval
+    if step["analyzed_fps_per_camera"] < base_rate * args.min_rate:
+        problems.append(f"analysis {step['analyzed_fps_per_camera']:.2f}/{base_rate:.2f} fps")
+    p95 = step["staleness"]["p95_s"]
+    if p95 is not None and p95 > args.max_staleness:
+        problems.append(f"frame staleness p95 {p95:.2f}s")
+    alert_p95 = step["alert_latency_ms"].get("p95")
+    if alert_p95 is not None and alert_p95 > args.max_alert_latency * 1000:
+        problems.append(f"alert latency p95 {alert_p95 / 1000:.1f}s")
+    if step["alerts_dropped"]:
+        problems.append(f"{step['alerts_dropped']} alerts dropped")
+    if step["shed_level"]:
+        problems.append(f"load shedding level {step['shed_level']}")
+    if step["thermal_level"]:
+        problems.append(f"thermal back-off level {step['thermal_level']}")
+    return problems
+
+
+# ─── Reports ───────────────────────────────────────────────
+def _box_profile(name: str, config: Config, backend: str) -> dict:
+    """What the result depends on: hardware and the engine settings that
+    change per-camera cost."""
+    memory_gb = None
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemTotal:"):
+                memory_gb = round(int(line.split()[1]) / 1024 / 1024, 1)
+                break
+    except OSError:
+        pass
+    return {
+        "name": name or platform.node(),
+        "host": {**_host_info(), "memory_gb": memory_gb},
+        "settings": {
+            "backend": backend,
+            "ingest_mode": config.ingest_mode,
+            "analysis_interval": config.analysis_interval,
+            "burst_seconds": config.burst_seconds,
+            "inference_workers": config.inference_workers,
+            "cpu_placement": config.cpu_placement,
+            "load_shedding": config.load_shedding,
+        },
+    }
+
+
+def summarize(paths: list[str]):
+    """One line per report: profile → max sustainable cameras."""
+    for path in paths:
+        report = json.loads(Path(path).read_text())
+        profile = report["profile"]
+        host = profile["host"]
+        settings = profile["settings"]
+        last = next((s for s in reversed(report["steps"])
+                     if s["cameras"] == report["max_sustainable_cameras"]), None)
+        detail = (f", staleness p95 {last['staleness']['p95_s']}s, "
+                  f"alert p95 {last['alert_latency_ms'].get('p95', '-')}ms" if last else "")
+        log.info(f"{profile['name']}: {report['max_sustainable_cameras']} cameras "
+                 f"({host['cpu_model']}, {host['cpu_count']} CPUs, {host['memory_gb']}GB; "
+                 f"{settings['backend']}, {settings['ingest_mode']}{detail}) — {Path(path).name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camera fleet load test for the detection engine")
+    parser.add_argument("--video", action="append",
+                        help="Recorded MP4 segment or directory to loop (repeatable; default: SMPTE bars)")
+    parser.add_argument("--synthetic-size", default="1920x1080", help="WxH of generated clips")
+    parser.add_argument("--clip-seconds", type=float, default=60, help="Length of each rendered clip")
+    parser.add_argument("--cameras", default="1,2,4,6,8,12,16", help="Camera counts to step through")
+    parser.add_argument("--step-seconds", type=float, default=90, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=15, help="Unmeasured seconds after cameras connect")
+    parser.add_argument("--connect-timeout", type=float, default=30)
+    parser.add_argument("--rtsp-server", default="",
+                        help="Publish to this RTSP server (e.g. rtsp://127.0.0.1:8554) instead of UDP")
+    parser.add_argument("--udp-port", type=int, default=23000, help="First UDP port for fake cameras")
+    parser.add_argument("--api-port", type=int, default=9190, help="Mock API port")
+    parser.add_argument("--api-latency", type=float, default=0.1, help="Seconds per mock API response")
+    parser.add_argument("--api-jitter", type=float, default=0.0, help="Extra random 0..N seconds")
+    parser.add_argument("--api-failure-rate", type=float, default=0.0, help="Share of 503 responses")
+    parser.add_argument("--cooldown", type=float, default=10, help="Alert cooldown during the test")
+    parser.add_argument("--min-rate", type=float, default=0.9,
+                        help="Decode/analysis rate share below which a step is not sustainable")
+    parser.add_argument("--max-staleness", type=float, default=1.0, help="Max p95 frame age (s)")
+    parser.add_argument("--max-alert-latency", type=float, default=5.0, help="Max p95 capture → ack (s)")
+    parser.add_argument("--stop-after", type=int, default=2,
+                        help="Stop after this many unsustainable steps in a row")
+    parser.add_argument("--profile", default="", help="Box profile name (default: hostname)")
+    parser.add_argument("--output", help="Report path (default: ~/clearpoint-logs/loadtest-<ts>.json)")
+    parser.add_argument("--summarize", nargs="+", metavar="REPORT",
+                        help="Print max sustainable cameras from existing reports and exit")
+    args = parser.parse_args()
+    log_pipeline.start()
+
+    if args.summarize:
+        summarize(args.summarize)
+        return
+    if not shutil.which("ffmpeg"):
+        log.error("ffmpeg not found — it plays the fake cameras")
+        sys.exit(1)
+    videos = _collect_videos(args.video) if args.video else [None]
+    if not videos:
+        log.error("No video segments found")
+        sys.exit(1)
+    size = tuple(int(v) for v in args.synthetic_size.lower().split("x"))
+    counts = sorted(int(c) for c in _parse_list(args.cameras))
+
+    # The box's own ai-config.json settings (backend, ingest mode, intervals…)
+    # with fake cameras, the mock API and nothing written to the real stores
+    config = Config(require_token=False)
+    if config.process_mode == "processes":
+        log.warning("⚠️  process_mode \"processes\" is not load-tested — running the threaded engine")
+    config.device_token = "loadtest"
+    config.cooldown_seconds = args.cooldown
+    config.metrics_port = 0
+    config.detection_history = False
+    config.alert_clips = False
+    config.snapshot_dir = LOG_DIR / "loadtest-snapshots"
+    config.snapshot_dir.mkdir(exist_ok=True)
+
+    api = MockIngestServer(args.api_port, args.api_latency, args.api_jitter, args.api_failure_rate)
+    api.start()
+    config.api_base = api.api_base
+
+    workdir = Path(tempfile.mkdtemp(prefix="clearpoint-loadtest-"))
+    fakes: list[FakeCamera] = []
+    steps = []
+    profile = None
+    source_fps = None
+    try:
+        log.info(f"🎬 Rendering {len(videos)} clip(s) with scripted motion...")
+        clips = [render_clip(v, workdir / f"clip{i}.mp4", args.clip_seconds, size)
+                 for i, v in enumerate(videos)]
+        source_fps = cv2.VideoCapture(str(clips[0])).get(cv2.CAP_PROP_FPS) or 15
+
+        failures = 0
+        for count in counts:
+            while len(fakes) < count:
+                i = len(fakes)
+                fakes.append(FakeCamera(i, clips[i % len(clips)], args.udp_port, args.rtsp_server))
+            log.info(f"⏱️  Load test: {count} cameras ({args.step_seconds:.0f}s)")
+            step = run_step(config, fakes[:count], api, args, source_fps)
+            if step is None:
+                log.info("🛑 Interrupted")
+                break
+            if profile is None:
+                profile = _box_profile(args.profile, config, step["backend"])
+            steps.append(step)
+            verdict = "✅ sustainable" if step["sustainable"] else f"❌ {'; '.join(step['problems'])}"
+            log.info(
+                f"   {count} cameras: {step['analyzed_fps_per_camera']:.2f} analyzed fps/camera, "
+                f"staleness p95 {step['staleness']['p95_s'] or '-'}s, alert p95 "
+                f"{step['alert_latency_ms'].get('p95', '-')}ms, CPU {step['cpu_percent']:.0f}% — {verdict}"
+            )
+            failures = 0 if step["sustainable"] else failures + 1
+            if failures >= args.stop_after:
+                break
+    finally:
+        for fake in fakes:
+            fake.stop()
+        api.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+        shutil.rmtree(config.snapshot_dir, ignore_errors=True)
+
+    max_cameras = 0  # Largest count before the first unsustainable step
+    for step in steps:
+        if not step["sustainable"]:
+            break
+        max_cameras = step["cameras"]
+    report = {
+        "report_version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "engine_version": _engine_version(),
+        "profile": profile or _box_profile(args.profile, config, config.inference_backend),
+        "source": {
+            "videos": [str(v) for v in videos if v is not None] or None,
+            "synthetic": None if args.video else list(size),
+            "transport": "rtsp" if args.rtsp_server else "udp",
+            "fps": source_fps,
+        },
+        "mock_api": {"latency_s": args.api_latency, "jitter_s": args.api_jitter,
+                     "failure_rate": args.api_failure_rate},
+        "limits": {"min_rate": args.min_rate, "max_staleness_s": args.max_staleness,
+                   "max_alert_latency_s": args.max_alert_latency},
+        "max_sustainable_cameras": max_cameras,
+        "steps": steps,
+    }
+    out = Path(args.output) if args.output else \
+        LOG_DIR / f"loadtest-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    log.info(f"📊 Max sustainable cameras: {report['max_sustainable_cameras']}")
+    log.info(f"📄 Report written: {out}")
+
+
+if __name__ == "__main__":
+    main()
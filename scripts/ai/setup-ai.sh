@@ -19,6 +19,8 @@ mkdir -p "$AI_DIR" "$MODEL_DIR" "$HOME/clearpoint-snapshots" "$HOME/clearpoint-l
 
 # === Copy detection script ===
 cp "$SCRIPT_DIR/detect.py" "$AI_DIR/"
+cp "$SCRIPT_DIR/benchmark.py" "$AI_DIR/"
+cp "$SCRIPT_DIR/loadtest.py" "$AI_DIR/"
 cp "$SCRIPT_DIR/requirements.txt" "$AI_DIR/"
 echo "📁 Copied files to $AI_DIR"
 
@@ -118,9 +120,10 @@ Restart=always
 RestartSec=10
 Environment=CLEARPOINT_DEVICE_TOKEN=$(grep -E '^CLEARPOINT_DEVICE_TOKEN=' "$HOME/clearpoint-core/.env" 2>/dev/null | cut -d'=' -f2- | tr -d '"' | tr -d "'" || echo "")
 
-# Logging
-StandardOutput=append:$HOME/clearpoint-logs/ai-detect.log
-StandardError=append:$HOME/clearpoint-logs/ai-detect-error.log
+# Logging: detect.py writes and rotates ~/clearpoint-logs/engine/detect.log
+# itself; anything else (startup errors, tracebacks) goes to journald
+StandardOutput=journal
+StandardError=journal
 
 # Resource limits (200% = 2 full CPU cores)
 CPUQuota=200%
@@ -151,13 +154,16 @@ echo "📂 Files:"
 echo "   Script:    $AI_DIR/detect.py"
 echo "   Model:     $MODEL_FILE (YOLOv8n)"
 echo "   Snapshots: $HOME/clearpoint-snapshots/"
-echo "   Logs:      $HOME/clearpoint-logs/ai-detect.log"
+echo "   Logs:      $HOME/clearpoint-logs/engine/detect.log (+ journalctl -u clearpoint-ai)"
 echo ""
 echo "🚀 Commands:"
 echo "   Start:     sudo systemctl start clearpoint-ai"
 echo "   Stop:      sudo systemctl stop clearpoint-ai"
 echo "   Status:    sudo systemctl status clearpoint-ai"
-echo "   Logs:      tail -f ~/clearpoint-logs/ai-detect.log"
+echo "   Logs:      tail -f ~/clearpoint-logs/engine/detect.log"
+echo "   Benchmark: $VENV_DIR/bin/python3 $AI_DIR/benchmark.py --synthetic"
+echo "   Load test: $VENV_DIR/bin/python3 $AI_DIR/loadtest.py --cameras 1,2,4,8  (stop clearpoint-ai first)"
+echo "   Re-scan:   $VENV_DIR/bin/python3 $AI_DIR/detect.py --analyze ~/clearpoint-recordings"
 echo ""
 echo "⚙️  Config:   ~/clearpoint-core/ai-config.json"
 echo "   (auto-generated from camera scripts on first run)"